@@ -0,0 +1,24 @@
+"""
+Dữ liệu thị trường / vĩ mô: kho cột memory-map cho các chuỗi thời gian trong data/bronze và data/silver.
+Export lười (PEP 562) giống news_specialization: chỉ import module khi cần.
+"""
+import importlib
+
+_EXPORTS = {
+    'SeriesStore': 'series_store',
+    'FeatureSpec': 'feature_matrix',
+    'FeatureMatrix': 'feature_matrix',
+    'FeatureMatrixBuilder': 'feature_matrix',
+    'RiskIndicatorEngine': 'risk_indicators',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,256 @@
+import os
+import re
+import fnmatch
+
+try:
+    from .series_store import SeriesStore, DATA_DIR, SOURCE_GROUPS, file_digest
+except ImportError:
+    from series_store import SeriesStore, DATA_DIR, SOURCE_GROUPS, file_digest
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+EXCEL_LAYER = 'bronze'
+# Cấu hình riêng cho từng workbook (khớp theo tên file):
+# - name   : tên series trong kho (không phụ thuộc khoảng năm trong tên file tải về);
+# - columns: đổi tên cột sau khi chuẩn hóa header.
+WORKBOOKS = {
+    'Internal_Data_FinancialReport*.xlsx': {
+        'name': 'Internal_Data_FinancialReport',
+    },
+    'Snb-chart-data-zimomach*.xlsx': {
+        'name': 'SNB_POLICY_RATE',
+        # Header dòng 16: "SNB policy rate 1" | "Target range 2" (cận trên) | "Target range 2" (cận dưới) | "SARON ..."
+        'columns': {
+            'snb policy rate': 'policy_rate',
+            'target range_1': 'target_high',
+            'target range_2': 'target_low',
+            'saron close of trading': 'saron',
+        },
+    },
+}
+# Nhãn quý trong báo cáo nội bộ: 3Q20, 1Q2023, 2020Q3
+QUARTER_PATTERN = re.compile(r'^(?:([1-4])Q(\d{2}|\d{4})|(\d{4})Q([1-4]))$', re.IGNORECASE)
+# Chú thích cuối header của SNB ("SNB policy rate 1" -> "SNB policy rate")
+FOOTNOTE_PATTERN = re.compile(r'\s+\d+$')
+INTERNAL_SILVER_PATH = os.path.join(DATA_DIR, 'silver', 'internal_data', 'Internal_Data_Financial_Report.csv')
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and value != value) or (isinstance(value, str) and not value.strip())
+
+
+def _header_label(value):
+    return FOOTNOTE_PATTERN.sub('', str(value).strip()).lower()
+
+
+def _dedupe(labels):
+    """Nhãn trùng nhau được đánh số theo thứ tự: ['a', 'a'] -> ['a_1', 'a_2']."""
+    counts = {label: labels.count(label) for label in labels}
+    seen = {}
+    result = []
+    for label in labels:
+        if counts[label] > 1:
+            seen[label] = seen.get(label, 0) + 1
+            label = f'{label}_{seen[label]}'
+        result.append(label)
+    return result
+
+
+def quarter_end(label):
+    """'3Q20' -> Timestamp('2020-09-30'); trả về None nếu không phải nhãn quý."""
+    import pandas as pd
+
+    match = QUARTER_PATTERN.match(str(label).strip())
+    if not match:
+        return None
+    quarter, year = (match.group(1), match.group(2)) if match.group(1) else (match.group(4), match.group(3))
+    year = int(year) + (2000 if len(year) == 2 else 0)
+    return pd.Period(year=year, quarter=int(quarter), freq='Q').end_time.normalize()
+
+
+def _blank_mask(grid):
+    # DataFrame.applymap được đổi tên thành DataFrame.map từ pandas 2.1
+    return grid.map(_is_blank) if hasattr(grid, 'map') else grid.applymap(_is_blank)
+
+
+def _trim(grid):
+    """Bỏ dòng / cột hoàn toàn trống (openpyxl trả về cả các ô đã định dạng nhưng rỗng)."""
+    mask = _blank_mask(grid)
+    return grid.loc[~mask.all(axis=1), ~mask.all(axis=0)]
+
+
+def parse_quarterly_sheet(grid):
+    """
+    Layout "ngang" của báo cáo nội bộ: cột A là tên chỉ số ("Chỉ số"), dòng đầu là các quý (3Q20 ... 1Q23).
+    :return: (DataFrame index ngày cuối quý, cột = chỉ số viết thường; dict {cột: tên gốc}) hoặc None nếu không khớp.
+    """
+    import pandas as pd
+
+    grid = _trim(grid)
+    if grid.empty:
+        return None
+    header = list(grid.iloc[0, 1:])
+    dates = [quarter_end(label) for label in header]
+    if not dates or any(d is None for d in dates):
+        return None
+
+    body = grid.iloc[1:]
+    labels = [str(label).strip() for label in body.iloc[:, 0]]
+    columns = _dedupe([label.lower() for label in labels])
+    values = body.iloc[:, 1:].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64').T
+    frame = pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='date'), columns=columns)
+    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+    return frame, dict(zip(columns, labels))
+
+
+def parse_dated_sheet(grid):
+    """
+    Layout "dọc" có phần mở đầu tùy ý (vd. file SNB: 15 dòng mô tả, header ở dòng 16, dữ liệu từ dòng 17):
+    cột A là ngày, header là dòng không trống gần nhất phía trên dòng ngày đầu tiên.
+    :return: (DataFrame index ngày, cột float64; dict {cột: header gốc}) hoặc None nếu không tìm thấy dữ liệu.
+    """
+    import pandas as pd
+
+    grid = _trim(grid)
+    if grid.empty:
+        return None
+    dates = pd.to_datetime(grid.iloc[:, 0].map(lambda v: None if _is_blank(v) else str(v).strip()),
+                           errors='coerce', format='mixed')
+    has_values = ~_blank_mask(grid.iloc[:, 1:]).all(axis=1)
+    data_rows = (dates.notna() & has_values).to_numpy()
+    if not data_rows.any():
+        return None
+    first = int(data_rows.argmax())
+    header_row = grid.iloc[first - 1, 1:] if first > 0 else None
+
+    raw_labels = [
+        str(v).strip() if header_row is not None and not _is_blank(v) else f'value_{i + 1}'
+        for i, v in enumerate(header_row if header_row is not None else grid.columns[1:])
+    ]
+    columns = _dedupe([_header_label(label) for label in raw_labels])
+    body = grid.iloc[first:][data_rows[first:]]
+    values = body.iloc[:, 1:].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64')
+    frame = pd.DataFrame(values, index=pd.DatetimeIndex(dates[first:][data_rows[first:]].to_numpy(), name='date'),
+                         columns=columns)
+    frame = frame[~frame.index.duplicated(keep='last')].sort_index().dropna(axis=1, how='all')
+    return frame, {c: label for c, label in zip(columns, raw_labels) if c in frame.columns}
+
+
+def parse_sheet(grid):
+    """Thử lần lượt các layout đã biết; None nếu sheet không chứa chuỗi thời gian."""
+    return parse_quarterly_sheet(grid) or parse_dated_sheet(grid)
+
+
+def _workbook_config(path):
+    filename = os.path.basename(path)
+    for pattern, config in WORKBOOKS.items():
+        if fnmatch.fnmatch(filename, pattern):
+            return config
+    return {'name': os.path.splitext(filename)[0]}
+
+
+def discover_workbooks(data_dir=DATA_DIR, groups=SOURCE_GROUPS):
+    """Mọi file .xlsx trong data/bronze/<group>/..."""
+    paths = []
+    for group in groups:
+        for dirpath, _, filenames in os.walk(os.path.join(data_dir, EXCEL_LAYER, group)):
+            paths.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.lower().endswith('.xlsx'))
+    return paths
+
+
+def ingest_workbook(path, store=None, force=False):
+    """
+    Chuyển một workbook thành snapshot dạng cột trong SeriesStore.
+    Snapshot gắn với hash SHA-256 của file: nếu file không đổi thì không mở Excel (trả về các series đã có).
+    Workbook một sheet -> series 'bronze/<name>'; nhiều sheet -> 'bronze/<name>/<sheet>'.
+    :return: Danh sách tên series của workbook.
+    """
+    import pandas as pd
+
+    store = store or SeriesStore()
+    config = _workbook_config(path)
+    base = f"{EXCEL_LAYER}/{config['name']}"
+    existing = [n for n in store.names() if store.manifest[n].get('source') == path]
+    if existing and not force and all(store.is_fresh(n, path)[0] for n in existing):
+        return existing
+
+    digest = file_digest(path)
+    sheets = pd.read_excel(path, sheet_name=None, header=None, dtype=object)
+    parsed = {}
+    for sheet, grid in sheets.items():
+        result = parse_sheet(grid)
+        if result is None:
+            print(f"⚠️ Bỏ qua sheet '{sheet}' của {os.path.basename(path)}: không nhận diện được layout.")
+            continue
+        parsed[sheet] = result
+
+    names = []
+    for sheet, (frame, fields) in parsed.items():
+        name = base if len(parsed) == 1 else f"{base}/{sheet}"
+        renames = config.get('columns', {})
+        frame = frame.rename(columns=renames)
+        fields = {renames.get(c, c): label for c, label in fields.items()}
+        store.write(name, frame, source=path, digest=digest, fields=fields)
+        names.append(name)
+    for name in existing:
+        if name not in names:
+            store.remove(name)
+    store.save_manifest()
+    print(f"📗 {os.path.basename(path)}: {len(names)} snapshot ({', '.join(names)}).")
+    return names
+
+
+def ingest_workbooks(store=None, data_dir=DATA_DIR, force=False):
+    """Snapshot mọi workbook trong data/bronze; chỉ workbook thay đổi mới bị parse lại."""
+    store = store or SeriesStore(data_dir=data_dir)
+    return {path: ingest_workbook(path, store, force=force) for path in discover_workbooks(data_dir)}
+
+
+def load_workbook(path, store=None):
+    """
+    Đọc workbook qua snapshot: dict {tên series: DataFrame}. Excel chỉ được mở khi snapshot chưa có hoặc file đã đổi.
+    """
+    store = store or SeriesStore()
+    return {name: store.load(name) for name in ingest_workbook(path, store)}
+
+
+def internal_report_silver(frame, fields=None):
+    """
+    Dựng bảng silver của báo cáo nội bộ từ snapshot theo quý (thay cho file CSV làm tay):
+    số liệu quý Q có hiệu lực từ ngày đầu quý kế tiếp tới hết quý đó, điền theo từng ngày lịch;
+    chỉ số bị bỏ trống trong một quý giữ giá trị của quý gần nhất có số liệu.
+    Cột giữ tên gốc trong workbook; index tên 'time' như các file silver khác.
+    """
+    import pandas as pd
+
+    available = frame.index + pd.Timedelta(days=1)
+    last_day = (frame.index[-1] + pd.offsets.QuarterEnd(1)).normalize()
+    days = pd.date_range(available[0], last_day, freq='D', name='time')
+    silver = frame.set_axis(available).ffill().reindex(days, method='ffill')
+    if fields:
+        silver = silver.rename(columns=fields)
+    return silver
+
+
+def export_internal_silver(store=None, name=f"{EXCEL_LAYER}/Internal_Data_FinancialReport", path=INTERNAL_SILVER_PATH):
+    """Ghi data/silver/internal_data/Internal_Data_Financial_Report.csv từ snapshot (ghi file tạm rồi os.replace)."""
+    store = store or SeriesStore()
+    silver = internal_report_silver(store.load(name), store.manifest[name]['fields'])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    silver.to_csv(tmp_path, date_format='%Y-%m-%d')
+    os.replace(tmp_path, path)
+    print(f"✅ Đã ghi {len(silver)} dòng -> {path}")
+    return path
+
+
+def main():
+    store = SeriesStore()
+    ingest_workbooks(store)
+    if f"{EXCEL_LAYER}/Internal_Data_FinancialReport" in store:
+        export_internal_silver(store)
+
+
+if __name__ == "__main__":
+    main()
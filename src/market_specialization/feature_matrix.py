@@ -0,0 +1,269 @@
+import os
+import json
+
+import numpy as np
+
+try:
+    from .series_store import SeriesStore
+except ImportError:
+    from series_store import SeriesStore
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+# Lịch giao dịch mặc định: các ngày có giá cổ phiếu Credit Suisse
+DEFAULT_CALENDAR = 'bronze/PRICE_CS_1D'
+BUSINESS_CALENDAR = 'business'
+FEATURE_DIR = os.path.join('data', 'columnar', 'features')
+# ffill: lấy quan sát gần nhất đã công bố | exact: chỉ nhận quan sát đúng ngày, ngược lại NaN | zero: như exact nhưng điền 0
+FILL_POLICIES = ('ffill', 'exact', 'zero')
+# Độ trễ công bố xấp xỉ (ngày lịch) của số liệu vĩ mô: CPI ~ 2 tuần sau cuối tháng, GDP ~ 2 tháng sau cuối quý
+CPI_PUBLICATION_LAG = 14
+GDP_PUBLICATION_LAG = 60
+MIN_CAPACITY = 256
+
+
+class FeatureSpec:
+    def __init__(self, series, column='close', name=None, fill='ffill', lag_days=0, max_age_days=None):
+        """
+        Mô tả một cột của ma trận feature.
+        :param series: Tên series trong SeriesStore (vd. 'bronze/CDS_5Y_CS_1D').
+        :param column: Cột của series (vd. 'close').
+        :param name: Tên cột trong ma trận (mặc định: tên file của series, thêm '_<column>' nếu không phải 'close').
+        :param fill: Chính sách điền giá trị cho ngày không có quan sát (xem FILL_POLICIES).
+        :param lag_days: Độ trễ công bố: quan sát ghi ngày d chỉ được dùng từ ngày d + lag_days (tránh look-ahead).
+        :param max_age_days: Với 'ffill', quan sát cũ hơn số ngày này (tính từ ngày công bố) coi như thiếu (NaN).
+        """
+        if fill not in FILL_POLICIES:
+            raise ValueError(f"fill phải thuộc {FILL_POLICIES}, nhận được '{fill}'.")
+        self.series = series
+        self.column = column
+        self.name = name or series.rsplit('/', 1)[-1] + ('' if column == 'close' else f'_{column}')
+        self.fill = fill
+        self.lag_days = int(lag_days)
+        self.max_age_days = max_age_days
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'series': self.series,
+            'column': self.column,
+            'fill': self.fill,
+            'lag_days': self.lag_days,
+            'max_age_days': self.max_age_days,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['series'], data['column'], name=data['name'], fill=data['fill'],
+            lag_days=data['lag_days'], max_age_days=data['max_age_days']
+        )
+
+
+# Bộ feature mặc định cho nghiên cứu giai đoạn căng thẳng của Credit Suisse
+DEFAULT_FEATURES = (
+    FeatureSpec('bronze/PRICE_CS_1D', name='cs_close'),
+    FeatureSpec('bronze/PRICE_CS_1D', 'volume', name='cs_volume', fill='exact'),
+    FeatureSpec('bronze/CDS_5Y_CS_1D', name='cs_cds_5y'),
+    FeatureSpec('bronze/CBOE_Volatility_Index_FRED', name='vix'),
+    FeatureSpec('bronze/SX7E_STOXX_Banks_EUR_Price', name='sx7e'),
+    FeatureSpec('bronze/FED_FUNDS', name='fed_funds'),
+    FeatureSpec('bronze/ECB_INTEREST_RATE_FRED', name='ecb_rate'),
+    # Snapshot của workbook SNB (excel_ingest.py); policy rate chỉ có từ 06/2019, trước đó dùng biên mục tiêu
+    FeatureSpec('bronze/SNB_POLICY_RATE', 'policy_rate', name='snb_policy_rate'),
+    FeatureSpec('bronze/SNB_POLICY_RATE', 'target_high', name='snb_target_high'),
+    FeatureSpec('bronze/SNB_POLICY_RATE', 'saron', name='saron'),
+    FeatureSpec('bronze/ECONOMICS_CHCPI-1D', name='ch_cpi', lag_days=CPI_PUBLICATION_LAG),
+    FeatureSpec('bronze/ECONOMICS_EUCPI-1D', name='eu_cpi', lag_days=CPI_PUBLICATION_LAG),
+    FeatureSpec('bronze/ECONOMICS_USCPI-1D', name='us_cpi', lag_days=CPI_PUBLICATION_LAG),
+    FeatureSpec('bronze/ECONOMICS_CHGDPCP_1D', name='ch_gdp', lag_days=GDP_PUBLICATION_LAG),
+    FeatureSpec('bronze/ECONOMICS_EUGDPCP_1D', name='eu_gdp', lag_days=GDP_PUBLICATION_LAG),
+    FeatureSpec('bronze/ECONOMICS_USGDPCP_1D', name='us_gdp', lag_days=GDP_PUBLICATION_LAG),
+    # Ngày không có tin = điểm rủi ro 0
+    FeatureSpec('silver/news00', 'total_mark', name='news_total_mark', fill='zero'),
+)
+
+
+def asof_join(source_dates, source_values, target_dates, fill='ffill', lag_days=0, max_age_days=None):
+    """
+    As-of join vector hóa một series lên lịch target_dates (đều là datetime64[D] tăng dần).
+    Quan sát ghi ngày d có hiệu lực từ d + lag_days; giá trị NaN của nguồn bị bỏ qua.
+    :return: Mảng float64 cùng độ dài target_dates.
+    """
+    source_dates = np.asarray(source_dates, dtype='datetime64[D]')
+    source_values = np.asarray(source_values, dtype='float64')
+    target_dates = np.asarray(target_dates, dtype='datetime64[D]')
+    valid = ~np.isnan(source_values)
+    available = source_dates[valid] + np.timedelta64(lag_days, 'D')
+    values = source_values[valid]
+
+    out = np.full(len(target_dates), 0.0 if fill == 'zero' else np.nan)
+    if not len(values):
+        return out
+    idx = np.searchsorted(available, target_dates, side='right') - 1
+    matched = idx >= 0
+    safe_idx = np.maximum(idx, 0)
+    if fill == 'ffill':
+        if max_age_days is not None:
+            matched &= (target_dates - available[safe_idx]) <= np.timedelta64(max_age_days, 'D')
+    else:
+        matched &= available[safe_idx] == target_dates
+    out[matched] = values[idx[matched]]
+    return out
+
+
+class FeatureMatrix:
+    def __init__(self, dates, values, features):
+        """
+        Ma trận feature theo ngày: `values` là mảng float64 C-contiguous shape (số ngày, số feature),
+        `dates` là datetime64[D], `features` là metadata của từng cột (FeatureSpec).
+        Bộ đệm được cấp phát dư (tăng gấp đôi) để append ngày mới không phải chép lại toàn bộ lịch sử mỗi lần.
+        """
+        self.features = list(features)
+        self._dates = np.asarray(dates, dtype='datetime64[D]')
+        self._values = values
+        self._n = len(self._dates)
+
+    @property
+    def dates(self):
+        return self._dates[:self._n]
+
+    @property
+    def values(self):
+        return self._values[:self._n]
+
+    @property
+    def columns(self):
+        return [spec.name for spec in self.features]
+
+    @property
+    def metadata(self):
+        return [spec.to_dict() for spec in self.features]
+
+    def __len__(self):
+        return self._n
+
+    def column(self, name):
+        return self.values[:, self.columns.index(name)]
+
+    def _reserve(self, extra):
+        needed = self._n + extra
+        if needed <= len(self._dates) and self._values.flags.writeable:
+            return
+        capacity = max(needed, 2 * self._n, MIN_CAPACITY)
+        dates = np.empty(capacity, dtype='datetime64[D]')
+        values = np.empty((capacity, len(self.features)), dtype='float64')
+        dates[:self._n] = self._dates[:self._n]
+        values[:self._n] = self._values[:self._n]
+        self._dates, self._values = dates, values
+
+    def append(self, dates, values):
+        """Thêm các dòng mới (ngày phải lớn hơn ngày cuối hiện có)."""
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        if not len(dates):
+            return
+        if self._n and dates[0] <= self._dates[self._n - 1]:
+            raise ValueError(f"Ngày append ({dates[0]}) phải sau ngày cuối của ma trận ({self._dates[self._n - 1]}).")
+        self._reserve(len(dates))
+        self._dates[self._n:self._n + len(dates)] = dates
+        self._values[self._n:self._n + len(dates)] = values
+        self._n += len(dates)
+
+    def frame(self):
+        """DataFrame (index ngày) trên cùng vùng nhớ với `values`."""
+        import pandas as pd
+
+        return pd.DataFrame(self.values, index=pd.DatetimeIndex(self.dates, name='date'), columns=self.columns, copy=False)
+
+    def save(self, directory):
+        """Lưu ma trận (dates.npy, values.npy, features.json) - ghi file tạm rồi os.replace, metadata ghi cuối."""
+        os.makedirs(directory, exist_ok=True)
+        for filename, array in (('dates.npy', self.dates), ('values.npy', self.values)):
+            path = os.path.join(directory, filename)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, array)
+            os.replace(tmp_path, path)
+        path = os.path.join(directory, 'features.json')
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, directory):
+        """Load ma trận đã lưu dạng memory-map (chỉ đọc); lần append đầu tiên mới chép sang bộ đệm ghi được."""
+        with open(os.path.join(directory, 'features.json'), 'r', encoding='utf-8') as f:
+            features = [FeatureSpec.from_dict(item) for item in json.load(f)]
+        dates = np.load(os.path.join(directory, 'dates.npy'), mmap_mode='r')
+        values = np.load(os.path.join(directory, 'values.npy'), mmap_mode='r')
+        return cls(dates, values, features)
+
+
+class FeatureMatrixBuilder:
+    def __init__(self, features=DEFAULT_FEATURES, store=None, calendar=DEFAULT_CALENDAR):
+        """
+        Dựng ma trận feature bằng as-of join vector hóa (np.searchsorted) từng series trong SeriesStore
+        lên một lịch giao dịch, với chính sách điền và độ trễ công bố riêng cho từng series.
+        :param features: Danh sách FeatureSpec.
+        :param store: SeriesStore (mặc định: data/columnar).
+        :param calendar: Tên series dùng làm lịch (các ngày series đó có dữ liệu) hoặc 'business' (thứ 2 - thứ 6).
+        """
+        self.features = list(features)
+        names = [spec.name for spec in self.features]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Tên feature bị trùng: {sorted({n for n in names if names.count(n) > 1})}")
+        self.store = store or SeriesStore()
+        self.calendar = calendar
+
+    def calendar_dates(self, start=None, end=None):
+        """Các ngày của lịch giao dịch trong [start, end] (datetime64[D])."""
+        start = np.datetime64(start, 'D') if start is not None else None
+        end = np.datetime64(end, 'D') if end is not None else None
+        if self.calendar == BUSINESS_CALENDAR:
+            spans = [self.store.arrays(spec.series)[0] for spec in self.features]
+            lo = start if start is not None else min(d[0] for d in spans if len(d))
+            hi = end if end is not None else max(d[-1] for d in spans if len(d))
+            days = np.arange(lo, hi + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+            return days[np.is_busday(days)]
+        dates = self.store.arrays(self.calendar)[0]
+        lo = 0 if start is None else np.searchsorted(dates, start, side='left')
+        hi = len(dates) if end is None else np.searchsorted(dates, end, side='right')
+        return np.array(dates[lo:hi], dtype='datetime64[D]')
+
+    def _rows(self, dates):
+        values = np.empty((len(dates), len(self.features)), dtype='float64')
+        for j, spec in enumerate(self.features):
+            source_dates, source_values = self.store.column(spec.series, spec.column)
+            values[:, j] = asof_join(
+                source_dates, source_values, dates,
+                fill=spec.fill, lag_days=spec.lag_days, max_age_days=spec.max_age_days
+            )
+        return values
+
+    def build(self, start=None, end=None):
+        """Dựng toàn bộ ma trận trên lịch trong [start, end]."""
+        dates = self.calendar_dates(start, end)
+        matrix = FeatureMatrix(dates, self._rows(dates), self.features)
+        if not len(dates):
+            # Lịch rỗng (vd. start sau ngày cuối của dữ liệu): trả về ma trận 0 dòng, extend() nối tiếp được về sau
+            print(f"⚠️ Ma trận feature rỗng: không có ngày nào trên lịch trong [{start}, {end}].")
+            return matrix
+        print(f"🧮 Ma trận feature: {len(matrix)} ngày x {len(self.features)} cột ({dates[0]} -> {dates[-1]}).")
+        return matrix
+
+    def extend(self, matrix, end=None):
+        """
+        Nối các ngày mới của lịch (sau ngày cuối của `matrix`, tới `end`) vào ma trận, không tính lại lịch sử.
+        Giả định dữ liệu nguồn chỉ được nối thêm (không sửa quá khứ); nếu nguồn bị sửa, hãy build() lại.
+        :return: Số dòng đã thêm.
+        """
+        if matrix.columns != [spec.name for spec in self.features]:
+            raise ValueError("Các cột của ma trận không khớp với danh sách feature của builder.")
+        dates = self.calendar_dates(end=end)
+        if len(matrix):
+            dates = dates[dates > matrix.dates[-1]]
+        matrix.append(dates, self._rows(dates))
+        if len(dates):
+            print(f"➕ Đã thêm {len(dates)} ngày vào ma trận feature (tới {dates[-1]}).")
+        return len(dates)
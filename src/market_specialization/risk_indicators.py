@@ -0,0 +1,353 @@
+import os
+import json
+import math
+
+import numpy as np
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+VOL_WINDOW = 20             # ngày giao dịch cho độ biến động
+ZSCORE_WINDOW = 60          # ngày giao dịch cho z-score CDS
+CORR_WINDOW = 60            # ngày giao dịch cho tương quan lợi suất
+ANNUALIZATION = 252
+DEFAULT_STATE_PATH = os.path.join('data', 'columnar', 'risk_indicators_state.json')
+# Phương sai nhỏ hơn ngưỡng này (tương đối so với mean^2, hoặc tuyệt đối) coi như bằng 0 -> chỉ số là NaN.
+# Cùng ngưỡng cho cả hai chế độ để cửa sổ phẳng (vd. CDS được ffill) cho kết quả giống nhau.
+REL_VAR_TOL = 1e-10
+ABS_VAR_TOL = 1e-18
+# Cặp (cột trong FeatureMatrix) -> tham số của engine
+MATRIX_COLUMNS = {'price': 'cs_close', 'cds': 'cs_cds_5y', 'sx7e': 'sx7e', 'vix': 'vix'}
+
+
+def _std(var, mean):
+    """sqrt(var), hoặc NaN khi var không đáng kể (scalar)."""
+    if not var > max(REL_VAR_TOL * mean * mean, ABS_VAR_TOL):
+        return math.nan
+    return math.sqrt(var)
+
+
+def _std_array(var, mean):
+    """Phiên bản vector hóa của _std."""
+    with np.errstate(invalid='ignore'):
+        significant = var > np.maximum(REL_VAR_TOL * mean * mean, ABS_VAR_TOL)
+    out = np.full(var.shape, np.nan)
+    out[significant] = np.sqrt(var[significant])
+    return out
+
+
+def _log_change(current, previous):
+    if current > 0 and previous > 0:
+        return math.log(current / previous)
+    return math.nan
+
+
+def log_changes(values):
+    """log(x_t / x_{t-1}); phần tử đầu và các điểm không dương là NaN."""
+    values = np.asarray(values, dtype='float64')
+    out = np.full(len(values), np.nan)
+    if len(values) > 1:
+        current, previous = values[1:], values[:-1]
+        valid = (current > 0) & (previous > 0)
+        out[1:][valid] = np.log(current[valid] / previous[valid])
+    return out
+
+
+def rolling_moments(x, y, window):
+    """
+    Mean / phương sai / hiệp phương sai (ddof=1) trên cửa sổ trượt, tính vector hóa bằng sliding_window_view (hai lượt
+    trên từng cửa sổ nên ổn định số). Cửa sổ chưa đủ hoặc chứa NaN -> NaN.
+    :return: (mean_x, mean_y, var_x, var_y, cov_xy), mỗi mảng cùng độ dài x.
+    """
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    n = len(x)
+    outputs = [np.full(n, np.nan) for _ in range(5)]
+    if n < window:
+        return tuple(outputs)
+    xs = sliding_window_view(np.asarray(x, dtype='float64'), window)
+    ys = sliding_window_view(np.asarray(y, dtype='float64'), window)
+    mean_x, mean_y = xs.mean(axis=1), ys.mean(axis=1)
+    dx, dy = xs - mean_x[:, None], ys - mean_y[:, None]
+    for out, values in zip(outputs, (
+        mean_x, mean_y,
+        (dx * dx).sum(axis=1) / (window - 1),
+        (dy * dy).sum(axis=1) / (window - 1),
+        (dx * dy).sum(axis=1) / (window - 1),
+    )):
+        out[window - 1:] = values
+    return tuple(outputs)
+
+
+class RollingMoments:
+    def __init__(self, window):
+        """
+        Mean / phương sai / hiệp phương sai của cặp (x, y) trên cửa sổ trượt, cập nhật O(1) mỗi điểm
+        bằng Welford (thêm điểm mới, bỏ điểm cũ nhất trong ring buffer).
+        Sai số làm tròn tích lũy được xóa bằng cách tính lại chính xác từ ring buffer sau mỗi `window` lần cập nhật
+        (O(1) khấu hao), nên kết quả bám sát chế độ batch.
+        Điểm NaN được lưu như 0 và đếm riêng: cửa sổ còn chứa NaN thì chưa sẵn sàng.
+        """
+        if window < 2:
+            raise ValueError("window phải >= 2.")
+        self.window = window
+        self.xs = [0.0] * window
+        self.ys = [0.0] * window
+        self.missing = [False] * window
+        self.pos = 0
+        self.size = 0
+        self.n_missing = 0
+        self.since_sync = 0
+        self.mean_x = self.mean_y = 0.0
+        self.m2_x = self.m2_y = self.c_xy = 0.0
+
+    def _add(self, x, y):
+        self.size += 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x += dx / self.size
+        self.mean_y += dy / self.size
+        self.m2_x += dx * (x - self.mean_x)
+        self.m2_y += dy * (y - self.mean_y)
+        self.c_xy += dx * (y - self.mean_y)
+
+    def _remove(self, x, y):
+        self.size -= 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x -= dx / self.size
+        self.mean_y -= dy / self.size
+        self.m2_x -= dx * (x - self.mean_x)
+        self.m2_y -= dy * (y - self.mean_y)
+        self.c_xy -= dx * (y - self.mean_y)
+
+    def _resync(self):
+        n = self.size
+        self.mean_x = math.fsum(self.xs[:n]) / n
+        self.mean_y = math.fsum(self.ys[:n]) / n
+        dxs = [x - self.mean_x for x in self.xs[:n]]
+        dys = [y - self.mean_y for y in self.ys[:n]]
+        self.m2_x = math.fsum(d * d for d in dxs)
+        self.m2_y = math.fsum(d * d for d in dys)
+        self.c_xy = math.fsum(a * b for a, b in zip(dxs, dys))
+        self.since_sync = 0
+
+    def push(self, x, y):
+        missing = x != x or y != y
+        if missing:
+            x = y = 0.0
+        if self.size == self.window:
+            self._remove(self.xs[self.pos], self.ys[self.pos])
+            self.n_missing -= self.missing[self.pos]
+        self.xs[self.pos], self.ys[self.pos], self.missing[self.pos] = x, y, missing
+        self.n_missing += missing
+        self._add(x, y)
+        self.pos = (self.pos + 1) % self.window
+        self.since_sync += 1
+        if self.since_sync >= self.window:
+            self._resync()
+
+    @property
+    def ready(self):
+        return self.size == self.window and self.n_missing == 0
+
+    def moments(self):
+        """(mean_x, mean_y, var_x, var_y, cov_xy) của cửa sổ hiện tại, NaN nếu chưa sẵn sàng."""
+        if not self.ready:
+            return (math.nan,) * 5
+        d = self.window - 1
+        return self.mean_x, self.mean_y, self.m2_x / d, self.m2_y / d, self.c_xy / d
+
+    def state_dict(self):
+        return {key: getattr(self, key) for key in (
+            'window', 'xs', 'ys', 'missing', 'pos', 'size', 'n_missing', 'since_sync',
+            'mean_x', 'mean_y', 'm2_x', 'm2_y', 'c_xy',
+        )}
+
+    @classmethod
+    def from_state(cls, state):
+        moments = cls(state['window'])
+        for key, value in state.items():
+            setattr(moments, key, list(value) if isinstance(value, list) else value)
+        return moments
+
+
+class RiskIndicatorEngine:
+    def __init__(self, vol_window=VOL_WINDOW, zscore_window=ZSCORE_WINDOW, corr_window=CORR_WINDOW, annualization=ANNUALIZATION):
+        """
+        Các chỉ số rủi ro rolling trên chuỗi ngày của Credit Suisse:
+        - ret              : log return của giá CS;
+        - vol_<w>          : độ biến động (năm hóa) của ret trên w ngày;
+        - drawdown         : giá / đỉnh cao nhất từ trước tới nay - 1;
+        - cds_z_<w>        : z-score của CDS 5Y so với w ngày gần nhất;
+        - corr_sx7e_<w>    : tương quan ret với log return SX7E;
+        - corr_vix_<w>     : tương quan ret với log thay đổi VIX.
+        Hai chế độ cho cùng kết quả (tới sai số làm tròn):
+        - batch()  : vector hóa NumPy trên toàn bộ lịch sử;
+        - update() : cập nhật O(1) mỗi ngày mới, trạng thái lưu / nạp lại được (save / load).
+        """
+        self.vol_window = vol_window
+        self.zscore_window = zscore_window
+        self.corr_window = corr_window
+        self.annualization = annualization
+        self.names = [
+            'ret', f'vol_{vol_window}', 'drawdown', f'cds_z_{zscore_window}',
+            f'corr_sx7e_{corr_window}', f'corr_vix_{corr_window}',
+        ]
+        self.reset()
+
+    def reset(self):
+        """Xóa trạng thái của chế độ streaming."""
+        self.previous = {'price': math.nan, 'sx7e': math.nan, 'vix': math.nan}
+        self.peak = math.nan
+        self.last_date = None
+        self.vol = RollingMoments(self.vol_window)
+        self.cds = RollingMoments(self.zscore_window)
+        self.corr_sx7e = RollingMoments(self.corr_window)
+        self.corr_vix = RollingMoments(self.corr_window)
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Batch
+    # ---------------------------------------------------------------------------------------------------------------------
+    def _correlation(self, x, y):
+        mean_x, mean_y, var_x, var_y, cov = rolling_moments(x, y, self.corr_window)
+        std_x, std_y = _std_array(var_x, mean_x), _std_array(var_y, mean_y)
+        return np.clip(cov / (std_x * std_y), -1.0, 1.0)
+
+    def batch(self, price, cds, sx7e, vix):
+        """
+        Tính toàn bộ chỉ số trên lịch sử (các mảng đầu vào đã căn theo cùng lịch, NaN = thiếu dữ liệu).
+        :return: dict {tên chỉ số: np.ndarray}.
+        """
+        price, cds = np.asarray(price, dtype='float64'), np.asarray(cds, dtype='float64')
+        ret = log_changes(price)
+
+        mean, _, var, _, _ = rolling_moments(ret, ret, self.vol_window)
+        vol = _std_array(var, mean) * math.sqrt(self.annualization)
+
+        peak = np.fmax.accumulate(price)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            drawdown = np.where(np.isnan(price), np.nan, price / peak - 1.0)
+
+        mean, _, var, _, _ = rolling_moments(cds, cds, self.zscore_window)
+        cds_z = (cds - mean) / _std_array(var, mean)
+
+        corr_sx7e = self._correlation(ret, log_changes(sx7e))
+        corr_vix = self._correlation(ret, log_changes(vix))
+        return dict(zip(self.names, (ret, vol, drawdown, cds_z, corr_sx7e, corr_vix)))
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Streaming
+    # ---------------------------------------------------------------------------------------------------------------------
+    def update(self, price, cds, sx7e, vix, date=None):
+        """
+        Cập nhật O(1) với một ngày mới. Nếu truyền `date` và ngày này không sau ngày đã xử lý cuối cùng thì bỏ qua
+        (trả về None), để chạy lại job hằng ngày không cộng trùng.
+        :return: dict {tên chỉ số: float}.
+        """
+        if date is not None:
+            date = str(np.datetime64(date, 'D'))
+            if self.last_date is not None and date <= self.last_date:
+                return None
+            self.last_date = date
+
+        ret = _log_change(price, self.previous['price'])
+        sx7e_ret = _log_change(sx7e, self.previous['sx7e'])
+        vix_change = _log_change(vix, self.previous['vix'])
+        self.previous = {'price': price, 'sx7e': sx7e, 'vix': vix}
+
+        self.vol.push(ret, ret)
+        mean, _, var, _, _ = self.vol.moments()
+        vol = _std(var, mean) * math.sqrt(self.annualization)
+
+        if price == price:
+            self.peak = price if not self.peak >= price else self.peak
+            drawdown = price / self.peak - 1.0
+        else:
+            drawdown = math.nan
+
+        self.cds.push(cds, cds)
+        mean, _, var, _, _ = self.cds.moments()
+        cds_z = (cds - mean) / _std(var, mean)
+
+        values = [ret, vol, drawdown, cds_z]
+        for moments, other in ((self.corr_sx7e, sx7e_ret), (self.corr_vix, vix_change)):
+            moments.push(ret, other)
+            mean_x, mean_y, var_x, var_y, cov = moments.moments()
+            corr = cov / (_std(var_x, mean_x) * _std(var_y, mean_y))
+            values.append(min(1.0, max(-1.0, corr)) if corr == corr else math.nan)
+        return dict(zip(self.names, values))
+
+    def stream(self, price, cds, sx7e, vix, dates=None):
+        """Chạy update() lần lượt trên các mảng; trả về dict {tên chỉ số: np.ndarray} giống batch()."""
+        rows = []
+        for i in range(len(price)):
+            row = self.update(
+                float(price[i]), float(cds[i]), float(sx7e[i]), float(vix[i]),
+                date=None if dates is None else dates[i]
+            )
+            if row is not None:
+                rows.append([row[name] for name in self.names])
+        values = np.array(rows, dtype='float64').reshape(-1, len(self.names))
+        return {name: values[:, j] for j, name in enumerate(self.names)}
+
+    def warm_start(self, price, cds, sx7e, vix, dates=None):
+        """
+        Khởi tạo trạng thái streaming từ lịch sử mà không phải duyệt toàn bộ: đỉnh giá lấy bằng np.nanmax,
+        chỉ phát lại (max window + 1) ngày cuối qua update().
+        """
+        self.reset()
+        tail = max(self.vol_window, self.zscore_window, self.corr_window) + 1
+        price = np.asarray(price, dtype='float64')
+        head = price[:-tail]
+        if len(head) and not np.all(np.isnan(head)):
+            self.peak = float(np.nanmax(head))
+        self.stream(
+            price[-tail:], np.asarray(cds)[-tail:], np.asarray(sx7e)[-tail:], np.asarray(vix)[-tail:],
+            dates=None if dates is None else np.asarray(dates)[-tail:]
+        )
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Trạng thái
+    # ---------------------------------------------------------------------------------------------------------------------
+    def state_dict(self):
+        return {
+            'config': [self.vol_window, self.zscore_window, self.corr_window, self.annualization],
+            'previous': self.previous,
+            'peak': self.peak,
+            'last_date': self.last_date,
+            'vol': self.vol.state_dict(),
+            'cds': self.cds.state_dict(),
+            'corr_sx7e': self.corr_sx7e.state_dict(),
+            'corr_vix': self.corr_vix.state_dict(),
+        }
+
+    def save(self, path=DEFAULT_STATE_PATH):
+        """Lưu trạng thái streaming (JSON, ghi file tạm rồi os.replace)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_STATE_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        engine = cls(*state['config'])
+        engine.previous = state['previous']
+        engine.peak = state['peak']
+        engine.last_date = state['last_date']
+        for key in ('vol', 'cds', 'corr_sx7e', 'corr_vix'):
+            setattr(engine, key, RollingMoments.from_state(state[key]))
+        return engine
+
+
+def indicators_from_matrix(matrix, engine=None, columns=MATRIX_COLUMNS):
+    """Chạy batch() trên các cột của một FeatureMatrix (feature_matrix.py); trả về DataFrame index ngày."""
+    import pandas as pd
+
+    engine = engine or RiskIndicatorEngine()
+    inputs = {param: matrix.column(name) for param, name in columns.items()}
+    result = engine.batch(**inputs)
+    return pd.DataFrame(result, index=pd.DatetimeIndex(matrix.dates, name='date'))
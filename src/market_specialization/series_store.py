@@ -0,0 +1,278 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+DATA_DIR = 'data'
+STORE_DIR = os.path.join(DATA_DIR, 'columnar')
+MANIFEST_FILENAME = 'manifest.json'
+# Các thư mục nguồn (tương đối so với DATA_DIR) được đưa vào kho
+SOURCE_LAYERS = ('bronze', 'silver')
+SOURCE_GROUPS = ('market_data', 'macro_economic_data', 'internal_data', 'news')
+
+# Header của file tải từ investing.com (tiếng Việt) -> tên cột chuẩn
+INVESTING_COLUMNS = {
+    'Lần cuối': 'close',
+    'Mở': 'open',
+    'Cao': 'high',
+    'Thấp': 'low',
+    'KL': 'volume',
+    '% Thay đổi': 'change_pct',
+}
+_SUFFIX_MULTIPLIERS = {'K': 1e3, 'M': 1e6, 'B': 1e9}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 nội dung file (dùng để biết nguồn có thay đổi hay không)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_localized_numbers(column):
+    """'1,266.78' -> 1266.78 ; '480.54K' -> 480540.0 ; '-1.06%' -> -1.06 ; '' -> NaN."""
+    import pandas as pd
+
+    text = column.astype(str).str.strip().str.replace(',', '', regex=False).str.rstrip('%')
+    suffix = text.str[-1:].str.upper()
+    multiplier = suffix.map(_SUFFIX_MULTIPLIERS).fillna(1.0)
+    text = text.where(~suffix.isin(list(_SUFFIX_MULTIPLIERS)), text.str[:-1])
+    return pd.to_numeric(text, errors='coerce') * multiplier
+
+
+def normalize_frame(raw):
+    """
+    Đưa một bảng thô về schema chuẩn: cột đầu là ngày, các cột còn lại là giá trị float64.
+    Nhận diện ba kiểu file đang có trong data/:
+    - TradingView / silver: `time,open,high,low,close,Volume` -> tên cột viết thường;
+    - FRED: `observation_date,<MÃ SERIES>` -> cột giá trị đổi tên thành `close`;
+    - investing.com: `"Ngày","Lần cuối",...` (ngày dd/mm/yyyy, số có dấu phẩy, hậu tố K/M/B, %).
+    Các file khác (vd. news00.csv) giữ nguyên tên cột giá trị.
+    :return: (DataFrame index là ngày tăng dần, cột float64; dict {cột chuẩn: tên cột gốc}).
+    """
+    import pandas as pd
+
+    date_column = raw.columns[0]
+    header = date_column.strip().lstrip('﻿')
+    fields = {}
+    if header == 'Ngày':
+        dates = pd.to_datetime(raw[date_column], format='%d/%m/%Y', errors='coerce')
+        values = {}
+        for source, target in INVESTING_COLUMNS.items():
+            if source in raw.columns:
+                values[target] = _parse_localized_numbers(raw[source])
+                fields[target] = source
+        frame = pd.DataFrame(values)
+    elif header == 'observation_date':
+        dates = pd.to_datetime(raw[date_column], errors='coerce')
+        code = raw.columns[1]
+        frame = pd.DataFrame({'close': pd.to_numeric(raw[code], errors='coerce')})
+        fields['close'] = code
+    else:
+        dates = pd.to_datetime(raw[date_column], errors='coerce')
+        frame = pd.DataFrame({
+            str(c).strip().lower() if header == 'time' else str(c).strip(): pd.to_numeric(raw[c], errors='coerce')
+            for c in raw.columns[1:]
+        })
+        fields = {target: str(source) for target, source in zip(frame.columns, raw.columns[1:])}
+
+    frame.index = pd.DatetimeIndex(dates.to_numpy(), name='date').normalize()
+    frame = frame[frame.index.notna()]
+    # File investing.com xếp ngày giảm dần; trùng ngày thì giữ dòng cuối
+    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+    # Bỏ cột toàn NaN (vd. cột Volume rỗng của các file ECONOMICS_*)
+    frame = frame.dropna(axis=1, how='all').astype('float64')
+    fields = {c: fields.get(c, c) for c in frame.columns}
+    return frame, fields
+
+
+def discover_sources(data_dir=DATA_DIR, layers=SOURCE_LAYERS, groups=SOURCE_GROUPS):
+    """Tìm mọi file CSV trong data/<layer>/<group>/... -> dict {tên series: đường dẫn}. Tên series = '<layer>/<tên file>'."""
+    sources = {}
+    for layer in layers:
+        for group in groups:
+            root = os.path.join(data_dir, layer, group)
+            for dirpath, _, filenames in os.walk(root):
+                for filename in sorted(filenames):
+                    if filename.lower().endswith('.csv'):
+                        name = f"{layer}/{os.path.splitext(filename)[0]}"
+                        sources[name] = os.path.join(dirpath, filename)
+    return sources
+
+
+class SeriesStore:
+    def __init__(self, store_dir=STORE_DIR, data_dir=DATA_DIR):
+        """
+        Kho cột (columnar) cho các chuỗi thời gian market / macro / news trong data/bronze và data/silver.
+        Mỗi series nằm trong một thư mục riêng:
+        - dates.npy : datetime64[D], tăng dần;
+        - values.npy: float64, shape (số cột, số dòng) - mỗi cột liên tục trong bộ nhớ.
+        File được mở bằng memory-map nên load không parse lại CSV và không sao chép dữ liệu.
+        manifest.json ghi hash của file nguồn để build() chỉ dựng lại series có nguồn thay đổi.
+        """
+        self.store_dir = store_dir
+        self.data_dir = data_dir
+        self.manifest_path = os.path.join(store_dir, MANIFEST_FILENAME)
+        os.makedirs(store_dir, exist_ok=True)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        self._opened = {}
+
+    def __contains__(self, name):
+        return name in self.manifest
+
+    def names(self):
+        return sorted(self.manifest)
+
+    def _series_dir(self, name):
+        return os.path.join(self.store_dir, *name.split('/'))
+
+    def save_manifest(self):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Ghi
+    # ---------------------------------------------------------------------------------------------------------------------
+    def write(self, name, frame, source=None, digest=None, fields=None):
+        """Ghi một DataFrame (index ngày, cột số) vào kho dưới tên `name`."""
+        series_dir = self._series_dir(name)
+        os.makedirs(series_dir, exist_ok=True)
+        dates = frame.index.to_numpy().astype('datetime64[D]')
+        values = np.ascontiguousarray(frame.to_numpy(dtype='float64').T)
+        for filename, array in (('dates.npy', dates), ('values.npy', values)):
+            path = os.path.join(series_dir, filename)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, array)
+            os.replace(tmp_path, path)
+
+        self._opened.pop(name, None)
+        self.manifest[name] = {
+            'source': source,
+            'digest': digest,
+            'size': os.path.getsize(source) if source else None,
+            'mtime_ns': os.stat(source).st_mtime_ns if source else None,
+            'columns': list(frame.columns),
+            'fields': fields or {c: c for c in frame.columns},
+            'rows': int(len(frame)),
+            'start': str(dates[0]) if len(dates) else None,
+            'end': str(dates[-1]) if len(dates) else None,
+        }
+
+    def remove(self, name):
+        """Gỡ một series khỏi kho (manifest được ghi ở lần save_manifest() kế tiếp)."""
+        import shutil
+
+        self.manifest.pop(name, None)
+        self._opened.pop(name, None)
+        shutil.rmtree(self._series_dir(name), ignore_errors=True)
+
+    def is_fresh(self, name, path):
+        """(True, digest) nếu series `name` đã được dựng từ đúng nội dung hiện tại của file `path`."""
+        entry = self.manifest.get(name)
+        if entry is None or entry.get('source') != path:
+            return False, None
+        stat = os.stat(path)
+        # Kiểm tra nhanh bằng kích thước + mtime; chỉ băm file khi hai giá trị này khác
+        if entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            return True, entry['digest']
+        digest = file_digest(path)
+        if digest == entry.get('digest'):
+            entry['mtime_ns'] = stat.st_mtime_ns
+            return True, digest
+        return False, digest
+
+    def build(self, sources=None, force=False, workbooks=True):
+        """
+        Dựng (lại) kho từ các file CSV nguồn. Chỉ các series có file nguồn thay đổi (theo hash) mới được parse lại;
+        series có file nguồn đã bị xóa sẽ bị gỡ khỏi kho.
+        :param sources: dict {tên: đường dẫn}; mặc định tự tìm trong data/bronze và data/silver.
+        :param workbooks: Snapshot luôn các workbook .xlsx trong data/bronze (excel_ingest, cần openpyxl).
+        :return: Danh sách tên series CSV đã dựng lại.
+        """
+        import pandas as pd
+
+        sources = discover_sources(self.data_dir) if sources is None else sources
+        rebuilt = []
+        for name, path in sorted(sources.items()):
+            fresh, digest = self.is_fresh(name, path)
+            if fresh and not force:
+                continue
+            raw = pd.read_csv(path, encoding='utf-8-sig', dtype=str, keep_default_na=False, na_values=['', 'NaN'])
+            frame, fields = normalize_frame(raw)
+            self.write(name, frame, source=path, digest=digest or file_digest(path), fields=fields)
+            rebuilt.append(name)
+
+        # Chỉ gỡ các series được dựng từ CSV (series ghi trực tiếp bằng write() có thể không có trong sources)
+        for name in [n for n, e in self.manifest.items() if (e.get('source') or '').endswith('.csv') and n not in sources]:
+            self.remove(name)
+            rebuilt.append(name)
+
+        self.save_manifest()
+        if workbooks:
+            self._ingest_workbooks(force)
+        print(f"🗃️ Kho cột: dựng lại {len(rebuilt)}/{len(sources)} series ({len(self.manifest)} series trong kho).")
+        return rebuilt
+
+    def _ingest_workbooks(self, force=False):
+        # excel_ingest import series_store nên chỉ import khi cần
+        try:
+            from .excel_ingest import ingest_workbooks
+        except ImportError:
+            from excel_ingest import ingest_workbooks
+
+        try:
+            ingest_workbooks(self, data_dir=self.data_dir, force=force)
+        except ImportError as e:
+            # pandas.read_excel cần openpyxl; thiếu thì vẫn giữ phần CSV đã dựng
+            print(f"⚠️ Bỏ qua các workbook .xlsx ({e}). Hãy cài openpyxl rồi chạy lại build().")
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Đọc
+    # ---------------------------------------------------------------------------------------------------------------------
+    def arrays(self, name):
+        """
+        Trả về (dates, values, columns) dạng memory-map, không sao chép:
+        dates là datetime64[D] (n,), values là float64 (số cột, n).
+        """
+        opened = self._opened.get(name)
+        if opened is None:
+            if name not in self.manifest:
+                raise KeyError(
+                    f"Series '{name}' không có trong kho cột. Hãy chạy SeriesStore().build() "
+                    f"(series từ workbook .xlsx cần cài openpyxl)."
+                )
+            series_dir = self._series_dir(name)
+            opened = (
+                np.load(os.path.join(series_dir, 'dates.npy'), mmap_mode='r'),
+                np.load(os.path.join(series_dir, 'values.npy'), mmap_mode='r'),
+                self.manifest[name]['columns'],
+            )
+            self._opened[name] = opened
+        return opened
+
+    def column(self, name, column='close'):
+        """Một cột của series dưới dạng mảng NumPy (view trên file memory-map)."""
+        dates, values, columns = self.arrays(name)
+        return dates, values[columns.index(column)]
+
+    def load(self, name):
+        """Series dưới dạng DataFrame (index ngày); phần giá trị là view trên memory-map, không sao chép."""
+        import pandas as pd
+
+        dates, values, columns = self.arrays(name)
+        return pd.DataFrame(values.T, index=pd.DatetimeIndex(dates, name='date'), columns=columns, copy=False)
+
+    def load_all(self, prefix=None):
+        """dict {tên series: DataFrame} cho mọi series (hoặc các series có tên bắt đầu bằng prefix, vd. 'silver/')."""
+        return {name: self.load(name) for name in self.names() if prefix is None or name.startswith(prefix)}
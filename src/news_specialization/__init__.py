@@ -0,0 +1,32 @@
+"""
+Pipeline tin tức: ingest -> preprocess -> summarize -> analyze.
+Các class chính được export lười (PEP 562): `from src.news_specialization import NewsPreprocessor`
+chỉ import module tương ứng, không kéo theo selenium / torch / groq.
+"""
+import importlib
+
+_EXPORTS = {
+    'NewsPreprocessor': 'preprocess_news',
+    'FinancialRiskAnalyzer': 'analyze_news',
+    'ResponseCache': 'response_cache',
+    'NewsRiskAggregator': 'aggregate_news',
+    'StreamingPipeline': 'pipeline',
+    'ViT5Summarizer': 'summarize_news',
+    'SummarizerClient': 'summarize_server',
+    'SummarizationServer': 'summarize_server',
+    'CrawlScheduler': 'crawl_scheduler',
+    'NewsStore': 'news_store',
+    'HtmlCache': 'html_cache',
+    'GoogleNewsResolver': 'url_resolver',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,266 @@
+import os
+import hashlib
+
+try:
+    from .news_store import url_key
+except ImportError:
+    from news_store import url_key
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+DEFAULT_SILVER_DIR = os.path.join('data', 'silver', 'news')
+INDEX_FILENAME = 'news00.csv'                    # date,total_mark (đầu vào của các notebook)
+DAILY_FILENAME = 'news_daily_index.csv'          # bảng đầy đủ: thành phần cộng dồn + chỉ số rolling
+SEEN_FILENAME = 'news_daily_index.ids'           # id các bài đã được cộng vào bảng
+# total_mark = tổng risk_score có dấu: tin tiêu cực kéo điểm xuống, tin tích cực kéo lên
+SENTIMENT_SIGN = {'Negative': -1.0, 'Neutral': 0.0, 'Positive': 1.0}
+ROLLING_WINDOWS = (7, 30)
+HALFLIFE_DAYS = 7
+
+# Các cột cộng dồn được (giá trị của một ngày = tổng đóng góp của các bài trong ngày đó)
+ADDITIVE_COLUMNS = ['total_mark', 'n_articles', 'risk_sum', 'n_negative', 'n_neutral', 'n_positive']
+
+
+def article_id(article):
+    """Id ổn định của một bài: hash URL nếu có, ngược lại hash nội dung."""
+    if article.get('url'):
+        return url_key(article['url'])
+    text = article.get('content') or article.get('clean_content') or article.get('title') or ''
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def analyses_to_frame(articles, date_fields=('date', 'published_date')):
+    """
+    Chuyển các bài đã phân tích thành DataFrame (một dòng/bài) với các cột:
+    id, date, risk_score, sign, risk_category.
+    Kết quả phân tích nằm ở trường 'analysis' (output của CLI analyze) hoặc ngay trên bài.
+    Ngày lấy từ publication_date do model trích xuất, nếu không có thì từ các trường date_fields.
+    Bài lỗi / không có ngày / không có điểm bị bỏ qua.
+    """
+    import pandas as pd
+
+    rows = []
+    for article in articles:
+        analysis = article.get('analysis', article)
+        if not isinstance(analysis, dict) or analysis.get('error'):
+            continue
+        date = analysis.get('publication_date') or next((article[f] for f in date_fields if article.get(f)), None)
+        rows.append((
+            article_id(article),
+            date,
+            analysis.get('risk_score'),
+            analysis.get('sentiment'),
+            analysis.get('risk_category') or 'Khác',
+        ))
+
+    frame = pd.DataFrame(rows, columns=['id', 'date', 'risk_score', 'sentiment', 'risk_category'])
+    frame['date'] = pd.to_datetime(frame['date'], errors='coerce', format='mixed').dt.normalize()
+    frame['risk_score'] = pd.to_numeric(frame['risk_score'], errors='coerce')
+    frame['sign'] = frame['sentiment'].map(SENTIMENT_SIGN)
+    frame = frame.dropna(subset=['date', 'risk_score', 'sign'])
+    return frame.drop_duplicates('id')
+
+
+def daily_components(frame):
+    """Gộp (vector hóa) các bài theo ngày thành các thành phần cộng dồn, kèm tổng risk_score theo risk_category."""
+    import pandas as pd
+
+    signed = frame['risk_score'] * frame['sign']
+    grouped = pd.DataFrame({
+        'date': frame['date'],
+        'total_mark': signed,
+        'n_articles': 1.0,
+        'risk_sum': frame['risk_score'],
+        'n_negative': (frame['sign'] < 0).astype(float),
+        'n_neutral': (frame['sign'] == 0).astype(float),
+        'n_positive': (frame['sign'] > 0).astype(float),
+    }).groupby('date').sum()
+
+    categories = frame.pivot_table(
+        index='date', columns='risk_category', values='risk_score', aggfunc='sum', fill_value=0.0
+    )
+    categories.columns = ['cat_' + str(c) for c in categories.columns]
+    return grouped.join(categories).astype(float)
+
+
+class NewsRiskAggregator:
+    def __init__(self, silver_dir=DEFAULT_SILVER_DIR, windows=ROLLING_WINDOWS, halflife=HALFLIFE_DAYS):
+        """
+        Tổng hợp kết quả analyze_news thành chỉ số rủi ro theo ngày (news00.csv) và các chỉ số rolling.
+        Bảng ngày lưu các thành phần cộng dồn (tổng điểm có dấu, số bài theo sentiment, tổng điểm theo risk_category),
+        nên thêm bài mới chỉ cần cộng vào đúng các ngày bị ảnh hưởng; các chỉ số rolling / suy giảm mũ
+        chỉ được tính lại từ ngày sớm nhất bị ảnh hưởng trở đi.
+        :param windows: Các cửa sổ (ngày) cho tổng total_mark trượt.
+        :param halflife: Chu kỳ bán rã (ngày) của trung bình có trọng số suy giảm mũ.
+        """
+        self.silver_dir = silver_dir
+        self.windows = tuple(windows)
+        self.halflife = halflife
+        os.makedirs(silver_dir, exist_ok=True)
+        self.index_path = os.path.join(silver_dir, INDEX_FILENAME)
+        self.daily_path = os.path.join(silver_dir, DAILY_FILENAME)
+        self.seen_path = os.path.join(silver_dir, SEEN_FILENAME)
+        self.daily = self._load_daily()
+        self.seen = set()
+        if os.path.exists(self.seen_path):
+            with open(self.seen_path, 'r', encoding='utf-8') as f:
+                self.seen = {line.strip() for line in f if line.strip()}
+
+    def _load_daily(self):
+        import pandas as pd
+
+        if os.path.exists(self.daily_path):
+            return pd.read_csv(self.daily_path, parse_dates=['date'], index_col='date')
+        daily = pd.DataFrame(columns=ADDITIVE_COLUMNS, dtype=float)
+        daily.index = pd.DatetimeIndex([], name='date')
+        if os.path.exists(self.index_path):
+            # Khởi tạo từ news00.csv hiện có: giữ nguyên lịch sử total_mark, các thành phần khác chưa biết (= 0)
+            legacy = pd.read_csv(self.index_path, parse_dates=['date'], index_col='date')
+            daily = legacy[['total_mark']].astype(float).reindex(columns=ADDITIVE_COLUMNS, fill_value=0.0)
+        return daily
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Cập nhật
+    # ---------------------------------------------------------------------------------------------------------------------
+    def update(self, articles):
+        """
+        Cộng các bài mới (chưa từng được tổng hợp) vào bảng ngày rồi ghi lại news00.csv.
+        :param articles: Iterable các bài đã phân tích (vd. output của `python -m src.news_specialization analyze`).
+        :return: Danh sách các ngày bị thay đổi.
+        """
+        import pandas as pd
+
+        frame = analyses_to_frame(articles)
+        frame = frame[~frame['id'].isin(self.seen)]
+        if frame.empty:
+            print("ℹ️ Không có bài mới để tổng hợp.")
+            return []
+
+        components = daily_components(frame)
+        daily = self.daily
+        # Lịch ngày liên tục: mở rộng nếu bài mới nằm ngoài khoảng hiện có (ngày không có tin = 0)
+        start = min(daily.index.min(), components.index.min()) if len(daily) else components.index.min()
+        end = max(daily.index.max(), components.index.max()) if len(daily) else components.index.max()
+        full_range = pd.date_range(start, end, freq='D', name='date')
+        if not daily.index.equals(full_range):
+            daily = daily.reindex(full_range)
+        for column in components.columns:
+            if column not in daily.columns:
+                daily[column] = 0.0
+        additive = list(components.columns)
+        daily[additive] = daily[additive].fillna(0.0)
+        daily.loc[components.index, additive] += components[additive].to_numpy()
+        daily = daily.fillna({c: 0.0 for c in daily.columns if c in ADDITIVE_COLUMNS or c.startswith('cat_')})
+
+        first_changed = daily.index.get_loc(components.index.min())
+        self.daily, first_changed = self._refresh_derived(daily, first_changed)
+        self._save(frame['id'], first_changed)
+        touched = list(components.index)
+        print(f"📈 Đã tổng hợp {len(frame)} bài mới vào {len(touched)} ngày (từ {components.index.min().date()}).")
+        return touched
+
+    def _refresh_derived(self, daily, start):
+        """
+        Tính lại các cột dẫn xuất từ vị trí `start` trở đi (các dòng trước đó giữ nguyên).
+        :return: (daily, vị trí dòng đầu tiên thực sự bị thay đổi).
+        """
+        import numpy as np
+
+        n = len(daily)
+        for column in ('mean_risk', 'ewm_signed', 'ewm_count', 'ewm_mark') + tuple(f'mark_{w}d' for w in self.windows):
+            if column not in daily.columns:
+                daily[column] = np.nan
+        # Các ngày mới thêm vào lịch (vd. khoảng trống giữa ngày cuối cũ và ngày của bài mới) cũng cần tính
+        missing = np.flatnonzero(daily['ewm_count'].isna().to_numpy())
+        if missing.size:
+            start = min(start, int(missing[0]))
+
+        tail = slice(start, n)
+        counts = daily['n_articles'].to_numpy()
+        daily.iloc[tail, daily.columns.get_loc('mean_risk')] = np.divide(
+            daily['risk_sum'].to_numpy()[tail], counts[tail],
+            out=np.zeros(n - start), where=counts[tail] > 0
+        )
+
+        # Tổng trượt: chỉ cần thêm (w - 1) ngày trước start làm ngữ cảnh
+        marks = daily['total_mark'].to_numpy()
+        for w in self.windows:
+            lo = max(0, start - w + 1)
+            cumsum = np.concatenate(([0.0], np.cumsum(marks[lo:])))
+            pos = np.arange(start, n) - lo
+            rolled = cumsum[pos + 1] - cumsum[np.maximum(pos + 1 - w, 0)]
+            daily.iloc[tail, daily.columns.get_loc(f'mark_{w}d')] = rolled
+
+        # Trung bình suy giảm mũ của điểm có dấu, trọng số theo số bài: đệ quy từ trạng thái của ngày start - 1
+        decay = 0.5 ** (1.0 / self.halflife)
+        signed_state = daily['ewm_signed'].iat[start - 1] if start > 0 else 0.0
+        count_state = daily['ewm_count'].iat[start - 1] if start > 0 else 0.0
+        ewm_signed, ewm_count = np.empty(n - start), np.empty(n - start)
+        for i, (mark, count) in enumerate(zip(marks[start:], counts[start:])):
+            signed_state = signed_state * decay + mark
+            count_state = count_state * decay + count
+            ewm_signed[i], ewm_count[i] = signed_state, count_state
+        daily.iloc[tail, daily.columns.get_loc('ewm_signed')] = ewm_signed
+        daily.iloc[tail, daily.columns.get_loc('ewm_count')] = ewm_count
+        daily.iloc[tail, daily.columns.get_loc('ewm_mark')] = np.divide(
+            ewm_signed, ewm_count, out=np.zeros(n - start), where=ewm_count > 1e-12
+        )
+        return daily, start
+
+    def _write_table(self, tmp_path, path, frame, start):
+        """
+        Ghi `frame` ra CSV. Các dòng trước `start` không đổi nên được chép nguyên byte từ file cũ,
+        chỉ phần đuôi từ `start` trở đi mới phải format lại bằng pandas.
+        """
+        header = frame.iloc[:0].to_csv(index_label='date')
+        copied = 0
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as out:
+            if start > 0 and os.path.exists(path):
+                with open(path, 'r', encoding='utf-8', newline='') as old:
+                    # Chỉ dùng lại phần đầu khi cùng tập cột và dòng cuối được chép đúng là ngày start - 1
+                    if old.readline() == header:
+                        out.write(header)
+                        line = ''
+                        for copied, line in enumerate(old, start=1):
+                            out.write(line)
+                            if copied == start:
+                                break
+                        if copied < start or not line.startswith(frame.index[start - 1].strftime('%Y-%m-%d') + ','):
+                            copied = 0
+            if copied:
+                frame.iloc[start:].to_csv(out, header=False, date_format='%Y-%m-%d')
+        if not copied:
+            frame.to_csv(tmp_path, index_label='date', date_format='%Y-%m-%d')
+
+    def _append_seen(self, new_ids):
+        """Nối id các bài mới vào cuối file id (append-only) và fsync trước khi trả về."""
+        with open(self.seen_path, 'a', encoding='utf-8') as f:
+            f.writelines(f'{i}\n' for i in new_ids)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _save(self, new_ids, start):
+        new_ids = [i for i in dict.fromkeys(new_ids) if i not in self.seen]
+        self.seen.update(new_ids)
+        # Ghi ra file tạm trước rồi mới os.replace, để bảng ngày và news00.csv luôn khớp nhau
+        pending = []
+        for path, frame in ((self.daily_path, self.daily), (self.index_path, self.daily[['total_mark']])):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            self._write_table(tmp_path, path, frame, start)
+            pending.append((tmp_path, path))
+        for tmp_path, path in pending:
+            os.replace(tmp_path, path)
+        # File id chỉ được nối thêm sau khi bảng đã thay xong: nếu dừng giữa chừng, lần chạy sau
+        # cộng lại các bài đó thay vì bỏ sót chúng khỏi bảng
+        self._append_seen(new_ids)
+
+
+def aggregate_file(filepath, silver_dir=DEFAULT_SILVER_DIR):
+    """Tổng hợp một file bài đã phân tích (mảng JSON hoặc JSONL) vào silver layer."""
+    try:
+        from .preprocess_news import iter_articles
+    except ImportError:
+        from preprocess_news import iter_articles
+
+    return NewsRiskAggregator(silver_dir).update(iter_articles(filepath))
@@ -1,71 +1,350 @@
 import os
 import json
 import sys
-from groq import Groq
+import time
+import hashlib
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+try:
+    from .response_cache import ResponseCache, make_cache_key
+    from . import metrics
+except ImportError:
+    from response_cache import ResponseCache, make_cache_key
+    import metrics
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+# System prompt được thiết kế để ép model trả về JSON chuẩn
+# --- ĐÃ CẬP NHẬT: Thêm "publication_date" và "keywords" ---
+SYSTEM_PROMPT = """
+        Bạn là một chuyên gia AI về Quản trị Rủi ro Tài chính (Financial Risk Management).
+        Nhiệm vụ: Phân tích văn bản tin tức được cung cấp và trích xuất các tín hiệu rủi ro.
+        
+        YÊU CẦU OUTPUT:
+        Chỉ trả về một chuỗi JSON hợp lệ (không markdown, không giải thích thêm) với cấu trúc sau:
+        {
+            "risk_score": (số nguyên từ 1-10, 10 là cực kỳ nguy hiểm),
+            "risk_category": (string, ví dụ: "Thanh khoản", "Pháp lý", "Uy tín", "Thị trường"),
+            "sentiment": (string, "Negative" | "Neutral" | "Positive"),
+            "key_entities": (list các tổ chức/công ty bị ảnh hưởng),
+            "publication_date": (string, trích xuất ngày từ tin tức theo dạng "YYYY-MM-DD". Nếu không tìm thấy, trả về null),
+            "keywords": (list 5-7 keywords quan trọng nhất, không trùng lặp),
+            "reasoning": (tóm tắt ngắn gọn tại sao lại chấm điểm như vậy, dưới 30 từ)
+        }
+        """
+# System prompt cho chế độ gộp nhiều bài trong một request (cùng schema với SYSTEM_PROMPT)
+PACKED_SYSTEM_PROMPT = """
+        Bạn là một chuyên gia AI về Quản trị Rủi ro Tài chính (Financial Risk Management).
+        Nhiệm vụ: Phân tích ĐỘC LẬP từng tin tức được cung cấp (mỗi tin nằm trong thẻ <article id="...">) và trích xuất các tín hiệu rủi ro.
+        
+        YÊU CẦU OUTPUT:
+        Chỉ trả về một chuỗi JSON hợp lệ (không markdown, không giải thích thêm) với cấu trúc sau:
+        {
+            "results": [
+                {
+                    "id": (string, đúng id của tin tức),
+                    "risk_score": (số nguyên từ 1-10, 10 là cực kỳ nguy hiểm),
+                    "risk_category": (string, ví dụ: "Thanh khoản", "Pháp lý", "Uy tín", "Thị trường"),
+                    "sentiment": (string, "Negative" | "Neutral" | "Positive"),
+                    "key_entities": (list các tổ chức/công ty bị ảnh hưởng),
+                    "publication_date": (string, trích xuất ngày từ tin tức theo dạng "YYYY-MM-DD". Nếu không tìm thấy, trả về null),
+                    "keywords": (list 5-7 keywords quan trọng nhất, không trùng lặp),
+                    "reasoning": (tóm tắt ngắn gọn tại sao lại chấm điểm như vậy, dưới 30 từ)
+                }
+            ]
+        }
+        Mảng "results" phải có đúng một phần tử cho mỗi tin tức.
+        """
+
+# Phiên bản prompt dùng trong khóa cache: tự đổi khi nội dung prompt thay đổi.
+# Kết quả phân tích từng bài chỉ phụ thuộc SYSTEM_PROMPT; kết quả từ request gộp phụ thuộc cả hai prompt,
+# nên sửa PACKED_SYSTEM_PROMPT không làm mất cache của các bài phân tích riêng lẻ.
+SYSTEM_PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:12]
+PACKED_PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_PROMPT + PACKED_SYSTEM_PROMPT).encode('utf-8')
+).hexdigest()[:12]
+
+# Giới hạn mặc định của Groq cho llama-3.3-70b-versatile (có thể ghi đè bằng GROQ_RPM / GROQ_TPM)
+DEFAULT_RPM = 30
+DEFAULT_TPM = 12000
+# Ước lượng số token output của một phân tích (JSON ngắn)
+COMPLETION_TOKENS_ESTIMATE = 300
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# Lỗi của request gộp mà gửi lại từng bài cũng sẽ gặp (sai key / không có quyền / hết lượt retry vì rate limit).
+# Các lỗi khác (JSON hỏng / bị cắt, gói quá dài: 400, 413, ...) thì gửi lại riêng từng bài.
+PACKED_FATAL_STATUS = {401, 403, 429}
+# Chế độ gộp: ngân sách token (input + output ước lượng) và số bài tối đa của một request
+PACKED_TOKEN_BUDGET = 6000
+PACKED_MAX_ARTICLES = 10
+RESULT_KEYS = (
+    "risk_score", "risk_category", "sentiment", "key_entities",
+    "publication_date", "keywords", "reasoning",
+)
+
+
+def estimate_tokens(text):
+    """Ước lượng thô số token (tiếng Việt ~3 ký tự/token với tokenizer của Llama)."""
+    return len(text or '') // 3 + 1
+
+
+def _build_messages(news_text):
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT,
+        },
+        {
+            "role": "user",
+            "content": f"Hãy phân tích tin tức sau:\n{news_text}",
+        }
+    ]
+
+
+def _build_packed_messages(batch):
+    articles = "\n".join(f'<article id="{idx}">\n{text}\n</article>' for idx, text in batch)
+    return [
+        {
+            "role": "system",
+            "content": PACKED_SYSTEM_PROMPT,
+        },
+        {
+            "role": "user",
+            "content": f"Hãy phân tích {len(batch)} tin tức sau:\n{articles}",
+        }
+    ]
+
+
+def _article_tokens(text):
+    # Nội dung bài + thẻ <article id> + phần output ước lượng cho bài đó
+    return estimate_tokens(text) + 10 + COMPLETION_TOKENS_ESTIMATE
+
+
+def estimate_packed_tokens(texts):
+    """Ước lượng tổng token (input + output) của một request gộp các bài `texts`."""
+    return estimate_tokens(PACKED_SYSTEM_PROMPT) + sum(_article_tokens(text) for text in texts)
+
+
+def pack_batches(items, token_budget=PACKED_TOKEN_BUDGET, max_articles=PACKED_MAX_ARTICLES):
+    """
+    Chia các bài thành gói theo thứ tự, sao cho mỗi gói không vượt token_budget và max_articles.
+    Bài quá dài so với ngân sách được xếp thành một gói riêng.
+    :param items: List (chỉ số, văn bản).
+    :return: List các gói, mỗi gói là list (chỉ số, văn bản).
+    """
+    base = estimate_tokens(PACKED_SYSTEM_PROMPT)
+    batches, current, used = [], [], base
+    for idx, text in items:
+        cost = _article_tokens(text)
+        if current and (used + cost > token_budget or len(current) >= max_articles):
+            batches.append(current)
+            current, used = [], base
+        current.append((idx, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _is_valid_result(result):
+    return (
+        isinstance(result, dict)
+        and all(key in result for key in RESULT_KEYS)
+        and isinstance(result["key_entities"], list)
+        and isinstance(result["keywords"], list)
+    )
+
+
+def _match_packed_results(response, expected_ids):
+    """
+    Ghép phản hồi của request gộp về từng bài theo id.
+    :return: dict {chỉ số: kết quả (bỏ trường id)} chỉ gồm các bài có kết quả hợp lệ.
+    """
+    items = response.get("results") if isinstance(response, dict) else None
+    if not isinstance(items, list):
+        return {}
+    by_id = {str(idx): idx for idx in expected_ids}
+    matched = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        idx = by_id.get(str(item.get("id")).strip())
+        if idx is None or idx in matched or not _is_valid_result(item):
+            continue
+        matched[idx] = {key: value for key, value in item.items() if key != "id"}
+    return matched
+
+
+class TokenBucketLimiter:
+    def __init__(self, rpm, tpm):
+        """
+        Giới hạn tốc độ theo hai token bucket: số request/phút (RPM) và số token/phút (TPM).
+        Mỗi bucket đầy lại tuyến tính theo thời gian, dung lượng tối đa bằng giới hạn 1 phút.
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+        return now
+
+    async def acquire(self, tokens):
+        """Chờ tới khi đủ 1 request và `tokens` token trong bucket rồi trừ đi."""
+        tokens = min(tokens, self.tpm)
+        async with self._lock:
+            while True:
+                now = self._refill()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait_requests = max(0.0, (1 - self._requests) * 60 / self.rpm)
+                wait_tokens = max(0.0, (tokens - self._tokens) * 60 / self.tpm)
+                await asyncio.sleep(max(wait_requests, wait_tokens))
+
+    def adjust(self, delta_tokens):
+        """Điều chỉnh theo số token thực tế (usage) sau khi có phản hồi: delta > 0 nghĩa là đã dùng nhiều hơn ước lượng."""
+        self._refill()
+        self._tokens = min(self.tpm, self._tokens - delta_tokens)
+
+    def block_for(self, seconds):
+        """Tạm dừng mọi request trong `seconds` giây (khi server trả 429 kèm retry-after)."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def _retry_after_seconds(error):
+    """Đọc header retry-after (số giây hoặc HTTP-date) từ lỗi của Groq SDK, nếu có."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _record_usage(chat_completion, elapsed, mode):
+    """Ghi latency + số token prompt/completion của một lần gọi API (no-op khi metrics chưa bật)."""
+    if not metrics.enabled():
+        return
+    usage = getattr(chat_completion, 'usage', None)
+    prompt_tokens = getattr(usage, 'prompt_tokens', None) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', None) or 0
+    metrics.count('analyze.prompt_tokens', prompt_tokens, mode=mode)
+    metrics.count('analyze.completion_tokens', completion_tokens, mode=mode)
+    metrics.log('analyze_request', mode=mode, seconds=round(elapsed, 4),
+                prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+def _is_retryable(error):
+    from groq import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS
+    # Lỗi kết nối / timeout
+    return isinstance(error, APIConnectionError)
+
 
 class FinancialRiskAnalyzer:
     def __init__(
         self, 
         api_key=None,
-        model="llama-3.3-70b-versatile"
+        model="llama-3.3-70b-versatile",
+        base_url=None,
+        rpm=None,
+        tpm=None,
+        cache=None
     ):
         """
         Khởi tạo Analyzer với API Key và Model.
         Nếu không truyền api_key, nó sẽ tự tìm trong biến môi trường GROQ_API_KEY.
+        :param base_url: Endpoint thay thế (vd. server giả lập chat-completions khi test).
+        :param rpm, tpm: Giới hạn request/phút và token/phút dùng cho analyze_many
+                         (mặc định đọc GROQ_RPM / GROQ_TPM, nếu không có thì dùng giới hạn của Groq).
+        :param cache: ResponseCache để tái sử dụng kết quả cho tin đã phân tích
+                      (True = dùng cache mặc định tại data/cache/analysis_cache.sqlite).
         """
         self.api_key = api_key or os.environ.get("GROQ_API_KEY")
         if not self.api_key:
             raise ValueError("Không tìm thấy API Key. Vui lòng set biến môi trường GROQ_API_KEY hoặc truyền trực tiếp.")
         
-        self.client = Groq(api_key=self.api_key)
+        from groq import Groq
+
+        self.base_url = base_url
+        self.client = Groq(api_key=self.api_key, base_url=base_url)
         self.model = model
+        self.rpm = rpm or int(os.environ.get("GROQ_RPM", DEFAULT_RPM))
+        self.tpm = tpm or int(os.environ.get("GROQ_TPM", DEFAULT_TPM))
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = None if cache is False else cache
+
+    def _cache_key(self, news_text, prompt_version=SYSTEM_PROMPT_VERSION):
+        return make_cache_key(self.model, prompt_version, news_text)
+
+    def _cached(self, news_text):
+        """
+        Kết quả đã cache cho tin này (hoặc None): ưu tiên kết quả phân tích riêng lẻ, sau đó tới kết quả từ request gộp.
+        Không có cache thì luôn trả None.
+        """
+        if self.cache is None:
+            return None
+        result = self.cache.get(self._cache_key(news_text), self._cache_key(news_text, PACKED_PROMPT_VERSION))
+        metrics.count('analyze.cache', result='miss' if result is None else 'hit')
+        return result
+
+    def _remember(self, news_text, result, prompt_version=SYSTEM_PROMPT_VERSION):
+        # Không cache kết quả lỗi để lần chạy sau gọi lại API
+        if self.cache is not None and not result.get("error"):
+            self.cache.put(self._cache_key(news_text, prompt_version), result)
+        return result
 
     def analyze_news(self, news_text):
         """
         Phân tích đoạn tin tức và trả về dict chứa thông tin đánh giá rủi ro.
+        Nếu có cache và tin đã được phân tích (cùng model, cùng prompt) thì không gọi API.
         """
-        
-        # System prompt được thiết kế để ép model trả về JSON chuẩn
-        # --- ĐÃ CẬP NHẬT: Thêm "publication_date" và "keywords" ---
-        system_prompt = """
-        Bạn là một chuyên gia AI về Quản trị Rủi ro Tài chính (Financial Risk Management).
-        Nhiệm vụ: Phân tích văn bản tin tức được cung cấp và trích xuất các tín hiệu rủi ro.
-        
-        YÊU CẦU OUTPUT:
-        Chỉ trả về một chuỗi JSON hợp lệ (không markdown, không giải thích thêm) với cấu trúc sau:
-        {
-            "risk_score": (số nguyên từ 1-10, 10 là cực kỳ nguy hiểm),
-            "risk_category": (string, ví dụ: "Thanh khoản", "Pháp lý", "Uy tín", "Thị trường"),
-            "sentiment": (string, "Negative" | "Neutral" | "Positive"),
-            "key_entities": (list các tổ chức/công ty bị ảnh hưởng),
-            "publication_date": (string, trích xuất ngày từ tin tức theo dạng "YYYY-MM-DD". Nếu không tìm thấy, trả về null),
-            "keywords": (list 5-7 keywords quan trọng nhất, không trùng lặp),
-            "reasoning": (tóm tắt ngắn gọn tại sao lại chấm điểm như vậy, dưới 30 từ)
-        }
-        """
-
+        cached = self._cached(news_text)
+        if cached is not None:
+            return cached
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt,
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Hãy phân tích tin tức sau:\n{news_text}",
-                    }
-                ],
-                model=self.model,
-                temperature=0.1, # Giữ temperature thấp để kết quả ổn định
-                response_format={"type": "json_object"}, # Bắt buộc trả về JSON
-            )
+            with metrics.timer('analyze.request', mode='sync') as timer:
+                chat_completion = self.client.chat.completions.create(
+                    messages=_build_messages(news_text),
+                    model=self.model,
+                    temperature=0.1, # Giữ temperature thấp để kết quả ổn định
+                    response_format={"type": "json_object"}, # Bắt buộc trả về JSON
+                )
+            _record_usage(chat_completion, timer.elapsed, 'sync')
 
             # Lấy nội dung trả về
             result_content = chat_completion.choices[0].message.content
             
             # Parse từ string sang Python Dict
-            return json.loads(result_content)
+            return self._remember(news_text, json.loads(result_content))
 
         except Exception as e:
             return {
@@ -73,6 +352,278 @@ class FinancialRiskAnalyzer:
                 "message": str(e)
             }
 
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Phân tích hàng loạt (async)
+    # ---------------------------------------------------------------------------------------------------------------------
+    async def _complete_with_retry(self, client, messages, estimated, limiter, max_retries, base_delay, max_delay):
+        """Gọi chat-completions (JSON mode) có rate limit + retry. Trả về dict đã parse hoặc dict lỗi."""
+        attempt = 0
+        while True:
+            with metrics.timer('analyze.rate_limit_wait'):
+                await limiter.acquire(estimated)
+            try:
+                with metrics.timer('analyze.request', mode='async') as timer:
+                    chat_completion = await client.chat.completions.create(
+                        messages=messages,
+                        model=self.model,
+                        temperature=0.1,
+                        response_format={"type": "json_object"},
+                    )
+                _record_usage(chat_completion, timer.elapsed, 'async')
+                usage = getattr(chat_completion, 'usage', None)
+                if usage is not None and getattr(usage, 'total_tokens', None):
+                    limiter.adjust(usage.total_tokens - estimated)
+                result = json.loads(chat_completion.choices[0].message.content)
+                if not isinstance(result, dict):
+                    raise ValueError(f"Phản hồi JSON phải là object, nhận được {type(result).__name__}")
+                return result
+
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= max_retries:
+                    error = {
+                        "error": True,
+                        "message": str(e)
+                    }
+                    status = getattr(e, 'status_code', None)
+                    if status is not None:
+                        error["status"] = status
+                    return error
+                # Full jitter backoff, nhưng không sớm hơn retry-after của server
+                delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+                retry_after = _retry_after_seconds(e)
+                if retry_after is not None:
+                    limiter.block_for(retry_after)
+                    delay = max(delay, retry_after)
+                attempt += 1
+                metrics.count('analyze.retries', status=getattr(e, 'status_code', None) or type(e).__name__)
+                await asyncio.sleep(delay)
+
+    async def _analyze_with_retry(self, client, news_text, limiter, max_retries, base_delay, max_delay):
+        estimated = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(news_text) + COMPLETION_TOKENS_ESTIMATE
+        result = await self._complete_with_retry(
+            client, _build_messages(news_text), estimated, limiter, max_retries, base_delay, max_delay
+        )
+        return self._remember(news_text, result)
+
+    async def _analyze_packed_with_retry(self, client, batch, limiter, max_retries, base_delay, max_delay):
+        """
+        Phân tích một gói nhiều bài trong một request, ghép kết quả theo id.
+        Bài bị thiếu hoặc sai schema trong phản hồi được gửi lại riêng lẻ.
+        :param batch: List (chỉ số, văn bản).
+        :return: List (chỉ số, kết quả).
+        """
+        if len(batch) == 1:
+            idx, text = batch[0]
+            return [(idx, await self._analyze_with_retry(client, text, limiter, max_retries, base_delay, max_delay))]
+
+        estimated = estimate_packed_tokens([text for _, text in batch])
+        response = await self._complete_with_retry(
+            client, _build_packed_messages(batch), estimated, limiter, max_retries, base_delay, max_delay
+        )
+        if response.get("error") and response.get("status") in PACKED_FATAL_STATUS:
+            # Sai key / hết lượt retry vì rate limit: gửi lại từng bài cũng sẽ gặp lỗi tương tự
+            return [(idx, response) for idx, _ in batch]
+
+        # Phản hồi hỏng (parse lỗi, bị cắt) hoặc gói bị từ chối vì quá dài: mọi bài đều được gửi lại riêng lẻ
+        matched = {} if response.get("error") else _match_packed_results(response, [idx for idx, _ in batch])
+        out = []
+        for idx, text in batch:
+            if idx in matched:
+                out.append((idx, self._remember(text, matched[idx], PACKED_PROMPT_VERSION)))
+            else:
+                out.append((idx, await self._analyze_with_retry(
+                    client, text, limiter, max_retries, base_delay, max_delay
+                )))
+        return out
+
+    async def _run_batch(self, news_texts, packed, concurrency, max_retries, base_delay, max_delay,
+                         token_budget, max_articles):
+        results = asyncio.Queue()
+        uncached = []
+        total = 0
+        for idx, text in enumerate(news_texts):
+            total += 1
+            cached = self._cached(text)
+            if cached is not None:
+                results.put_nowait((idx, cached))
+            else:
+                uncached.append((idx, text))
+        if not uncached:
+            for _ in range(total):
+                yield results.get_nowait()
+            return
+
+        # Mỗi job là một bài (chế độ thường) hoặc một gói nhiều bài (chế độ packed)
+        pending = asyncio.Queue()
+        if packed:
+            for batch in pack_batches(uncached, token_budget, max_articles):
+                pending.put_nowait(batch)
+        else:
+            for item in uncached:
+                pending.put_nowait([item])
+
+        from groq import AsyncGroq
+
+        limiter = TokenBucketLimiter(self.rpm, self.tpm)
+        # max_retries=0: việc retry do analyze_many quản lý (có tính tới rate limit).
+        # Client tạo mới cho mỗi lần gọi vì kết nối httpx gắn với event loop hiện tại.
+        client = AsyncGroq(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+
+        async def _worker():
+            while True:
+                try:
+                    batch = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    if packed:
+                        done = await self._analyze_packed_with_retry(
+                            client, batch, limiter, max_retries, base_delay, max_delay
+                        )
+                    else:
+                        idx, text = batch[0]
+                        done = [(idx, await self._analyze_with_retry(
+                            client, text, limiter, max_retries, base_delay, max_delay
+                        ))]
+                except Exception as e:
+                    # Lỗi ngoài lần gọi API (cache, ghép kết quả, ...): vẫn trả kết quả lỗi cho từng bài,
+                    # nếu không vòng `results.get()` ở dưới sẽ chờ mãi
+                    done = [(idx, {"error": True, "message": f"{type(e).__name__}: {e}"}) for idx, _ in batch]
+                for item in done:
+                    await results.put(item)
+
+        workers = [asyncio.create_task(_worker()) for _ in range(max(1, min(concurrency, pending.qsize())))]
+        try:
+            for _ in range(total):
+                yield await results.get()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await client.close()
+
+    async def analyze_many(
+        self,
+        news_texts,
+        concurrency=8,
+        max_retries=5,
+        base_delay=1.0,
+        max_delay=60.0
+    ):
+        """
+        Phân tích nhiều tin tức đồng thời, trả kết quả dần (async generator) theo thứ tự hoàn thành.
+        - Tối đa `concurrency` request đang chạy cùng lúc.
+        - Token bucket theo self.rpm / self.tpm chặn trước khi vượt giới hạn của Groq.
+        - Lỗi 429/5xx/kết nối được retry với backoff có jitter, tôn trọng header retry-after.
+        - Tin đã có trong cache được trả ngay, không tốn request.
+        Dùng: `async for idx, result in analyzer.analyze_many(texts): ...`
+        :yield: (chỉ số trong news_texts, dict kết quả giống analyze_news)
+        """
+        async for item in self._run_batch(
+            news_texts, False, concurrency, max_retries, base_delay, max_delay, None, None
+        ):
+            yield item
+
+    async def analyze_packed(
+        self,
+        news_texts,
+        token_budget=PACKED_TOKEN_BUDGET,
+        max_articles=PACKED_MAX_ARTICLES,
+        concurrency=4,
+        max_retries=5,
+        base_delay=1.0,
+        max_delay=60.0
+    ):
+        """
+        Giống analyze_many nhưng gộp nhiều bài vào một request để tiết kiệm RPM
+        (system prompt chỉ gửi một lần cho cả gói).
+        - Mỗi bài được gắn id; model trả về {"results": [{"id": ..., <schema của analyze_news>}, ...]}.
+        - Gói được chia sao cho tổng token ước lượng (prompt + các bài + output) không vượt token_budget.
+        - Kết quả được kiểm tra đủ các trường; bài bị thiếu / sai được gửi lại riêng lẻ.
+        :yield: (chỉ số trong news_texts, dict kết quả giống analyze_news)
+        """
+        async for item in self._run_batch(
+            news_texts, True, concurrency, max_retries, base_delay, max_delay, token_budget, max_articles
+        ):
+            yield item
+
+    def analyze_all(self, news_texts, packed=False, **kwargs):
+        """
+        Bản đồng bộ của analyze_many / analyze_packed: trả về list kết quả theo đúng thứ tự đầu vào.
+        (Trong notebook đã có event loop, hãy dùng `async for` với analyze_many.)
+        :param packed: True để gộp nhiều bài vào một request (analyze_packed).
+        """
+        news_texts = list(news_texts)
+        run = self.analyze_packed if packed else self.analyze_many
+
+        async def _collect():
+            ordered = [None] * len(news_texts)
+            async for idx, result in run(news_texts, **kwargs):
+                ordered[idx] = result
+            return ordered
+
+        ordered = asyncio.run(_collect())
+        if self.cache is not None:
+            stats = self.cache.stats()
+            print(f"📦 Cache phân tích: {stats['hits']} hit / {stats['misses']} miss ({stats['entries']} mục).")
+        return ordered
+
+    def session(self, max_retries=5, base_delay=1.0, max_delay=60.0):
+        """
+        RateLimitedSession cho code đồng bộ gọi từ nhiều thread (vd. stage analyze của StreamingPipeline):
+        mọi lần gọi dùng chung một token bucket và cùng cơ chế retry / backoff với analyze_many.
+        """
+        return RateLimitedSession(self, max_retries=max_retries, base_delay=base_delay, max_delay=max_delay)
+
+
+class RateLimitedSession:
+    def __init__(self, analyzer, max_retries=5, base_delay=1.0, max_delay=60.0):
+        """
+        Chạy một event loop riêng trong thread nền, giữ một AsyncGroq client và một TokenBucketLimiter dùng chung.
+        analyze() an toàn khi gọi từ nhiều thread: số thread gọi đồng thời chính là số request đang chạy.
+        """
+        from groq import AsyncGroq
+
+        self.analyzer = analyzer
+        self.retry = (max_retries, base_delay, max_delay)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name='analyze-session')
+        self._thread.start()
+
+        async def _create():
+            # Tạo trong event loop của session: asyncio.Lock và kết nối httpx gắn với loop này
+            limiter = TokenBucketLimiter(analyzer.rpm, analyzer.tpm)
+            client = AsyncGroq(api_key=analyzer.api_key, base_url=analyzer.base_url, max_retries=0)
+            return limiter, client
+
+        self._limiter, self._client = self._call(_create())
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def analyze(self, news_text):
+        """Giống analyze_news nhưng có rate limit + retry; trả về dict kết quả hoặc dict lỗi sau khi hết lượt retry."""
+        cached = self.analyzer._cached(news_text)
+        if cached is not None:
+            return cached
+        return self._call(self.analyzer._analyze_with_retry(self._client, news_text, self._limiter, *self.retry))
+
+    def close(self):
+        if not self._loop.is_running():
+            return
+        try:
+            self._call(self._client.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 
 def example():
     """Hàm ví dụ để test nhanh module này khi chạy như một script."""
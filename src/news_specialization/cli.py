@@ -0,0 +1,268 @@
+"""
+CLI chung cho pipeline tin tức. Chạy từ thư mục gốc của repo:
+
+    python -m src.news_specialization ingest --keywords "Credit Suisse" "SVB"
+    python -m src.news_specialization preprocess data/bronze/news/news_credit_suisse.json data/cleaned_news.json --keyword "Credit Suisse"
+    python -m src.news_specialization summarize data/cleaned_news.json data/summarized_news.json --shards 2
+    python -m src.news_specialization analyze data/summarized_news.json data/analyzed_news.json --packed
+    python -m src.news_specialization aggregate data/analyzed_news.json
+    python -m src.news_specialization pipeline data/pipeline_news.jsonl --keywords "Credit Suisse" --filter "Credit Suisse"
+    python -m src.news_specialization serve-summarizer --backend int8
+    python -m src.news_specialization import-time --budget 0.5
+    python -m src.news_specialization --metrics data/metrics pipeline data/pipeline_news.jsonl --input data/news.json
+
+Mỗi lệnh chỉ import module của stage tương ứng khi được gọi.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+IMPORT_TIME_BUDGET = 0.5     # giây cho mỗi module (tests/test_import_time.py dùng cùng ngân sách)
+MODULES = (
+    'aggregate_news', 'analyze_news', 'crawl_scheduler', 'html_cache', 'ingest_news', 'keyword_index', 'metrics',
+    'near_duplicates', 'news_store', 'pipeline', 'preprocess_news', 'response_cache', 'summarize_news', 'summarize_server',
+    'url_resolver',
+)
+
+
+def _load_groq_env():
+    """Nạp .env và kiểm tra GROQ_API_KEY; trả về False (đã in lỗi) nếu thiếu biến môi trường."""
+    try:
+        from ..utils import config
+    except ImportError:
+        # Thiếu python-dotenv: dùng biến môi trường hiện có
+        return True
+    try:
+        config.load_env(['GROQ_API_KEY'])
+    except EnvironmentError as e:
+        print(e)
+        return False
+    return True
+
+
+def _cmd_ingest(args):
+    from .ingest_news import main as ingest_main
+
+    ingest_main(
+        max_workers=args.workers,
+        timeout=args.timeout,
+        num_drivers=args.drivers,
+        keywords=args.keywords,
+        export_dir=args.export
+    )
+
+
+def _cmd_preprocess(args):
+    from .preprocess_news import NewsPreprocessor
+
+    keyword = args.keyword or None
+    if args.stream:
+        NewsPreprocessor().process_stream(args.input, args.output, filter_keyword=keyword, min_words=args.min_words)
+        return
+    processor = NewsPreprocessor(filepath=args.input)
+    processor.process(
+        filter_keyword=keyword,
+        processes=args.processes,
+        near_duplicate_threshold=args.near_duplicates
+    )
+    processor.save_to_json(args.output)
+
+
+def _cmd_summarize(args):
+    from .summarize_news import summarize_for_file
+
+    summarize_for_file(
+        args.input,
+        args.output,
+        checkpoint_every=args.checkpoint_every,
+        num_shards=args.shards,
+        backend=args.backend
+    )
+
+
+def _cmd_serve_summarizer(args):
+    from .summarize_server import serve, DEFAULT_ADDRESS
+
+    serve(address=args.address or DEFAULT_ADDRESS, backend=args.backend)
+
+
+def _cmd_analyze(args):
+    from .analyze_news import FinancialRiskAnalyzer
+    from .preprocess_news import iter_articles
+
+    if not _load_groq_env():
+        return 1
+
+    articles = list(iter_articles(args.input))
+    fields = [args.field] if args.field else ['summarision', 'clean_content', 'content']
+    texts = [next((a[f] for f in fields if a.get(f)), '') for a in articles]
+
+    analyzer = FinancialRiskAnalyzer(cache=None if args.no_cache else True)
+    results = analyzer.analyze_all(texts, packed=args.packed, concurrency=args.concurrency)
+    for article, result in zip(articles, results):
+        article['analysis'] = result
+
+    tmp_path = f"{args.output}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(articles, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, args.output)
+    errors = sum(1 for r in results if r.get('error'))
+    print(f"✅ Đã phân tích {len(results)} bài ({errors} lỗi) -> {args.output}")
+
+
+def _cmd_aggregate(args):
+    from .aggregate_news import aggregate_file
+
+    for path in args.inputs:
+        aggregate_file(path, silver_dir=args.silver_dir)
+
+
+def _cmd_pipeline(args):
+    from .pipeline import run_news_pipeline
+
+    if not args.no_analyze and not _load_groq_env():
+        return 1
+
+    run_news_pipeline(
+        args.output,
+        keywords=args.keywords,
+        input_path=args.input,
+        summarize=not args.no_summarize,
+        analyze=not args.no_analyze,
+        aggregate=not args.no_aggregate,
+        silver_dir=args.silver_dir,
+        summarizer_address=args.summarizer_address,
+        backend=args.backend,
+        filter_keyword=args.filter or None,
+        min_words=args.min_words,
+        num_drivers=args.drivers,
+        fetch_workers=args.fetch_workers,
+        analyze_workers=args.analyze_workers,
+        summarize_batch=args.summarize_batch,
+        cache=None if args.no_cache else True
+    )
+
+
+def import_seconds(module, cwd=None):
+    """Thời gian (giây) import `module` (tên đầy đủ) trong một tiến trình Python mới, chạy từ `cwd` (mặc định thư mục hiện tại)."""
+    code = (
+        "import sys, time, importlib; t = time.perf_counter(); "
+        "importlib.import_module(sys.argv[1]); print(time.perf_counter() - t)"
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code, module],
+        capture_output=True, text=True, check=True, cwd=cwd
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _cmd_import_time(args):
+    """Đo thời gian import từng module trong một tiến trình Python mới; trả về 1 nếu có module vượt ngân sách."""
+    package = __name__.rsplit('.', 1)[0]
+    slow = []
+    for module in MODULES:
+        seconds = import_seconds(f'{package}.{module}')
+        mark = '✅' if seconds <= args.budget else '❌'
+        print(f"{mark} {module:20s} {seconds * 1000:8.1f} ms")
+        if seconds > args.budget:
+            slow.append(module)
+    if slow:
+        print(f"❌ {len(slow)} module vượt ngân sách {args.budget * 1000:.0f} ms: {', '.join(slow)}")
+        return 1
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m src.news_specialization', description="Pipeline tin tức tài chính.")
+    parser.add_argument('--metrics', default=None, metavar='DIR',
+                        help="Bật đo đạc hiệu năng, ghi báo cáo JSON / Prometheus và log có cấu trúc vào DIR.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help="Crawl Google News và lưu bài viết vào kho.")
+    p.add_argument('--keywords', nargs='+', default=None)
+    p.add_argument('--workers', type=int, default=4)
+    p.add_argument('--timeout', type=float, default=15)
+    p.add_argument('--drivers', type=int, default=2)
+    p.add_argument('--export', default=None, metavar='DIR',
+                   help="Xuất news_<keyword>.json từ kho vào DIR sau khi crawl (đọc lại toàn bộ kho).")
+    p.set_defaults(func=_cmd_ingest)
+
+    p = sub.add_parser('preprocess', help="Làm sạch, lọc và khử trùng lặp tin tức.")
+    p.add_argument('input')
+    p.add_argument('output')
+    p.add_argument('--keyword', nargs='*', default=None)
+    p.add_argument('--processes', type=int, default=1)
+    p.add_argument('--near-duplicates', type=float, default=None, metavar='THRESHOLD')
+    p.add_argument('--stream', action='store_true', help="Xử lý file lớn với bộ nhớ không đổi.")
+    p.add_argument('--min-words', type=int, default=20)
+    p.set_defaults(func=_cmd_preprocess)
+
+    p = sub.add_parser('summarize', help="Tóm tắt nội dung bằng ViT5 (có checkpoint, chạy lại được).")
+    p.add_argument('input')
+    p.add_argument('output')
+    p.add_argument('--checkpoint-every', type=int, default=20)
+    p.add_argument('--shards', type=int, default=1)
+    p.add_argument('--backend', choices=('fp32', 'int8', 'onnx'), default='fp32')
+    p.set_defaults(func=_cmd_summarize)
+
+    p = sub.add_parser('serve-summarizer', help="Chạy worker tóm tắt dùng chung (load model một lần).")
+    p.add_argument('--address', default=None)
+    p.add_argument('--backend', choices=('fp32', 'int8', 'onnx'), default='fp32')
+    p.set_defaults(func=_cmd_serve_summarizer)
+
+    p = sub.add_parser('analyze', help="Đánh giá rủi ro tài chính bằng Groq.")
+    p.add_argument('input')
+    p.add_argument('output')
+    p.add_argument('--field', default=None, help="Trường văn bản cần phân tích (mặc định: summarision > clean_content > content).")
+    p.add_argument('--packed', action='store_true', help="Gộp nhiều bài vào một request.")
+    p.add_argument('--concurrency', type=int, default=8)
+    p.add_argument('--no-cache', action='store_true')
+    p.set_defaults(func=_cmd_analyze)
+
+    p = sub.add_parser('aggregate', help="Cộng các bài đã phân tích vào chỉ số rủi ro theo ngày (news00.csv).")
+    p.add_argument('inputs', nargs='+')
+    p.add_argument('--silver-dir', default=os.path.join('data', 'silver', 'news'))
+    p.set_defaults(func=_cmd_aggregate)
+
+    p = sub.add_parser('pipeline', help="Chạy streaming crawl -> làm sạch -> tóm tắt -> phân tích -> silver.")
+    p.add_argument('output', help="File JSONL đầu ra.")
+    p.add_argument('--keywords', nargs='+', default=None)
+    p.add_argument('--input', default=None, help="Dùng bài có sẵn (JSON / JSONL) thay vì crawl.")
+    p.add_argument('--filter', nargs='*', default=None, help="Chỉ giữ bài chứa các từ khóa này.")
+    p.add_argument('--min-words', type=int, default=20)
+    p.add_argument('--drivers', type=int, default=2)
+    p.add_argument('--fetch-workers', type=int, default=4)
+    p.add_argument('--analyze-workers', type=int, default=8)
+    p.add_argument('--summarize-batch', type=int, default=8)
+    p.add_argument('--summarizer-address', default=None, help="Dùng summarization worker đang chạy thay vì load ViT5.")
+    p.add_argument('--backend', choices=('fp32', 'int8', 'onnx'), default='fp32')
+    p.add_argument('--no-summarize', action='store_true')
+    p.add_argument('--no-analyze', action='store_true')
+    p.add_argument('--no-aggregate', action='store_true')
+    p.add_argument('--no-cache', action='store_true')
+    p.add_argument('--silver-dir', default=os.path.join('data', 'silver', 'news'))
+    p.set_defaults(func=_cmd_pipeline)
+
+    p = sub.add_parser('import-time', help="Kiểm tra thời gian import các module của package.")
+    p.add_argument('--budget', type=float, default=IMPORT_TIME_BUDGET, help="Ngân sách cho mỗi module (giây).")
+    p.set_defaults(func=_cmd_import_time)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.metrics:
+        return args.func(args) or 0
+
+    from . import metrics
+
+    metrics.enable(args.metrics)
+    metrics.log('command_start', command=args.command, argv=list(sys.argv[1:] if argv is None else argv))
+    try:
+        with metrics.timer('cli.command', command=args.command):
+            return args.func(args) or 0
+    finally:
+        metrics.export()
+        metrics.disable()
@@ -0,0 +1,211 @@
+import os
+import json
+import queue
+import threading
+
+try:
+    from .ingest_news import load_driver, get_news, fetch_articles_details
+except ImportError:
+    # Chạy trực tiếp như một script trong thư mục src/news_specialization
+    from ingest_news import load_driver, get_news, fetch_articles_details
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+DEFAULT_CHECKPOINT_PATH = os.path.join('data', 'cache', 'crawl_checkpoint.json')
+
+
+class CrawlScheduler:
+    def __init__(
+        self,
+        keywords,
+        num_drivers=2,
+        topk=50,
+        checkpoint_path=DEFAULT_CHECKPOINT_PATH,
+        driver_factory=None
+    ):
+        """
+        Lập lịch crawl nhiều từ khóa song song trên một pool WebDriver.
+        Mọi từ khóa dùng chung một bảng URL đã thấy, nên một bài xuất hiện dưới nhiều từ khóa
+        chỉ được tải nội dung (và phân tích về sau) một lần; trường 'keywords' ghi lại mọi từ khóa khớp.
+        :param keywords: Danh sách từ khóa cần crawl.
+        :param num_drivers: Số WebDriver chạy song song (mỗi driver xử lý một từ khóa tại một thời điểm).
+        :param topk: Số bài tối thiểu cho mỗi từ khóa (truyền vào get_news).
+        :param checkpoint_path: File JSON lưu tiến độ để chạy tiếp khi bị ngắt giữa chừng.
+        :param driver_factory: Hàm tạo driver, mặc định là load_driver.
+        """
+        self.keywords = list(dict.fromkeys(keywords))
+        self.num_drivers = max(1, min(num_drivers, len(self.keywords) or 1))
+        self.topk = topk
+        self.checkpoint_path = checkpoint_path
+        self.driver_factory = driver_factory or load_driver
+
+        self.articles = {}          # url -> bài viết (bảng dedup dùng chung giữa các từ khóa)
+        self.completed = []         # các từ khóa đã crawl xong
+        self.details_done = False
+        self._lock = threading.Lock()
+
+        self._load_checkpoint()
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Checkpoint
+    # ---------------------------------------------------------------------------------------------------------------------
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Không đọc được checkpoint ({e}), bắt đầu lại từ đầu.")
+            return
+
+        self.articles = {item['url']: item for item in state.get('articles', [])}
+        self.completed = [kw for kw in state.get('completed', []) if kw in self.keywords]
+        self.details_done = state.get('details_done', False) and len(self.completed) == len(self.keywords)
+        print(f"♻️ Đã nạp checkpoint: {len(self.completed)}/{len(self.keywords)} từ khóa, {len(self.articles)} bài viết.")
+
+    def _save_checkpoint(self):
+        """Ghi checkpoint một cách nguyên tử (ghi file tạm rồi os.replace)."""
+        if not self.checkpoint_path:
+            return
+        # Giữ lock suốt lúc ghi: các worker dùng chung file tạm, và _merge có thể sửa 'keywords' của bài đang được dump
+        with self._lock:
+            state = {
+                'keywords': self.keywords,
+                'completed': list(self.completed),
+                'details_done': self.details_done,
+                'articles': list(self.articles.values()),
+            }
+            os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+            tmp_path = self.checkpoint_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Crawl
+    # ---------------------------------------------------------------------------------------------------------------------
+    def _merge(self, keyword, result):
+        """Gộp kết quả của một từ khóa vào bảng dùng chung. Trả về số bài mới."""
+        new_count = 0
+        with self._lock:
+            for item in result:
+                existing = self.articles.get(item['url'])
+                if existing is None:
+                    item['keywords'] = [keyword]
+                    self.articles[item['url']] = item
+                    new_count += 1
+                elif keyword not in existing['keywords']:
+                    existing['keywords'].append(keyword)
+            self.completed.append(keyword)
+        return new_count
+
+    def _worker(self, pending):
+        driver = None
+        try:
+            while True:
+                try:
+                    keyword = pending.get_nowait()
+                except queue.Empty:
+                    return
+                if driver is None:
+                    driver = self.driver_factory()
+                    if driver is None:
+                        print("Không thể khởi tạo driver cho worker. Dừng worker.")
+                        return
+
+                result = get_news(keyword, driver, topk=self.topk)
+                if result is None:
+                    # Lỗi trong get_news: không đánh dấu hoàn tất để lần chạy sau thử lại
+                    print(f"⚠️ Crawl thất bại cho từ khóa '{keyword}', sẽ thử lại ở lần chạy sau.")
+                    continue
+
+                new_count = self._merge(keyword, result)
+                self._save_checkpoint()
+                print(f"📌 '{keyword}': {len(result)} bài, {new_count} bài chưa thấy ở từ khóa khác.")
+        finally:
+            if driver:
+                driver.quit()
+
+    def crawl(self):
+        """Crawl tất cả từ khóa chưa hoàn tất. Trả về danh sách bài viết đã dedup."""
+        pending = queue.Queue()
+        for keyword in self.keywords:
+            if keyword not in self.completed:
+                pending.put(keyword)
+
+        if not pending.empty():
+            print(f"🚀 Crawl {pending.qsize()} từ khóa với {self.num_drivers} WebDriver...")
+            threads = [
+                threading.Thread(target=self._worker, args=(pending,), daemon=True)
+                for _ in range(self.num_drivers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        return list(self.articles.values())
+
+    def fetch_details(self, max_workers=4, timeout=15, resolver=None, chunk_size=50, store=None, html_cache=None):
+        """
+        Tải nội dung cho các bài chưa có 'content' (mỗi URL đúng một lần, bất kể số từ khóa khớp).
+        Checkpoint sau mỗi chunk_size bài để không mất nội dung đã tải khi bị ngắt.
+        :param store: NewsStore (tùy chọn). Bài đã có trong kho được bỏ qua, bài tải thành công được ghi thêm vào kho.
+        :param html_cache: HtmlCache (tùy chọn) để lưu HTML gốc của các bài vừa tải.
+        """
+        if self.details_done:
+            return list(self.articles.values())
+
+        todo = [item for item in self.articles.values() if not item.get('content')]
+        if store is not None:
+            skipped = len(todo)
+            todo = store.filter_new(todo)
+            print(f"🗃️ Bỏ qua {skipped - len(todo)} bài đã có trong kho.")
+
+        if todo:
+            print(f"\n--- Bắt đầu lấy nội dung chi tiết cho {len(todo)} bài viết ---")
+            for start in range(0, len(todo), chunk_size):
+                chunk = todo[start:start + chunk_size]
+                fetch_articles_details(
+                    chunk,
+                    max_workers=max_workers,
+                    timeout=timeout,
+                    resolver=resolver,
+                    html_cache=html_cache
+                )
+                if store is not None:
+                    # Bài lỗi không được ghi vào kho để lần chạy sau thử lại
+                    store.append([item for item in chunk if item.get('content') and not item.get('error')])
+                self._save_checkpoint()
+
+        with self._lock:
+            self.details_done = len(self.completed) == len(self.keywords)
+        self._save_checkpoint()
+        return list(self.articles.values())
+
+    def run(self, max_workers=4, timeout=15, resolver=None, store=None, html_cache=None):
+        """Crawl rồi tải nội dung chi tiết. Trả về {từ khóa: danh sách bài viết khớp}."""
+        self.crawl()
+        self.fetch_details(
+            max_workers=max_workers,
+            timeout=timeout,
+            resolver=resolver,
+            store=store,
+            html_cache=html_cache
+        )
+        return self.results_by_keyword()
+
+    def results_by_keyword(self):
+        grouped = {keyword: [] for keyword in self.keywords}
+        for item in self.articles.values():
+            for keyword in item.get('keywords', []):
+                if keyword in grouped:
+                    grouped[keyword].append(item)
+        return grouped
+
+    def clear_checkpoint(self):
+        """Xóa checkpoint sau khi toàn bộ đợt crawl đã được lưu xong."""
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
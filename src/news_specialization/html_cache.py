@@ -0,0 +1,189 @@
+import os
+import gzip
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+DEFAULT_CACHE_DIR = os.path.join('data', 'cache', 'html')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3   # 2 GB dữ liệu nén
+
+
+class HtmlCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, compress_level=6):
+        """
+        Cache HTML gốc của bài báo, định địa chỉ theo nội dung (content-addressed).
+        - Mỗi trang HTML được nén gzip và lưu một lần tại objects/<2 ký tự đầu>/<sha256>.html.gz.
+        - Bảng SQLite ánh xạ URL gốc -> hash nội dung, kèm thời điểm truy cập gần nhất để loại bỏ theo LRU.
+        SQLite cho phép nhiều tiến trình cùng đọc/ghi nên cache dùng được với ProcessPoolExecutor.
+        :param cache_dir: Thư mục chứa cache.
+        :param max_bytes: Dung lượng (đã nén) tối đa; vượt ngưỡng sẽ xóa các URL ít dùng nhất.
+        :param compress_level: Mức nén gzip (1-9).
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, 'index.sqlite'),
+            timeout=30,
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " digest TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_access ON pages(last_access)")
+        self._conn.commit()
+
+    def _object_path(self, digest):
+        return os.path.join(self.cache_dir, 'objects', digest[:2], digest + '.html.gz')
+
+    def __contains__(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM pages WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def get(self, url):
+        """Trả về HTML (str) đã cache cho URL gốc, hoặc None."""
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        try:
+            with gzip.open(self._object_path(row[0]), 'rb') as f:
+                return f.read().decode('utf-8')
+        except OSError:
+            # File đã bị xóa bởi tiến trình khác khi dọn cache
+            return None
+
+    def put(self, url, html):
+        """Lưu HTML của một URL. Hai URL có cùng nội dung dùng chung một object."""
+        if not html:
+            return None
+        data = html.encode('utf-8') if isinstance(html, str) else html
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+
+        with self._lock:
+            previous = self._conn.execute("SELECT digest FROM pages WHERE url = ?", (url,)).fetchone()
+            exists = self._conn.execute("SELECT 1 FROM objects WHERE digest = ?", (digest,)).fetchone()
+            if not exists:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with gzip.open(tmp_path, 'wb', compresslevel=self.compress_level) as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO objects VALUES (?, ?)", (digest, os.path.getsize(path))
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)", (url, digest, time.time())
+            )
+            if previous and previous[0] != digest:
+                self._drop_object_if_unused(previous[0])
+            self._conn.commit()
+        self.evict()
+        return digest
+
+    def _drop_object_if_unused(self, digest):
+        """Xóa object không còn URL nào trỏ tới. Gọi khi đang giữ self._lock. Trả về số byte giải phóng."""
+        if self._conn.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            return 0
+        row = self._conn.execute("SELECT size FROM objects WHERE digest = ?", (digest,)).fetchone()
+        self._conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+        try:
+            os.remove(self._object_path(digest))
+        except OSError:
+            pass
+        return row[0] if row else 0
+
+    def total_bytes(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def evict(self):
+        """Xóa các URL truy cập lâu nhất (LRU) cho tới khi dung lượng về dưới max_bytes."""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            removed = 0
+            rows = self._conn.execute("SELECT url, digest FROM pages ORDER BY last_access").fetchall()
+            for url, digest in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                total -= self._drop_object_if_unused(digest)
+                removed += 1
+            self._conn.commit()
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ===========================================================================================================================
+# Bóc tách offline từ cache
+# ===========================================================================================================================
+_worker_cache = None
+
+def _init_worker(cache_dir):
+    global _worker_cache
+    _worker_cache = HtmlCache(cache_dir, max_bytes=float('inf'))
+
+def _extract_one(url):
+    """(nội dung, lỗi) của một URL; lỗi parse chỉ ảnh hưởng bài đó, không làm dừng cả lượt bóc tách."""
+    from newspaper import Article
+
+    html = _worker_cache.get(url) if url else None
+    if html is None:
+        return None, None
+    try:
+        article = Article(url)
+        article.download(input_html=html)
+        article.parse()
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+    return article.text, None
+
+def extract_offline(urls, cache_dir=DEFAULT_CACHE_DIR, processes=None, chunksize=8):
+    """
+    Bóc tách lại nội dung bằng newspaper3k từ HTML đã cache, không truy cập mạng.
+    Chạy song song trên nhiều tiến trình (mỗi tiến trình mở kết nối cache riêng).
+    :param urls: Danh sách URL gốc (trường 'original_url' của bài viết).
+    :param processes: Số tiến trình, mặc định bằng số CPU.
+    :return: List nội dung theo đúng thứ tự urls; None với URL không có trong cache hoặc bóc tách lỗi.
+    """
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(cache_dir,)
+    ) as executor:
+        results = list(executor.map(_extract_one, urls, chunksize=chunksize))
+
+    texts = [text for text, _ in results]
+    errors = [(url, error) for url, (_, error) in zip(urls, results) if error is not None]
+    for url, error in errors[:5]:
+        print(f"⚠️ Lỗi bóc tách {url}: {error}")
+    hits = sum(text is not None for text in texts)
+    print(f"✅ Đã bóc tách offline {hits}/{len(texts)} bài từ cache HTML ({len(errors)} lỗi).")
+    return texts
@@ -1,13 +1,20 @@
 # https://news.google.com/home?hl=vi&gl=VN&ceid=VN:vi
 
+from __future__ import annotations
+
 import time
-from selenium import webdriver
-from selenium.common.exceptions import WebDriverException
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
+from typing import TYPE_CHECKING
+
+# selenium / bs4 / lxml / newspaper3k chỉ được import khi thực sự dùng tới,
+# để `import ingest_news` (vd. từ CLI hay CrawlScheduler) không tốn vài giây
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from bs4 import BeautifulSoup
 
-from bs4 import BeautifulSoup
-import pandas as pd
+try:
+    from . import metrics
+except ImportError:
+    import metrics
 
 # ===========================================================================================================================
 # Hyperparameter Configuration 
@@ -22,10 +29,14 @@ def load_driver() -> webdriver.Chrome | None:
     """
     Khởi tạo Chrome WebDriver ở chế độ cơ bản nhất để chạy local.
     """
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException
+
     options = webdriver.ChromeOptions()
     try:
         print("🚀 Đang khởi tạo Chrome WebDriver (chế độ cơ bản)...")
-        driver = webdriver.Chrome(options=options)
+        with metrics.timer('ingest.driver_start'):
+            driver = webdriver.Chrome(options=options)
         print("✅ WebDriver đã sẵn sàng.")
         return driver
         
@@ -55,6 +66,16 @@ SELECTORS = {
     "timestamp": "time.hvbAAd"
 }
 
+def _make_article(keyword: str, href: str, title: str, source: str | None, timestamp: str | None) -> dict:
+    """Dựng bản ghi bài viết theo đúng cấu trúc get_news() trả về."""
+    return {
+        'keyword': keyword,
+        'title': (title or "").strip(),
+        'source': source.strip() if source is not None else "N/A",
+        'timestamp': timestamp.strip() if timestamp is not None else "N/A",
+        'url': "https://news.google.com" + (href or "").lstrip('.')
+    }
+
 def _parse_page_source(soup: BeautifulSoup, seen_urls: set, keyword: str) -> list:
     """
     Hàm phụ trợ: Bóc tách dữ liệu từ soup và trả về các bài viết MỚI.
@@ -84,59 +105,313 @@ def _parse_page_source(soup: BeautifulSoup, seen_urls: set, keyword: str) -> lis
             })
     return new_results
 
+def _css_to_xpath(selector: str, descendant: bool = True) -> str:
+    """
+    Chuyển selector dạng 'tag.class' trong SELECTORS sang XPath để dùng với lxml
+    (tránh phụ thuộc thêm vào cssselect).
+    """
+    tag, _, cls = selector.partition('.')
+    axis = './/' if descendant else '//'
+    if not cls:
+        return f"{axis}{tag or '*'}"
+    return f"{axis}{tag or '*'}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+
+_XPATHS = {
+    "article_container": _css_to_xpath(SELECTORS["article_container"], descendant=False),
+    "link_and_title": _css_to_xpath(SELECTORS["link_and_title"]),
+    "source": _css_to_xpath(SELECTORS["source"]),
+    "timestamp": _css_to_xpath(SELECTORS["timestamp"]),
+}
+
+def _parse_page_source_lxml(html: str, seen_urls: set, keyword: str, start: int = 0) -> tuple[list, int]:
+    """
+    Bản bóc tách dùng parser C của lxml. Chỉ xét các node article từ vị trí `start` trở đi
+    (các node trước đó đã được xử lý ở lần cuộn trước).
+    :return: (danh sách bài viết MỚI, tổng số node article trong trang)
+    """
+    from lxml import html as lxml_html
 
+    tree = lxml_html.fromstring(html)
+    articles = tree.xpath(_XPATHS["article_container"])
+    new_results = []
+
+    for article in articles[start:]:
+        links = article.xpath(_XPATHS["link_and_title"])
+        if not links:
+            continue
+        sources = article.xpath(_XPATHS["source"])
+        times = article.xpath(_XPATHS["timestamp"])
+        item = _make_article(
+            keyword,
+            links[0].get('href', ''),
+            links[0].text_content(),
+            sources[0].text_content() if sources else None,
+            times[0].text_content() if times else None
+        )
+        if item['url'] not in seen_urls:
+            seen_urls.add(item['url'])
+            new_results.append(item)
+    return new_results, len(articles)
+
+# Trích xuất ngay trong trình duyệt: chỉ trả về các node article có chỉ số >= start,
+# không cần serialize lại toàn bộ page_source.
+_EXTRACT_NEW_ARTICLES_JS = """
+const [start, sel] = arguments;
+const nodes = document.querySelectorAll(sel.article_container);
+const rows = [];
+for (let i = start; i < nodes.length; i++) {
+    const link = nodes[i].querySelector(sel.link_and_title);
+    const source = nodes[i].querySelector(sel.source);
+    const time = nodes[i].querySelector(sel.timestamp);
+    rows.push(link ? [link.getAttribute('href') || '', link.textContent,
+                      source ? source.textContent : null, time ? time.textContent : null] : null);
+}
+return [nodes.length, rows];
+"""
+
+_COUNT_ARTICLES_JS = "return document.querySelectorAll(arguments[0]).length;"
+
+def _extract_new_articles(driver, start: int, seen_urls: set, keyword: str) -> tuple[list, int]:
+    """
+    Lấy các bài viết được thêm vào DOM kể từ node thứ `start`.
+    :return: (danh sách bài viết MỚI, tổng số node article hiện có)
+    """
+    total, rows = driver.execute_script(_EXTRACT_NEW_ARTICLES_JS, start, SELECTORS)
+    new_results = []
+    for row in rows:
+        if row is None:
+            continue
+        item = _make_article(keyword, *row)
+        if item['url'] not in seen_urls:
+            seen_urls.add(item['url'])
+            new_results.append(item)
+    return new_results, total
+
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+try:
+    from .url_resolver import GoogleNewsResolver, is_google_host
+    from .html_cache import HtmlCache
+except ImportError:
+    # Chạy trực tiếp bằng `python src/news_specialization/ingest_news.py`
+    from url_resolver import GoogleNewsResolver, is_google_host
+    from html_cache import HtmlCache
+
+def _wait_for_redirect(driver, url: str, timeout: float = 15) -> str:
+    """
+    Mở link Google News và chờ tới khi trình duyệt đã chuyển hướng sang trang gốc
+    (thay vì sleep cố định). Raise TimeoutException nếu hết thời gian chờ.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    driver.set_page_load_timeout(timeout)
+    with metrics.timer('ingest.page_load', page='redirect'):
+        try:
+            driver.get(url)
+        except TimeoutException:
+            # Trang gốc tải chậm nhưng URL có thể đã được chuyển hướng xong
+            pass
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+            # Trang consent.google.com cũng chỉ là trung gian: chờ tới khi rời hẳn *.google.com
+            lambda d: bool(urlparse(d.current_url).hostname) and not is_google_host(urlparse(d.current_url).hostname)
+        )
+    return driver.current_url
+
+def _resolve_original_url(url: str, get_driver, timeout: float = 15, resolver=None) -> str:
+    """
+    Tìm URL gốc của bài báo. Nếu có resolver thì thử giải link không cần trình duyệt trước,
+    chỉ gọi get_driver() để mở Selenium khi resolver thất bại.
+    """
+    def _selenium_fallback(link):
+        return _wait_for_redirect(get_driver(), link, timeout=timeout)
+
+    if resolver is None:
+        return _selenium_fallback(url)
+
+    original_url = resolver.resolve(url, fallback=_selenium_fallback)
+    if not original_url:
+        raise RuntimeError("Không giải được link gốc từ Google News.")
+    return original_url
+
+def _fetch_article_text(
+    url: str,
+    get_driver,
+    timeout: float = 15,
+    resolver=None,
+    html_cache=None
+) -> tuple[str, str]:
+    """
+    Giải link gốc rồi tải + bóc tách nội dung bằng newspaper3k.
+    Khác với get_article_details(), hàm này raise lỗi để nơi gọi tự xử lý.
+    :param get_driver: Hàm trả về WebDriver, chỉ được gọi khi cần fallback sang Selenium.
+    :param html_cache: HtmlCache (tùy chọn). HTML gốc được lấy từ cache nếu có, ngược lại tải về rồi lưu vào cache.
+    :return: (URL gốc, nội dung bài báo)
+    """
+    from newspaper import Article
+
+    with metrics.timer('ingest.resolve_url'):
+        original_url = _resolve_original_url(url, get_driver, timeout=timeout, resolver=resolver)
+    article = Article(original_url, request_timeout=timeout)
+    cached_html = html_cache.get(original_url) if html_cache is not None else None
+    if cached_html is not None:
+        metrics.count('ingest.html_cache', result='hit')
+        article.download(input_html=cached_html)
+    else:
+        metrics.count('ingest.html_cache', result='miss')
+        with metrics.timer('ingest.download') as download:
+            article.download()
+        metrics.log('article_downloaded', url=original_url, seconds=download.elapsed, bytes=len(article.html or ''))
+        if html_cache is not None and article.html:
+            html_cache.put(original_url, article.html)
+    with metrics.timer('ingest.parse'):
+        article.parse()
+    return original_url, article.text
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import time
-from newspaper import Article
 def get_article_details(
     url: str,
-    temp_driver
+    temp_driver,
+    timeout: float = 15,
+    resolver: GoogleNewsResolver | None = None,
+    html_cache: HtmlCache | None = None
 ) -> str:
     """
     Sử dụng newspaper3k để truy cập một URL và bóc tách nội dung chính.
+    Nếu truyền resolver, link gốc được giải không cần trình duyệt (temp_driver chỉ dùng khi fallback).
     """
-    # Trích xuất link gốc
-    def _get_original_url(
-        url
-    ):
-        temp_driver.get(url)
-        time.sleep(3) 
-        real_url = temp_driver.current_url
-        return real_url
-    
-    original_url = _get_original_url(url)
     try:
-        # Tải và phân tích bài báo
-        article = Article(original_url)
-        article.download()
-        article.parse()
         # Trả về toàn bộ nội dung text của bài báo
-        return article.text
+        _, text = _fetch_article_text(
+            url, lambda: temp_driver, timeout=timeout, resolver=resolver, html_cache=html_cache
+        )
+        return text
     except Exception as e:
         print(f"   -> Lỗi khi bóc tách url {url}: {e}")
         return "" # Trả về chuỗi rỗng nếu có lỗi
 
 
+def fetch_articles_details(
+    items: list,
+    max_workers: int = 4,
+    timeout: float = 15,
+    driver_factory=None,
+    resolver: GoogleNewsResolver | None = None,
+    html_cache: HtmlCache | None = None
+) -> list:
+    """
+    Tải nội dung chi tiết cho nhiều bài viết song song bằng một pool giới hạn số worker.
+    Mỗi worker giữ một WebDriver riêng (tạo lười lần đầu dùng) và đóng lại khi xong.
+
+    :param items: Danh sách bài viết (dict có key 'url') trả về từ get_news().
+    :param max_workers: Số worker (cũng là số Chrome chạy đồng thời).
+    :param timeout: Thời gian chờ tối đa (giây) cho mỗi URL: chuyển hướng và tải trang.
+    :param driver_factory: Hàm tạo driver, mặc định là load_driver.
+    :param resolver: GoogleNewsResolver dùng chung; khi có resolver, worker chỉ mở Chrome nếu phải fallback.
+    :param html_cache: HtmlCache dùng chung để lưu HTML gốc (phục vụ bóc tách lại offline).
+    :return: Chính danh sách items theo đúng thứ tự, mỗi bài được gán 'content', 'original_url'
+             và 'error' (None nếu thành công, ngược lại là thông báo lỗi).
+    """
+    driver_factory = driver_factory or load_driver
+    local = threading.local()
+    drivers = []
+    drivers_lock = threading.Lock()
+
+    def _get_driver():
+        driver = getattr(local, "driver", None)
+        if driver is None:
+            driver = driver_factory()
+            if driver is None:
+                raise RuntimeError("Không thể khởi tạo WebDriver cho worker.")
+            local.driver = driver
+            with drivers_lock:
+                drivers.append(driver)
+        return driver
+
+    def _work(item):
+        try:
+            item['original_url'], item['content'] = _fetch_article_text(
+                item['url'], _get_driver, timeout=timeout, resolver=resolver, html_cache=html_cache
+            )
+            item['error'] = None
+        except Exception as e:
+            item['content'] = ""
+            item['error'] = f"{type(e).__name__}: {e}"
+        metrics.count('ingest.articles', status='ok' if item['error'] is None else 'error')
+        return item
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # executor.map giữ nguyên thứ tự đầu vào
+            for idx, item in enumerate(executor.map(_work, items), start=1):
+                status = "OK" if item['error'] is None else f"LỖI ({item['error']})"
+                print(f"   -> [{idx}/{len(items)}] {item.get('title', '')[:60]}... {status}")
+    finally:
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    failures = [item for item in items if item.get('error')]
+    print(f"✅ Đã tải nội dung {len(items) - len(failures)}/{len(items)} bài viết.")
+    for item in failures:
+        print(f"   ❌ {item['url']}: {item['error']}")
+    return items
 
 
-def get_news(keyword: str, driver: webdriver.Chrome, topk: int = 50) -> list | None:
+
+
+def get_news(
+    keyword: str,
+    driver: webdriver.Chrome,
+    topk: int = 50,
+    harvest_mode: str = "incremental",
+    scroll_timeout: float = 5
+) -> list | None:
     """
     Hàm chính: Điều khiển trình duyệt, tìm kiếm, cuộn trang và gọi hàm phụ trợ để bóc tách.
+    :param harvest_mode: "incremental" - chỉ trích xuất các node article mới thêm sau mỗi lần cuộn
+                         (ngay trong trình duyệt) và chờ tới khi số bài tăng thay vì sleep cố định;
+                         "full" - cách cũ, parse lại toàn bộ page_source bằng html.parser mỗi lần cuộn.
+    :param scroll_timeout: Thời gian chờ tối đa (giây) để trang nạp thêm bài sau mỗi lần cuộn (chế độ incremental).
     """
+    from bs4 import BeautifulSoup
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
     if not driver:
         print("WebDriver không khả dụng.")
         return None
+    if harvest_mode not in ("incremental", "full"):
+        raise ValueError(f"harvest_mode không hợp lệ: {harvest_mode}")
     
     try:
         print(f"Bắt đầu quá trình lấy ÍT NHẤT {topk} tin cho từ khóa: '{keyword}'")
-        driver.get(MAIN_URL)
+        with metrics.timer('ingest.page_load', page='search'):
+            driver.get(MAIN_URL)
         
         search_box = driver.find_element(By.CSS_SELECTOR, SELECTORS["search_box"])
         search_box.click()
         search_box.send_keys(keyword + Keys.RETURN)
-        time.sleep(3)
+        if harvest_mode == "incremental":
+            try:
+                with metrics.timer('ingest.results_wait'):
+                    WebDriverWait(driver, 10, poll_frequency=0.2).until(
+                        lambda d: d.execute_script(_COUNT_ARTICLES_JS, SELECTORS["article_container"]) > 0
+                    )
+            except TimeoutException:
+                # Không có kết quả cho từ khóa: crawl vẫn thành công (trả về [] thay vì None để không bị thử lại mãi)
+                print(f"-> Không có kết quả tìm kiếm cho từ khóa '{keyword}'.")
+                metrics.log('search_done', keyword=keyword, results=0, mode=harvest_mode)
+                return []
+        else:
+            with metrics.timer('ingest.sleep'):
+                time.sleep(3)
         print("-> Tìm kiếm thành công.")
 
         print("-> Bắt đầu cuộn trang linh hoạt...")
@@ -144,10 +419,16 @@ def get_news(keyword: str, driver: webdriver.Chrome, topk: int = 50) -> list | N
         seen_urls = set()
         patience = 3
         stalls = 0
+        harvested_nodes = 0
 
         while True:
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            newly_found_articles = _parse_page_source(soup, seen_urls, keyword)
+            if harvest_mode == "incremental":
+                newly_found_articles, harvested_nodes = _extract_new_articles(
+                    driver, harvested_nodes, seen_urls, keyword
+                )
+            else:
+                soup = BeautifulSoup(driver.page_source, 'html.parser')
+                newly_found_articles = _parse_page_source(soup, seen_urls, keyword)
 
             if newly_found_articles:
                 all_results.extend(newly_found_articles)
@@ -157,12 +438,26 @@ def get_news(keyword: str, driver: webdriver.Chrome, topk: int = 50) -> list | N
                 print(f"   -> Đã đạt hoặc vượt mức tối thiểu {topk} bài viết. Dừng cuộn.")
                 break
 
-            last_height = driver.execute_script("return document.body.scrollHeight")
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3.5)
-            new_height = driver.execute_script("return document.body.scrollHeight")
-
-            if new_height == last_height:
+            if harvest_mode == "incremental":
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                try:
+                    # Chờ tới khi trang nạp thêm node article, tối đa scroll_timeout giây
+                    with metrics.timer('ingest.scroll_wait'):
+                        WebDriverWait(driver, scroll_timeout, poll_frequency=0.2).until(
+                            lambda d: d.execute_script(_COUNT_ARTICLES_JS, SELECTORS["article_container"]) > harvested_nodes
+                        )
+                    grew = True
+                except TimeoutException:
+                    grew = False
+            else:
+                last_height = driver.execute_script("return document.body.scrollHeight")
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                with metrics.timer('ingest.sleep'):
+                    time.sleep(3.5)
+                new_height = driver.execute_script("return document.body.scrollHeight")
+                grew = new_height != last_height
+
+            if not grew:
                 stalls += 1
                 if stalls >= patience:
                     print(f"   -> Đã cuộn đến cuối trang. Dừng lại.")
@@ -171,11 +466,59 @@ def get_news(keyword: str, driver: webdriver.Chrome, topk: int = 50) -> list | N
                 stalls = 0
 
         print(f"✅ Quá trình hoàn tất. Thu được {len(all_results)} bài viết.")
+        metrics.count('ingest.search_results', len(all_results))
+        metrics.log('search_done', keyword=keyword, results=len(all_results), mode=harvest_mode)
         return all_results
 
     except Exception as e:
         print(f"❌ Đã xảy ra lỗi trong hàm get_news: {e}")
         return None
+
+
+def save_page_snapshot(driver: webdriver.Chrome, output_path: str) -> None:
+    """Lưu page_source hiện tại ra file HTML (dùng làm dữ liệu cho benchmark_harvest)."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(driver.page_source)
+
+
+def benchmark_harvest(snapshot_paths: list, keyword: str = "benchmark", repeat: int = 3) -> dict:
+    """
+    Đo thời gian bóc tách trên các snapshot HTML đã lưu (theo thứ tự các lần cuộn).
+    So sánh cách cũ (html.parser, parse lại mọi bài mỗi lần cuộn) với lxml chỉ xét các node mới.
+    :return: dict {tên chế độ: mili-giây trên 100 bài viết}
+    """
+    from bs4 import BeautifulSoup
+
+    pages = []
+    for path in snapshot_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+
+    def _run_full():
+        seen, found = set(), 0
+        for page in pages:
+            found += len(_parse_page_source(BeautifulSoup(page, 'html.parser'), seen, keyword))
+        return found
+
+    def _run_lxml_incremental():
+        seen, found, start = set(), 0, 0
+        for page in pages:
+            new_items, start = _parse_page_source_lxml(page, seen, keyword, start=start)
+            found += len(new_items)
+        return found
+
+    report = {}
+    for name, runner in (("full_html_parser", _run_full), ("lxml_incremental", _run_lxml_incremental)):
+        best = float('inf')
+        found = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            found = runner()
+            best = min(best, time.perf_counter() - started)
+        report[name] = best * 1000 * 100 / max(found, 1)
+        print(f"⏱️ {name}: {found} bài, {report[name]:.1f} ms / 100 bài")
+    return report
     
 
 
@@ -217,44 +560,61 @@ def save(result, keyword):
 # ===========================================================================================================================
 # Main Execution
 # ===========================================================================================================================
-def main():
+def main(
+    max_workers: int = 4,
+    timeout: float = 15,
+    num_drivers: int = 2,
+    keywords: list | None = None,
+    export_dir: str | None = None
+):
     # INPUT
-    keywords = ["Credit Suisse"] 
+    keywords = keywords or ["Credit Suisse"]
 
     # SELF-CONFIGURATION 
-    driver = load_driver()
-    temp_driver = load_driver()
-
-    if not driver:
-        print("Không thể khởi tạo driver. Dừng chương trình.")
-        return
-    if not temp_driver:
-        print("Không thể khởi tạo driver. Dừng chương trình.")
-        return
+    try:
+        from .crawl_scheduler import CrawlScheduler
+        from .news_store import NewsStore
+    except ImportError:
+        from crawl_scheduler import CrawlScheduler
+        from news_store import NewsStore
+
+    scheduler = CrawlScheduler(keywords, num_drivers=num_drivers)
+    resolver = GoogleNewsResolver()
+    store = NewsStore()
+    html_cache = HtmlCache()
     
     # START EXECUTING TASK
     try:
-        for keyword in keywords:
-            result = get_news(keyword, driver)
-            if result:
-                print(f"\n--- Bắt đầu lấy nội dung chi tiết cho {len(result)} bài viết về '{keyword}' ---")
-
-                for item in result:
-                    print(f"-> Đang xử lý: {item['title'][:60]}...")
-                    item['content'] = get_article_details(
-                        item['url'],
-                        temp_driver = temp_driver
-                    )
-                
-                save(result, keyword)
-            else:
+        # Crawl các từ khóa song song, dedup URL giữa các từ khóa và chỉ tải nội dung các bài chưa có trong kho
+        grouped = scheduler.run(
+            max_workers=max_workers,
+            timeout=timeout,
+            resolver=resolver,
+            store=store,
+            html_cache=html_cache
+        )
+
+        for keyword, result in grouped.items():
+            if not result:
                 print(f"Không tìm thấy bài viết nào cho từ khóa '{keyword}'.")
 
+        if scheduler.details_done:
+            scheduler.clear_checkpoint()
+        print(f"✅ Kho tin tức hiện có {len(store)} bài viết tại '{store.root}'.")
+
+        # Chỉ xuất khi được yêu cầu: export đọc lại toàn bộ kho (chi phí theo tổng số bài, không theo số bài mới),
+        # và không ghi đè corpus bronze đã commit (data/bronze/news) bằng tập con trong kho
+        if export_dir:
+            for keyword in keywords:
+                filename = f"news_{keyword.replace(' ', '_').lower()}.json"
+                store.export_json(os.path.join(export_dir, filename), keyword=keyword)
+
     finally:
-        if driver:
-            driver.quit()
-            print("\nĐã đóng WebDriver.")
+        print(f"📊 Thống kê giải link gốc: {resolver.stats}")
+        resolver.close()
+        html_cache.close()
         
     
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import unicodedata
+from collections import deque, defaultdict
+
+
+def normalize_for_matching(text):
+    """Chuẩn hóa văn bản trước khi so khớp: NFC + casefold (rồi NFC lại vì casefold có thể tách dấu)."""
+    if not isinstance(text, str):
+        text = '' if text is None else str(text)
+    return unicodedata.normalize('NFC', unicodedata.normalize('NFC', text).casefold())
+
+
+class AhoCorasick:
+    def __init__(self, terms):
+        """
+        Automaton Aho-Corasick: tìm mọi từ khóa trong danh sách chỉ với một lần quét văn bản.
+        :param terms: Danh sách từ khóa (được chuẩn hóa NFC + casefold trước khi dựng automaton).
+        """
+        self.terms = list(dict.fromkeys(t for t in terms if t and str(t).strip()))
+        self._goto = [{}]       # node -> {ký tự: node con}
+        self._fail = [0]
+        self._output = [[]]     # node -> chỉ số các term kết thúc tại node (kể cả qua fail link)
+
+        for term_id, term in enumerate(self.terms):
+            node = 0
+            for char in normalize_for_matching(term):
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = nxt
+            self._output[node].append(term_id)
+
+        # BFS dựng fail link
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def count(self, text, normalized=False):
+        """
+        Đếm số lần xuất hiện (kể cả chồng lấn) của từng từ khóa trong văn bản.
+        :return: dict {từ khóa gốc: số lần xuất hiện}, chỉ gồm các từ khóa có mặt.
+        """
+        if not normalized:
+            text = normalize_for_matching(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        counts = defaultdict(int)
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for term_id in output[node]:
+                counts[term_id] += 1
+        return {self.terms[term_id]: n for term_id, n in counts.items()}
+
+
+class RelevanceIndex:
+    def __init__(self, terms):
+        """
+        Chỉ mục ngược: từ khóa -> {id bài viết: số lần xuất hiện}.
+        Mỗi bài chỉ được quét một lần khi thêm vào; các lần lọc sau là tra cứu, không quét lại văn bản.
+        :param terms: Danh sách từ khóa theo dõi (watchlist).
+        """
+        self.matcher = AhoCorasick(terms)
+        self.postings = {term: {} for term in self.matcher.terms}
+        self._lookup_key = {normalize_for_matching(term): term for term in self.matcher.terms}
+
+    @property
+    def terms(self):
+        return self.matcher.terms
+
+    def add(self, doc_id, *texts):
+        """
+        Quét (một lần) các trường văn bản của một bài và ghi vào chỉ mục.
+        :return: dict {từ khóa: số lần xuất hiện} của bài.
+        """
+        # Ký tự \x00 ngăn một từ khóa khớp xuyên qua ranh giới giữa các trường (vd. title | content)
+        joined = '\x00'.join(normalize_for_matching(t) for t in texts)
+        hits = self.matcher.count(joined, normalized=True)
+        for term, n in hits.items():
+            self.postings[term][doc_id] = n
+        return hits
+
+    def has_term(self, term):
+        return normalize_for_matching(term) in self._lookup_key
+
+    def lookup(self, term):
+        """Các id bài viết chứa từ khóa (theo thứ tự thêm vào chỉ mục)."""
+        key = self._lookup_key.get(normalize_for_matching(term))
+        if key is None:
+            raise KeyError(f"Từ khóa '{term}' không có trong watchlist của chỉ mục.")
+        return list(self.postings[key])
+
+    def lookup_any(self, terms):
+        """Các id bài viết chứa ít nhất một trong các từ khóa."""
+        doc_ids = {}
+        for term in terms:
+            for doc_id in self.lookup(term):
+                doc_ids[doc_id] = True
+        return list(doc_ids)
@@ -0,0 +1,304 @@
+"""
+Đo đạc hiệu năng cho pipeline tin tức: timer, counter, phân phối giá trị và log có cấu trúc (JSON lines).
+Mặc định TẮT: mọi hàm chỉ kiểm tra một biến toàn cục rồi trả về ngay (timer() trả về một context manager rỗng dùng chung),
+nên có thể đặt trên hot path mà gần như không tốn chi phí.
+
+Bật bằng code:
+    from src.news_specialization import metrics
+    metrics.enable('data/metrics')
+    ...
+    metrics.export()        # data/metrics/<run_id>.json + <run_id>.prom (Prometheus text format)
+
+hoặc bằng biến môi trường NEWS_METRICS_DIR (tự export khi tiến trình kết thúc),
+hoặc bằng cờ `--metrics DIR` của CLI.
+"""
+import os
+import re
+import json
+import time
+import random
+import atexit
+import threading
+import functools
+import multiprocessing
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+DEFAULT_METRICS_DIR = os.path.join('data', 'metrics')
+ENV_METRICS_DIR = 'NEWS_METRICS_DIR'
+PROMETHEUS_PREFIX = 'news'
+QUANTILES = (0.5, 0.9, 0.99)
+MAX_SAMPLES = 10000         # số mẫu giữ lại cho mỗi phân phối (reservoir sampling) để tính percentile
+_NAME_PATTERN = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def _series_key(name, labels):
+    # Giá trị nhãn luôn là str (như Prometheus): status=429 và status='APIConnectionError' vẫn sắp xếp được cùng nhau
+    return name, tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+class _Distribution:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.samples = []
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = value
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        quantiles = {
+            f'p{int(q * 100)}': ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+            for q in QUANTILES
+        }
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            **quantiles,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self, output_dir=DEFAULT_METRICS_DIR, run_id=None):
+        """
+        Nơi gom số liệu của một lần chạy (an toàn khi dùng từ nhiều thread).
+        :param output_dir: Thư mục ghi báo cáo JSON, file Prometheus và log có cấu trúc.
+        :param run_id: Tên lần chạy (mặc định theo thời gian bắt đầu).
+        """
+        self.output_dir = output_dir
+        self.run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+        self.started = time.time()
+        self.counters = {}
+        self.distributions = {}
+        self._lock = threading.Lock()
+        self._log_file = None
+
+    def count(self, name, value=1, **labels):
+        key = _series_key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _series_key(name, labels)
+        with self._lock:
+            distribution = self.distributions.get(key)
+            if distribution is None:
+                distribution = self.distributions[key] = _Distribution()
+            distribution.add(value)
+
+    def log(self, event, **fields):
+        record = {'ts': round(time.time(), 6), 'run_id': self.run_id, 'event': event, **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            if self._log_file is None:
+                os.makedirs(self.output_dir, exist_ok=True)
+                self._log_file = open(os.path.join(self.output_dir, f'{self.run_id}.log.jsonl'), 'a', encoding='utf-8')
+            self._log_file.write(line)
+            self._log_file.flush()
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Báo cáo
+    # ---------------------------------------------------------------------------------------------------------------------
+    def report(self):
+        """Dict tổng hợp: counter và phân phối (count / sum / mean / min / max / p50 / p90 / p99) theo tên + nhãn."""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            distributions = [
+                {'name': name, 'labels': dict(labels), **distribution.summary()}
+                for (name, labels), distribution in sorted(self.distributions.items())
+            ]
+        return {
+            'run_id': self.run_id,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'elapsed_seconds': time.time() - self.started,
+            'counters': counters,
+            'distributions': distributions,
+        }
+
+    def prometheus(self, report=None):
+        """Báo cáo dạng Prometheus text exposition format (counter -> *_total, phân phối -> summary)."""
+        report = report or self.report()
+
+        def metric_name(name):
+            return f"{PROMETHEUS_PREFIX}_{_NAME_PATTERN.sub('_', name)}"
+
+        def label_text(labels, **extra):
+            items = {**labels, **extra}
+            if not items:
+                return ''
+            escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in items.values())
+            return '{' + ','.join(f'{_NAME_PATTERN.sub("_", k)}="{v}"' for k, v in zip(items, escaped)) + '}'
+
+        lines = []
+        declared = set()
+        for counter in report['counters']:
+            name = metric_name(counter['name']) + '_total'
+            if name not in declared:
+                lines.append(f'# TYPE {name} counter')
+                declared.add(name)
+            lines.append(f"{name}{label_text(counter['labels'])} {counter['value']}")
+        for distribution in report['distributions']:
+            name = metric_name(distribution['name'])
+            if name not in declared:
+                lines.append(f'# TYPE {name} summary')
+                declared.add(name)
+            for q in QUANTILES:
+                value = distribution[f'p{int(q * 100)}']
+                if value is not None:
+                    lines.append(f"{name}{label_text(distribution['labels'], quantile=q)} {value}")
+            lines.append(f"{name}_sum{label_text(distribution['labels'])} {distribution['sum']}")
+            lines.append(f"{name}_count{label_text(distribution['labels'])} {distribution['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        """Ghi <run_id>.json và <run_id>.prom vào output_dir (ghi file tạm rồi os.replace). Trả về hai đường dẫn."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        report = self.report()
+        paths = []
+        for suffix, content in (
+            ('json', json.dumps(report, ensure_ascii=False, indent=2)),
+            ('prom', self.prometheus(report)),
+        ):
+            path = os.path.join(self.output_dir, f'{self.run_id}.{suffix}')
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            paths.append(path)
+        print(f"📊 Đã ghi báo cáo hiệu năng -> {paths[0]}, {paths[1]}")
+        return paths
+
+    def close(self):
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+
+
+# ===========================================================================================================================
+# API cấp module (no-op khi chưa bật)
+# ===========================================================================================================================
+_registry = None
+
+
+class _NullTimer:
+    elapsed = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.elapsed = time.perf_counter() - self._started
+        self.registry.observe(self.name + '.seconds', self.elapsed, **self.labels)
+        if exc_type is not None:
+            self.registry.count(self.name + '.errors', **self.labels)
+        return False
+
+
+def enabled():
+    return _registry is not None
+
+
+def enable(output_dir=DEFAULT_METRICS_DIR, run_id=None):
+    """Bật đo đạc cho tiến trình hiện tại; trả về MetricsRegistry."""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry(output_dir, run_id)
+    return _registry
+
+
+def disable():
+    global _registry
+    if _registry is not None:
+        _registry.close()
+    _registry = None
+
+
+def registry():
+    return _registry
+
+
+def timer(name, **labels):
+    """`with metrics.timer('analyze.request'): ...` -> phân phối '<name>.seconds' (và counter '<name>.errors' nếu lỗi)."""
+    if _registry is None:
+        return _NULL_TIMER
+    return _Timer(_registry, name, labels)
+
+
+def timed(name, **labels):
+    """Decorator tương đương `with timer(name)` quanh toàn bộ hàm."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _registry is None:
+                return fn(*args, **kwargs)
+            with _Timer(_registry, name, labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1, **labels):
+    if _registry is not None:
+        _registry.count(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    if _registry is not None:
+        _registry.observe(name, value, **labels)
+
+
+def log(event, **fields):
+    """Ghi một sự kiện có cấu trúc vào <run_id>.log.jsonl."""
+    if _registry is not None:
+        _registry.log(event, **fields)
+
+
+def export():
+    """Ghi báo cáo của lần chạy hiện tại (không làm gì nếu chưa bật)."""
+    if _registry is None:
+        return None
+    return _registry.export()
+
+
+# Chỉ tiến trình chính tự bật qua biến môi trường; tiến trình con (ProcessPoolExecutor, spawn) không ghi báo cáo riêng
+if os.environ.get(ENV_METRICS_DIR) and multiprocessing.parent_process() is None:
+    enable(os.environ[ENV_METRICS_DIR])
+    atexit.register(export)
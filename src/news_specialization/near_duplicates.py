@@ -0,0 +1,127 @@
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+_EMPTY_HASH = np.uint64(1 << 32)        # lớn hơn mọi giá trị băm 32-bit -> đánh dấu văn bản rỗng
+_SHINGLE_BASE = np.uint64(1_000_003)    # cơ số của hàm băm đa thức cho k-gram
+
+
+def _optimal_bands(threshold, num_perm):
+    """
+    Chọn số band b (và số hàng r = num_perm // b) sao cho ngưỡng LSH (1/b)^(1/r)
+    gần với ngưỡng Jaccard mong muốn nhất.
+    """
+    best, best_gap = (1, num_perm), float('inf')
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        gap = abs((1 / bands) ** (1 / rows) - threshold)
+        if gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best
+
+
+class MinHashLSH:
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=5, seed=42):
+        """
+        Phát hiện bài viết gần trùng lặp bằng MinHash + LSH banding.
+        :param threshold: Ngưỡng độ tương đồng Jaccard (trên tập shingle) để coi hai bài là trùng.
+        :param num_perm: Số hàm băm MinHash (độ dài chữ ký).
+        :param shingle_size: Số từ trong một shingle.
+        :param seed: Seed sinh các hệ số hoán vị.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold phải nằm trong khoảng (0, 1].")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _optimal_bands(threshold, num_perm)
+
+        rng = np.random.default_rng(seed)
+        # Họ hàm băm multiply-shift: h(x) = ((a * x + b) mod 2^64) >> 32, với a lẻ
+        self._a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self._word_hashes = {}
+
+    def _hash_word(self, word):
+        value = self._word_hashes.get(word)
+        if value is None:
+            value = zlib.crc32(word.encode('utf-8'))
+            self._word_hashes[word] = value
+        return value
+
+    def shingles(self, text):
+        """Băm các shingle k-từ (chữ thường) của văn bản thành mảng uint64 (giá trị 32-bit, đã bỏ trùng)."""
+        words = text.lower().split() if isinstance(text, str) else []
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+        word_ids = np.fromiter((self._hash_word(w) for w in words), dtype=np.uint64, count=len(words))
+        k = min(self.shingle_size, len(words))
+
+        # Hàm băm đa thức của từng cửa sổ k từ, tính vector hóa (tràn số uint64 là chủ ý)
+        n_grams = len(words) - k + 1
+        grams = np.zeros(n_grams, dtype=np.uint64)
+        for offset in range(k):
+            grams = grams * _SHINGLE_BASE + word_ids[offset:offset + n_grams]
+        return np.unique(grams & np.uint64(0xFFFFFFFF))
+
+    def signature(self, text):
+        """Chữ ký MinHash (num_perm giá trị) của một văn bản."""
+        hashed = self.shingles(text)
+        if hashed.size == 0:
+            return np.full(self.num_perm, _EMPTY_HASH, dtype=np.uint64)
+        # Băm mọi shingle bằng num_perm hàm rồi lấy min theo shingle
+        values = (np.outer(self._a, hashed) + self._b[:, None]) >> np.uint64(32)
+        return values.min(axis=1)
+
+    def cluster(self, texts):
+        """
+        Gom các văn bản gần trùng lặp thành cụm.
+        Chỉ các cặp rơi vào cùng một bucket ở ít nhất một band mới được so sánh,
+        nên thời gian chạy gần tuyến tính theo số văn bản.
+        :return: List các cụm (list chỉ số, tăng dần); phần tử đầu tiên là đại diện (bài xuất hiện trước).
+                 Chỉ trả về các cụm có từ 2 phần tử trở lên.
+        """
+        texts = list(texts)
+        n = len(texts)
+        if n == 0:
+            return []
+        signatures = np.vstack([self.signature(text) for text in texts])
+        empty = (signatures == _EMPTY_HASH).all(axis=1)
+
+        parent = list(range(n))
+
+        def _find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        checked = set()
+        for band in range(self.bands):
+            band_rows = signatures[:, band * self.rows:(band + 1) * self.rows]
+            buckets = defaultdict(list)
+            for idx in np.flatnonzero(~empty):
+                buckets[band_rows[idx].tobytes()].append(idx)
+
+            for members in buckets.values():
+                for pos, first in enumerate(members):
+                    for second in members[pos + 1:]:
+                        root_first, root_second = _find(first), _find(second)
+                        if root_first == root_second or (first, second) in checked:
+                            continue
+                        checked.add((first, second))
+                        # Xác nhận lại bằng độ tương đồng ước lượng trên toàn bộ chữ ký
+                        similarity = np.mean(signatures[first] == signatures[second])
+                        if similarity >= self.threshold:
+                            parent[max(root_first, root_second)] = min(root_first, root_second)
+
+        clusters = defaultdict(list)
+        for idx in range(n):
+            clusters[_find(idx)].append(idx)
+        return [members for members in clusters.values() if len(members) > 1]
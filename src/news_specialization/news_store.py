@@ -0,0 +1,210 @@
+import os
+import json
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+DEFAULT_STORE_DIR = os.path.join('data', 'news_store')
+INDEX_FILENAME = 'index.txt'
+# Từ khóa phát hiện thêm cho bài đã có trong kho (mỗi dòng: {"key": url_key, "keywords": [...]}, chỉ ghi thêm)
+KEYWORDS_FILENAME = 'keywords.jsonl'
+SEGMENT_PATTERN = 'segment-{:05d}.jsonl'
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+def url_key(url):
+    """
+    Khóa của một bài viết: SHA-1 của URL đã chuẩn hóa.
+    Với link Google News, phần query (?hl=vi&gl=VN...) chỉ là tham số ngôn ngữ nên được bỏ đi.
+    """
+    parts = urlsplit(url.strip())
+    if parts.netloc == 'news.google.com':
+        parts = parts._replace(query='', fragment='')
+    else:
+        parts = parts._replace(fragment='')
+    return hashlib.sha1(urlunsplit(parts).encode('utf-8')).hexdigest()
+
+
+class NewsStore:
+    def __init__(self, root=DEFAULT_STORE_DIR, max_segment_bytes=MAX_SEGMENT_BYTES):
+        """
+        Kho tin tức chỉ-ghi-thêm (append-only): các bài viết nằm trong những segment JSONL,
+        kèm một file index chứa hash URL của mọi bài đã lưu.
+        Bài đã lưu không bị ghi lại: từ khóa tìm thấy về sau được ghi thêm vào keywords.jsonl và gộp vào khi đọc.
+        Mở kho chỉ đọc file index và file từ khóa (không đọc nội dung bài) nên chi phí không phụ thuộc dung lượng bài viết.
+        :param root: Thư mục chứa kho.
+        :param max_segment_bytes: Kích thước tối đa của một segment trước khi mở segment mới.
+        """
+        self.root = root
+        self.max_segment_bytes = max_segment_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+        self._index_path = os.path.join(self.root, INDEX_FILENAME)
+        self._keys = set()
+        if os.path.exists(self._index_path):
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                self._keys = {line.strip() for line in f if line.strip()}
+        self._keywords_path = os.path.join(self.root, KEYWORDS_FILENAME)
+        self._extra_keywords = self._load_keywords()
+
+        segments = self.segments()
+        self._segment_no = len(segments) - 1 if segments else 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, url):
+        return url_key(url) in self._keys
+
+    def segments(self):
+        """Danh sách đường dẫn các segment theo thứ tự ghi."""
+        names = sorted(n for n in os.listdir(self.root) if n.startswith('segment-') and n.endswith('.jsonl'))
+        return [os.path.join(self.root, n) for n in names]
+
+    def _load_keywords(self):
+        """{url_key: [từ khóa]} từ keywords.jsonl."""
+        extra = {}
+        if not os.path.exists(self._keywords_path):
+            return extra
+        with open(self._keywords_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Dòng cuối bị cắt dở do tiến trình bị ngắt khi đang ghi
+                    continue
+                known = extra.setdefault(record['key'], [])
+                known.extend(k for k in record['keywords'] if k not in known)
+        return extra
+
+    def filter_new(self, items):
+        """
+        Giữ lại các bài có URL chưa nằm trong kho (kiểm tra trước khi gọi get_article_details).
+        Với bài đã có, các từ khóa mới trong 'keywords' được ghi nhận để load_all(keyword=...) vẫn tìm thấy bài.
+        """
+        new_items, known = [], []
+        for item in items:
+            if not item.get('url'):
+                continue
+            (known if item['url'] in self else new_items).append(item)
+        self.merge_keywords(known)
+        return new_items
+
+    def merge_keywords(self, items):
+        """
+        Ghi thêm (append-only) các từ khóa của những bài đã có trong kho mà kho chưa biết.
+        :return: Số bài được cập nhật từ khóa.
+        """
+        with self._lock:
+            records = []
+            for item in items:
+                keywords = item.get('keywords') or ([item['keyword']] if item.get('keyword') else [])
+                key = url_key(item['url'])
+                if key not in self._keys or not keywords:
+                    continue
+                known = self._extra_keywords.setdefault(key, [])
+                added = [k for k in keywords if k not in known]
+                if added:
+                    known.extend(added)
+                    records.append({'key': key, 'keywords': added})
+            if records:
+                with open(self._keywords_path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+                    f.flush()
+                    os.fsync(f.fileno())
+        return len(records)
+
+    def _current_segment(self):
+        path = os.path.join(self.root, SEGMENT_PATTERN.format(self._segment_no))
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_segment_bytes:
+            self._segment_no += 1
+            path = os.path.join(self.root, SEGMENT_PATTERN.format(self._segment_no))
+        return path
+
+    def append(self, items):
+        """
+        Ghi thêm các bài chưa có vào cuối segment hiện tại và cập nhật index.
+        Bài viết được ghi trước, index ghi sau: nếu bị ngắt giữa chừng, lần chạy sau chỉ tải lại bài đó.
+        :return: Số bài thực sự được ghi.
+        """
+        items = list(items)
+        self.merge_keywords(items)
+        with self._lock:
+            new_items, new_keys = [], []
+            for item in items:
+                key = url_key(item['url'])
+                if key in self._keys or key in new_keys:
+                    continue
+                new_items.append(item)
+                new_keys.append(key)
+            if not new_items:
+                return 0
+
+            with open(self._current_segment(), 'a', encoding='utf-8') as f:
+                for item in new_items:
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._index_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(key + '\n' for key in new_keys))
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._keys.update(new_keys)
+        print(f"💾 Đã ghi thêm {len(new_items)} bài viết mới vào kho '{self.root}' (tổng: {len(self._keys)}).")
+        return len(new_items)
+
+    def iter_articles(self, keyword=None):
+        """
+        Duyệt lần lượt mọi bài viết trong kho (lười, không load toàn bộ vào bộ nhớ).
+        'keywords' của mỗi bài đã gộp các từ khóa ghi nhận sau khi bài được lưu.
+        """
+        with self._lock:
+            extra = {key: list(keywords) for key, keywords in self._extra_keywords.items()}
+        for path in self.segments():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        # Dòng cuối bị cắt dở do tiến trình bị ngắt khi đang ghi
+                        continue
+                    keywords = list(item.get('keywords') or ([item['keyword']] if item.get('keyword') else []))
+                    for k in extra.get(url_key(item['url']), ()) if item.get('url') else ():
+                        if k not in keywords:
+                            keywords.append(k)
+                    if keywords:
+                        item['keywords'] = keywords
+                    if keyword is None or keyword in keywords:
+                        yield item
+
+    def load_all(self, keyword=None):
+        """Trả về list bài viết (định dạng giống file news_<keyword>.json) để đưa vào NewsPreprocessor."""
+        return list(self.iter_articles(keyword))
+
+    def export_json(self, path, keyword=None):
+        """
+        Xuất các bài (của một từ khóa, hoặc toàn kho) ra file JSON mảng như news_<keyword>.json cũ,
+        đầu vào của `preprocess`. Ghi từng bài một (file tạm rồi os.replace) nên không cần load cả kho.
+        :return: Số bài đã xuất.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for item in self.iter_articles(keyword):
+                f.write(',\n' if count else '\n')
+                f.write(json.dumps(item, ensure_ascii=False, indent=2))
+                count += 1
+            f.write('\n]\n' if count else ']\n')
+        os.replace(tmp_path, path)
+        print(f"✅ Đã xuất {count} bài viết{f' (từ khóa {keyword!r})' if keyword else ''} -> '{path}'")
+        return count
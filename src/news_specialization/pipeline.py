@@ -0,0 +1,541 @@
+import os
+import json
+import time
+import queue
+import threading
+
+try:
+    from .response_cache import ResponseCache, make_cache_key
+    from . import metrics
+except ImportError:
+    from response_cache import ResponseCache, make_cache_key
+    import metrics
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+DEFAULT_PIPELINE_CACHE_PATH = os.path.join('data', 'cache', 'pipeline_cache.sqlite')
+QUEUE_SIZE = 64             # số bài tối đa chờ giữa hai stage (backpressure: stage nhanh phải đợi stage chậm)
+BATCH_WINDOW = 0.05         # giây chờ gom thêm bài cho stage xử lý theo lô
+POLL_INTERVAL = 0.1         # chu kỳ kiểm tra tín hiệu dừng khi đang chờ queue
+AGGREGATE_EVERY = 50        # số bài đã phân tích trước mỗi lần cập nhật news00.csv
+
+_DONE = object()
+
+
+class Stage:
+    def __init__(
+        self,
+        name,
+        fn,
+        workers=1,
+        batch_size=1,
+        key=None,
+        accept=None,
+        cacheable=None,
+        expand=False,
+        version='1'
+    ):
+        """
+        Một bước của pipeline.
+        :param fn: expand=False: nhận list bài, trả về list cùng độ dài gồm dict các trường cần thêm vào bài
+                   (hoặc None để bỏ bài); expand=True: nhận một phần tử, trả về iterable các bài mới (vd. từ khóa -> bài).
+        :param workers: Số thread chạy fn song song (I/O: nhiều; CPU / GPU nặng như ViT5: 1).
+        :param batch_size: Số bài tối đa mỗi lần gọi fn (gom trong BATCH_WINDOW).
+        :param key: Hàm bài -> văn bản đầu vào của stage; nếu có, kết quả được memo theo hash của văn bản này.
+        :param accept: Hàm bài (đã cập nhật) -> bool; bài không đạt bị bỏ, kể cả khi lấy từ memo.
+        :param cacheable: Hàm kết quả -> bool; mặc định không memo kết quả có trường 'error'.
+        :param version: Đổi khi logic của stage đổi để memo cũ không còn được dùng.
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.key = key
+        self.accept = accept
+        self.cacheable = cacheable or (lambda update: not update.get('error'))
+        self.expand = expand
+        self.version = version
+
+
+class StreamingPipeline:
+    def __init__(self, stages, cache=None, queue_size=QUEUE_SIZE, batch_window=BATCH_WINDOW):
+        """
+        Nối các Stage bằng queue có giới hạn; mỗi stage chạy trên pool thread riêng nên bài đi qua từng bước
+        ngay khi bước trước xong (vd. làm sạch / tóm tắt / phân tích chạy trong lúc vẫn đang crawl).
+        Thứ tự bài ở đầu ra là thứ tự hoàn thành, không phải thứ tự đầu vào.
+        :param cache: ResponseCache dùng để memo kết quả từng stage (True = data/cache/pipeline_cache.sqlite;
+                      None / False = không memo).
+        """
+        self.stages = list(stages)
+        # Không dùng `cache or None`: ResponseCache rỗng có len() == 0 nên bị coi là False
+        if cache is True:
+            cache = ResponseCache(DEFAULT_PIPELINE_CACHE_PATH)
+        self.cache = None if cache is False else cache
+        self.queue_size = queue_size
+        self.batch_window = batch_window
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Queue có kiểm tra tín hiệu dừng
+    # ---------------------------------------------------------------------------------------------------------------------
+    def _put(self, q, item):
+        while not self._stopped.is_set():
+            try:
+                q.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stopped.is_set():
+            wait = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.monotonic())
+            if wait <= 0:
+                raise queue.Empty
+            try:
+                return q.get(timeout=wait)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _take(self, q, batch_size):
+        """Lấy một lô: chờ bài đầu tiên, rồi gom thêm trong batch_window. Trả về (lô, đã hết đầu vào hay chưa)."""
+        first = self._get(q)
+        if first is _DONE:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < batch_size:
+            try:
+                item = self._get(q, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _count(self, stage, **deltas):
+        with self._stats_lock:
+            stats = self.stats[stage.name]
+            for key, value in deltas.items():
+                stats[key] += value
+        # Mỗi lần gọi ứng với một lô: 'seconds' là latency của lô, các khóa còn lại là counter theo stage
+        if metrics.enabled():
+            for key, value in deltas.items():
+                if key == 'seconds':
+                    metrics.observe('pipeline.batch.seconds', value, stage=stage.name)
+                elif value:
+                    metrics.count(f'pipeline.{key}', value, stage=stage.name)
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Xử lý một lô
+    # ---------------------------------------------------------------------------------------------------------------------
+    def _memo_key(self, stage, item):
+        if stage.key is None or self.cache is None:
+            return None
+        text = stage.key(item)
+        return make_cache_key(stage.name, stage.version, text) if text else None
+
+    def _process(self, stage, batch, out_queue):
+        started = time.perf_counter()
+        if stage.expand:
+            produced = errors = 0
+            for item in batch:
+                try:
+                    outputs = list(stage.fn(item))
+                except Exception as e:
+                    errors += 1
+                    print(f"❌ [{stage.name}] {type(e).__name__}: {e}")
+                    continue
+                for output in outputs:
+                    if not self._put(out_queue, output):
+                        return
+                    produced += 1
+            self._count(stage, inputs=len(batch), outputs=produced, errors=errors,
+                        seconds=time.perf_counter() - started)
+            return
+
+        keys = [self._memo_key(stage, item) for item in batch]
+        updates = [None] * len(batch)
+        pending = []
+        for j, key in enumerate(keys):
+            cached = self.cache.get(key) if key is not None else None
+            if cached is not None:
+                updates[j] = cached
+            else:
+                pending.append(j)
+
+        errors = 0
+        if pending:
+            try:
+                results = stage.fn([batch[j] for j in pending])
+                if len(results) != len(pending):
+                    raise ValueError(f"stage trả về {len(results)} kết quả cho {len(pending)} đầu vào")
+            except Exception as e:
+                results = [None] * len(pending)
+                errors = len(pending)
+                print(f"❌ [{stage.name}] {type(e).__name__}: {e}")
+            for j, update in zip(pending, results):
+                updates[j] = update
+                if update is not None and keys[j] is not None and stage.cacheable(update):
+                    self.cache.put(keys[j], update)
+
+        produced = dropped = 0
+        for item, update in zip(batch, updates):
+            if update is None:
+                dropped += 1
+                continue
+            item = {**item, **update}
+            if stage.accept is not None and not stage.accept(item):
+                dropped += 1
+                continue
+            if not self._put(out_queue, item):
+                return
+            produced += 1
+        self._count(
+            stage, inputs=len(batch), outputs=produced, cached=len(batch) - len(pending),
+            dropped=dropped - errors, errors=errors, seconds=time.perf_counter() - started
+        )
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Chạy
+    # ---------------------------------------------------------------------------------------------------------------------
+    def run(self, inputs):
+        """
+        Chạy pipeline trên `inputs` (iterable, có thể là generator sinh dần), trả về generator các bài đã qua mọi stage.
+        Dừng sớm (break / close generator) sẽ báo các thread dừng lại.
+        """
+        self._stopped.clear()
+        self.stats = {
+            stage.name: {'inputs': 0, 'outputs': 0, 'cached': 0, 'dropped': 0, 'errors': 0, 'seconds': 0.0}
+            for stage in self.stages
+        }
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        def _feed():
+            try:
+                for item in inputs:
+                    if not self._put(queues[0], item):
+                        return
+            except Exception as e:
+                print(f"❌ [input] {type(e).__name__}: {e}")
+            finally:
+                for _ in range(self.stages[0].workers):
+                    self._put(queues[0], _DONE)
+
+        def _work(i):
+            stage = self.stages[i]
+            done = False
+            try:
+                while not done and not self._stopped.is_set():
+                    batch, done = self._take(queues[i], stage.batch_size)
+                    if not batch:
+                        continue
+                    try:
+                        self._process(stage, batch, queues[i + 1])
+                    except Exception as e:
+                        # Lỗi ngoài stage.fn (cache, accept / cacheable, ...): bỏ lô này, worker chạy tiếp
+                        print(f"❌ [{stage.name}] {type(e).__name__}: {e}")
+                        self._count(stage, inputs=len(batch), errors=len(batch))
+            finally:
+                # Luôn đếm lùi và báo _DONE, nếu không run() sẽ chờ mãi ở queue cuối
+                with remaining_lock:
+                    remaining[i] -= 1
+                    last = remaining[i] == 0
+                if last:
+                    # Worker cuối cùng của stage báo hết đầu vào cho từng worker của stage sau
+                    downstream = self.stages[i + 1].workers if i + 1 < len(self.stages) else 1
+                    for _ in range(downstream):
+                        self._put(queues[i + 1], _DONE)
+
+        threads = [threading.Thread(target=_feed, daemon=True, name='pipeline-input')]
+        for i, stage in enumerate(self.stages):
+            threads += [
+                threading.Thread(target=_work, args=(i,), daemon=True, name=f'pipeline-{stage.name}-{k}')
+                for k in range(stage.workers)
+            ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = self._get(queues[-1])
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self._stopped.set()
+            self.print_stats(time.perf_counter() - started)
+
+    def print_stats(self, elapsed=None):
+        if elapsed is not None:
+            print(f"⏱️ Pipeline chạy {elapsed:.1f}s")
+        for name, s in self.stats.items():
+            print(
+                f"   {name:10s} vào {s['inputs']:5d} | ra {s['outputs']:5d} | memo {s['cached']:5d} | "
+                f"bỏ {s['dropped']:4d} | lỗi {s['errors']:3d} | {s['seconds']:7.1f}s"
+            )
+
+
+# ===========================================================================================================================
+# Pipeline tin tức: crawl -> fetch -> select -> clean -> summarize -> analyze -> silver
+# ===========================================================================================================================
+def _driver_pool(driver_factory):
+    """Mỗi thread giữ một WebDriver riêng (tạo lười); trả về (hàm lấy driver, hàm đóng mọi driver)."""
+    local = threading.local()
+    drivers = []
+    lock = threading.Lock()
+
+    def get_driver():
+        driver = getattr(local, 'driver', None)
+        if driver is None:
+            driver = driver_factory()
+            if driver is None:
+                raise RuntimeError("Không thể khởi tạo WebDriver.")
+            local.driver = driver
+            with lock:
+                drivers.append(driver)
+        return driver
+
+    def close_all():
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    return get_driver, close_all
+
+
+def build_news_pipeline(
+    crawl=True,
+    summarizer=None,
+    analyzer=None,
+    filter_keyword=None,
+    min_words=20,
+    topk=50,
+    num_drivers=2,
+    fetch_workers=4,
+    analyze_workers=8,
+    summarize_batch=8,
+    timeout=15,
+    cache=True
+):
+    """
+    Dựng StreamingPipeline cho tin tức. Đầu vào là từ khóa (crawl=True) hoặc các bài đã có nội dung (crawl=False).
+    :param summarizer: ViT5Summarizer hoặc SummarizerClient (None = bỏ stage tóm tắt).
+    :param analyzer: FinancialRiskAnalyzer (None = bỏ stage phân tích).
+    :return: (pipeline, hàm dọn dẹp cần gọi khi chạy xong).
+    """
+    try:
+        from .preprocess_news import clean_texts
+        from .keyword_index import RelevanceIndex
+    except ImportError:
+        from preprocess_news import clean_texts
+        from keyword_index import RelevanceIndex
+
+    stages = []
+    cleanups = []
+
+    if crawl:
+        try:
+            from .ingest_news import get_news, load_driver, _fetch_article_text
+            from .url_resolver import GoogleNewsResolver
+            from .html_cache import HtmlCache
+        except ImportError:
+            from ingest_news import get_news, load_driver, _fetch_article_text
+            from url_resolver import GoogleNewsResolver
+            from html_cache import HtmlCache
+
+        search_driver, close_search = _driver_pool(load_driver)
+        fetch_driver, close_fetch = _driver_pool(load_driver)
+        resolver, html_cache = GoogleNewsResolver(), HtmlCache()
+        cleanups += [close_search, close_fetch, resolver.close, html_cache.close]
+        seen_urls, seen_lock = set(), threading.Lock()
+
+        def _search(keyword):
+            for article in get_news(keyword, search_driver(), topk=topk) or []:
+                with seen_lock:
+                    if article['url'] in seen_urls:
+                        continue
+                    seen_urls.add(article['url'])
+                yield article
+
+        def _fetch(batch):
+            updates = []
+            for article in batch:
+                try:
+                    original_url, content = _fetch_article_text(
+                        article['url'], fetch_driver, timeout=timeout, resolver=resolver, html_cache=html_cache
+                    )
+                    updates.append({'original_url': original_url, 'content': content, 'error': None})
+                except Exception as e:
+                    updates.append({'content': '', 'error': f"{type(e).__name__}: {e}"})
+            return updates
+
+        stages.append(Stage('search', _search, workers=num_drivers, expand=True))
+        stages.append(Stage(
+            'fetch', _fetch, workers=fetch_workers,
+            key=lambda a: a.get('url'), accept=lambda a: not a.get('error') and a.get('content')
+        ))
+
+    # Lọc trùng theo title + lọc theo từ khóa (cần trạng thái chung nên chạy một worker, không memo)
+    matcher = None
+    if filter_keyword:
+        keywords = [filter_keyword] if isinstance(filter_keyword, str) else list(filter_keyword)
+        matcher = RelevanceIndex(keywords).matcher
+    seen_titles = set()
+
+    def _select(batch):
+        updates = []
+        for article in batch:
+            title = article.get('title')
+            keep = title not in seen_titles and (matcher is None or bool(matcher.count(
+                f"{article.get('title', '')}\x00{article.get('content', '')}"
+            )))
+            seen_titles.add(title)
+            updates.append({} if keep else None)
+        return updates
+
+    def _clean(batch):
+        titles = clean_texts(a.get('title', '') for a in batch)
+        contents = clean_texts(a.get('content', '') for a in batch)
+        return [
+            {'clean_title': t, 'clean_content': c, 'word_count': c.count(' ') + 1 if c else 0}
+            for t, c in zip(titles, contents)
+        ]
+
+    stages.append(Stage('select', _select, batch_size=32))
+    stages.append(Stage(
+        'clean', _clean, batch_size=32,
+        key=lambda a: f"{a.get('title', '')}\x00{a.get('content', '')}",
+        accept=lambda a: a['word_count'] > min_words
+    ))
+
+    if summarizer is not None:
+        def _summarize(batch):
+            summaries = summarizer.summarize_many([a['clean_content'] for a in batch])
+            return [{'summarision': s} for s in summaries]
+
+        stages.append(Stage(
+            'summarize', _summarize, workers=1, batch_size=summarize_batch,
+            key=lambda a: a.get('clean_content'),
+            version=getattr(summarizer, 'model_name', '1')
+        ))
+
+    if analyzer is not None:
+        try:
+            from .analyze_news import SYSTEM_PROMPT_VERSION
+        except ImportError:
+            from analyze_news import SYSTEM_PROMPT_VERSION
+
+        # Các worker dùng chung token bucket + retry/backoff của analyze_many, để 429 được chờ và gửi lại
+        session = analyzer.session()
+        cleanups.append(session.close)
+
+        def _analyze(batch):
+            return [
+                {'analysis': session.analyze(a.get('summarision') or a.get('clean_content') or '')}
+                for a in batch
+            ]
+
+        stages.append(Stage(
+            'analyze', _analyze, workers=analyze_workers,
+            key=lambda a: a.get('summarision') or a.get('clean_content'),
+            cacheable=lambda update: not update['analysis'].get('error'),
+            version=f"{analyzer.model}:{SYSTEM_PROMPT_VERSION}"
+        ))
+
+    def cleanup():
+        for fn in cleanups:
+            fn()
+
+    return StreamingPipeline(stages, cache=cache), cleanup
+
+
+def run_news_pipeline(
+    output_path,
+    keywords=None,
+    input_path=None,
+    summarize=True,
+    analyze=True,
+    aggregate=True,
+    silver_dir=None,
+    summarizer_address=None,
+    backend='fp32',
+    **kwargs
+):
+    """
+    Chạy toàn bộ chuỗi crawl -> silver theo kiểu streaming và ghi các bài ra `output_path` (JSONL) ngay khi xong.
+    :param keywords: Từ khóa cần crawl; nếu truyền input_path thì đọc bài có sẵn (mảng JSON / JSONL) thay vì crawl.
+    :param summarizer_address: Địa chỉ summarization worker (summarize_server.py); None = load ViT5 trong tiến trình này.
+    :param kwargs: Tham số thêm cho build_news_pipeline (filter_keyword, fetch_workers, analyze_workers, ...).
+    :return: Số bài đã ghi.
+    """
+    try:
+        from .preprocess_news import iter_articles
+    except ImportError:
+        from preprocess_news import iter_articles
+
+    summarizer = analyzer = aggregator = None
+    if summarize:
+        if summarizer_address:
+            try:
+                from .summarize_server import SummarizerClient
+            except ImportError:
+                from summarize_server import SummarizerClient
+            summarizer = SummarizerClient(summarizer_address)
+        else:
+            try:
+                from .summarize_news import ViT5Summarizer
+            except ImportError:
+                from summarize_news import ViT5Summarizer
+            summarizer = ViT5Summarizer(backend=backend)
+    if analyze:
+        try:
+            from .analyze_news import FinancialRiskAnalyzer
+        except ImportError:
+            from analyze_news import FinancialRiskAnalyzer
+        # --no-cache (cache=False) tắt cả memo của pipeline lẫn cache phân tích của analyzer
+        analyzer = FinancialRiskAnalyzer(cache=kwargs.get('cache', True))
+        if aggregate:
+            try:
+                from .aggregate_news import NewsRiskAggregator, DEFAULT_SILVER_DIR
+            except ImportError:
+                from aggregate_news import NewsRiskAggregator, DEFAULT_SILVER_DIR
+            aggregator = NewsRiskAggregator(silver_dir or DEFAULT_SILVER_DIR)
+
+    crawl = input_path is None
+    pipeline, cleanup = build_news_pipeline(crawl=crawl, summarizer=summarizer, analyzer=analyzer, **kwargs)
+    inputs = (keywords or ["Credit Suisse"]) if crawl else iter_articles(input_path)
+
+    written = 0
+    pending = []
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for article in pipeline.run(inputs):
+                f.write(json.dumps(article, ensure_ascii=False) + '\n')
+                f.flush()
+                written += 1
+                if aggregator is not None:
+                    pending.append(article)
+                    if len(pending) >= AGGREGATE_EVERY:
+                        aggregator.update(pending)
+                        pending = []
+        os.replace(tmp_path, output_path)
+        if aggregator is not None and pending:
+            aggregator.update(pending)
+    finally:
+        cleanup()
+        if hasattr(summarizer, 'close'):
+            summarizer.close()
+    print(f"✅ Pipeline: đã ghi {written} bài -> {output_path}")
+    return written
@@ -1,7 +1,216 @@
 import json
+import os
 import re
+import time
+import hashlib
 import unicodedata
-import pandas as pd
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .keyword_index import RelevanceIndex
+    from .news_store import url_key
+    from . import metrics
+except ImportError:
+    # Chạy trực tiếp bằng `python src/news_specialization/preprocess_news.py`
+    from keyword_index import RelevanceIndex
+    from news_store import url_key
+    import metrics
+
+# ===========================================================================================================================
+# Các pattern làm sạch (compile một lần, dùng chung cho clean_text và chế độ batch)
+# ===========================================================================================================================
+_URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+# Lookahead theo ký tự đầu giúp engine bỏ qua nhanh các vị trí không thể khớp
+_CAPTION_PATTERN = re.compile(r'(?=[ẢảNnTt])(Ảnh|Nguồn|Theo)\s*[:].*?(\n|$)', flags=re.IGNORECASE)
+_DATETIME_PATTERN = re.compile(r'\d{1,2}/\d{1,2}/\d{4}\s+\d{1,2}:\d{1,2}')
+# Thay cả chuỗi ký tự đặc biệt liên tiếp bằng một dấu cách: kết quả sau bước gộp khoảng trắng không đổi
+_SPECIAL_CHAR_PATTERN = re.compile(r'[^\w\s,.;:?!%\(\)\"\'-]+')
+# Tương đương r'\s+' -> ' ' nhưng bỏ qua các dấu cách đơn (chiếm phần lớn văn bản)
+_WHITESPACE_PATTERN = re.compile(r'\s{2,}|[^\S ]')
+
+# (pattern, chuỗi thay thế) theo đúng thứ tự các bước trong clean_text
+_CLEANING_STEPS = (
+    (_URL_PATTERN, ''),
+    (_CAPTION_PATTERN, ' '),
+    (_DATETIME_PATTERN, ''),
+    (_SPECIAL_CHAR_PATTERN, ' '),
+    (_WHITESPACE_PATTERN, ' '),
+)
+
+
+def clean_texts(texts):
+    """
+    Làm sạch cả một cột văn bản bằng các phép toán trên pandas Series (mỗi bước chạy một lần cho cả cột).
+    Kết quả giống hệt gọi NewsPreprocessor.clean_text() cho từng phần tử.
+    :param texts: Iterable các chuỗi (phần tử không phải str hoặc rỗng cho ra "").
+    :return: List các chuỗi đã làm sạch, cùng thứ tự.
+    """
+    import pandas as pd
+
+    # dtype=object để pandas dùng module re của Python (không đổi sang engine regex khác)
+    series = pd.Series(list(texts), dtype=object)
+    valid = series.map(lambda x: isinstance(x, str) and bool(x)).astype(bool)
+    result = pd.Series('', index=series.index, dtype=object)
+    if not valid.any():
+        return result.tolist()
+
+    with metrics.timer('preprocess.clean'):
+        column = series[valid].str.normalize('NFC')
+        if metrics.enabled():
+            metrics.count('preprocess.cleaned_texts', int(valid.sum()))
+            metrics.count('preprocess.cleaned_chars', int(column.str.len().sum()))
+        for pattern, repl in _CLEANING_STEPS:
+            column = column.str.replace(pattern, repl, regex=True)
+        result[valid] = column.str.strip()
+    return result.tolist()
+
+
+def clean_texts_parallel(texts, processes=None, shard_size=2000):
+    """
+    Chia corpus thành các shard và làm sạch song song trên nhiều tiến trình.
+    Với corpus nhỏ (<= 1 shard) chạy trực tiếp để tránh chi phí khởi tạo tiến trình.
+    """
+    texts = list(texts)
+    if processes == 1 or len(texts) <= shard_size:
+        return clean_texts(texts)
+
+    shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+    # Số liệu trong tiến trình con không được gom về, nên đo ở đây cho cả lượt song song
+    with metrics.timer('preprocess.clean_parallel'), ProcessPoolExecutor(max_workers=processes) as executor:
+        cleaned = []
+        for part in executor.map(clean_texts, shards):
+            cleaned.extend(part)
+    metrics.count('preprocess.cleaned_texts', len(texts))
+    return cleaned
+
+
+# ===========================================================================================================================
+# Đọc / ghi dạng stream (bộ nhớ không phụ thuộc kích thước corpus)
+# ===========================================================================================================================
+_FULL_CONTENT_PATTERN = re.compile(r'"fullContent"\s*:\s*\[')
+
+
+def _iter_json_array(f, buffer, pos, chunk_size):
+    """Giải mã lần lượt từng phần tử của một mảng JSON bắt đầu ngay sau dấu '[' tại buffer[pos:]."""
+    decoder = json.JSONDecoder()
+    eof = False
+    while True:
+        # Bỏ qua khoảng trắng và dấu phẩy giữa các phần tử
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+        if pos >= len(buffer) or buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Phần tử hiện tại chưa đọc hết -> đọc thêm rồi giải mã lại
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+        # Bỏ phần đã giải mã khỏi buffer (theo từng chunk) để buffer không phình theo kích thước file
+        if pos >= chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def iter_articles(filepath, chunk_size=1 << 20):
+    """
+    Đọc lười từng bài viết từ file, không load toàn bộ file vào bộ nhớ.
+    Hỗ trợ: mảng JSON, object có key 'fullContent' (như load_data) và JSONL (mỗi dòng một bài).
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size)
+        stripped = buffer.lstrip('\ufeff \t\r\n')
+        if not stripped:
+            return
+
+        if stripped[0] == '[':
+            yield from _iter_json_array(f, stripped, 1, chunk_size)
+            return
+
+        # Object có key 'fullContent' hay JSONL? Xét dòng đầu tiên: JSONL không có xuống dòng bên trong một bài.
+        buffer = stripped
+        while True:
+            newline = buffer.find('\n')
+            line_end = newline if newline >= 0 else len(buffer)
+            match = _FULL_CONTENT_PATTERN.search(buffer, 0, line_end)
+            if match:
+                yield from _iter_json_array(f, buffer, match.end(), chunk_size)
+                return
+            if newline >= 0:
+                break
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buffer += chunk
+
+        try:
+            first = json.loads(buffer[:line_end])
+        except ValueError:
+            first = None
+
+        if first is None:
+            # Object nhiều dòng (đã format): tìm mảng 'fullContent' ở phần sau
+            match = _FULL_CONTENT_PATTERN.search(buffer)
+            while match is None:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise ValueError("Cấu trúc JSON không được hỗ trợ.")
+                buffer += chunk
+                match = _FULL_CONTENT_PATTERN.search(buffer)
+            yield from _iter_json_array(f, buffer, match.end(), chunk_size)
+            return
+
+        # JSONL: tiếp tục từ ngay sau dòng đầu (không seek(0) rồi đọc lại, vì buffer đã bỏ các dòng trống ở đầu file)
+        yield first
+        pieces = buffer[line_end + 1:].split('\n')
+        carry = pieces.pop()    # dòng còn dở ở cuối buffer, phần còn lại nằm trong lần đọc tiếp theo của f
+        for line in pieces:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        for line in f:
+            if carry:
+                line, carry = carry + line, ''
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        if carry.strip():
+            yield json.loads(carry)
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def article_key(article):
+    """
+    Id ổn định của một bài trong RelevanceIndex: url_key của URL, hoặc SHA-1 của title + content khi bài không có URL.
+    Không phụ thuộc vị trí trong self.data, nên chỉ mục vẫn đúng sau khi lọc / khử trùng lặp / làm sạch (copy bài).
+    """
+    url = article.get('url')
+    if url:
+        return url_key(url)
+    text = f"{article.get('title') or ''}\0{article.get('content') or ''}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
 
 class NewsPreprocessor:
     def __init__(self, filepath=None, data=None):
@@ -11,6 +220,7 @@ class NewsPreprocessor:
         :param data: Dữ liệu dạng list hoặc dict (nếu không load từ file).
         """
         self.data = []
+        self.relevance_index = None
         if filepath:
             self.load_data(filepath)
         elif data:
@@ -29,6 +239,7 @@ class NewsPreprocessor:
                 self.data = raw_data
             else:
                 raise ValueError("Cấu trúc JSON không được hỗ trợ.")
+            self.relevance_index = None
             
             print(f"✅ Đã load {len(self.data)} bài báo.")
         except Exception as e:
@@ -45,90 +256,266 @@ class NewsPreprocessor:
         text = unicodedata.normalize('NFC', text)
 
         # 2. Loại bỏ URL
-        text = re.sub(r'https?://\S+|www\.\S+', '', text)
+        text = _URL_PATTERN.sub('', text)
 
         # 3. Loại bỏ các cụm từ thường gặp trong báo chí (Caption ảnh, nguồn)
         # Ví dụ: "Ảnh: ...", "Nguồn: ...", "Theo ..." ở đầu câu hoặc cuối đoạn
-        text = re.sub(r'(Ảnh|Nguồn|Theo)\s*[:].*?(\n|$)', ' ', text, flags=re.IGNORECASE)
+        text = _CAPTION_PATTERN.sub(' ', text)
         
         # 4. Loại bỏ thông tin ngày tháng rác dạng "13/11/2025 11:21" nằm lơ lửng trong text
-        text = re.sub(r'\d{1,2}/\d{1,2}/\d{4}\s+\d{1,2}:\d{1,2}', '', text)
+        text = _DATETIME_PATTERN.sub('', text)
 
         # 5. Loại bỏ các ký tự đặc biệt không mong muốn (giữ lại dấu câu cơ bản và tiếng Việt)
         # Pattern này giữ lại chữ cái, số, và các dấu câu phổ biến
-        text = re.sub(r'[^\w\s,.;:?!%\(\)\"\'-]', ' ', text)
+        text = _SPECIAL_CHAR_PATTERN.sub(' ', text)
 
         # 6. Xử lý khoảng trắng (newlines thành space, xóa double space)
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _WHITESPACE_PATTERN.sub(' ', text).strip()
 
         return text
 
+    def tag_watchlist(self, terms):
+        """
+        Quét mỗi bài viết đúng một lần (title + content, chuẩn hóa NFC + casefold) với toàn bộ watchlist
+        bằng Aho-Corasick. Mỗi bài được gán 'watchlist_hits' = {từ khóa: số lần xuất hiện},
+        đồng thời dựng self.relevance_index để các lần lọc sau chỉ là tra cứu.
+        :param terms: Danh sách tổ chức/thực thể cần theo dõi.
+        :return: RelevanceIndex (id bài viết = article_key(bài)).
+        """
+        index = RelevanceIndex(terms)
+        for article in self.data:
+            article['watchlist_hits'] = index.add(article_key(article), article.get('title', ''), article.get('content', ''))
+        self.relevance_index = index
+        tagged = sum(1 for article in self.data if article['watchlist_hits'])
+        print(f"🏷️ Đã gắn nhãn watchlist ({len(index.terms)} từ khóa): {tagged}/{len(self.data)} bài có ít nhất một từ khóa.")
+        return index
+
     def filter_relevant_content(self, keyword="Credit Suisse"):
         """
         Lọc các bài viết chỉ liên quan đến từ khóa (nếu cần thiết).
         Dữ liệu của bạn có nhiều bài không liên quan (showbiz, tai nạn).
+        :param keyword: Một từ khóa hoặc danh sách từ khóa (giữ bài chứa ít nhất một từ khóa).
         """
+        keywords = [keyword] if isinstance(keyword, str) else list(keyword)
         initial_count = len(self.data)
-        # Lọc nếu keyword xuất hiện trong title hoặc content
-        self.data = [
-            article for article in self.data 
-            if keyword.lower() in str(article.get('title', '')).lower() 
-            or keyword.lower() in str(article.get('content', '')).lower()
-        ]
-        print(f"🔍 Đã lọc bài viết theo từ khóa '{keyword}': {initial_count} -> {len(self.data)}")
+
+        # Dùng chỉ mục có sẵn nếu mọi từ khóa đều nằm trong watchlist, ngược lại quét một lượt cho các từ khóa này
+        index = self.relevance_index
+        if index is None or not all(index.has_term(k) for k in keywords):
+            index = RelevanceIndex(keywords)
+            for article in self.data:
+                index.add(article_key(article), article.get('title', ''), article.get('content', ''))
+
+        # Lọc nếu keyword xuất hiện trong title hoặc content.
+        # Chỉ mục theo article_key nên vẫn dùng được cho các lần lọc tiếp theo trên tập con còn lại.
+        matched = set(index.lookup_any(keywords))
+        self.data = [article for article in self.data if article_key(article) in matched]
+        print(f"🔍 Đã lọc bài viết theo từ khóa {keywords}: {initial_count} -> {len(self.data)}")
 
     def remove_duplicates(self):
         """Loại bỏ các bài báo trùng lặp dựa trên Title."""
-        df = pd.DataFrame(self.data)
-        if df.empty:
+        if not self.data:
             return
         
-        initial_count = len(df)
-        # Xóa trùng lặp dựa trên tiêu đề (title)
-        df.drop_duplicates(subset=['title'], keep='first', inplace=True)
+        initial_count = len(self.data)
+        # Xóa trùng lặp dựa trên tiêu đề (title), giữ bài xuất hiện đầu tiên
+        seen_titles = set()
+        unique = []
+        for article in self.data:
+            title = article.get('title')
+            if title not in seen_titles:
+                seen_titles.add(title)
+                unique.append(article)
         
-        self.data = df.to_dict('records')
-        print(f"🗑️ Đã xóa {initial_count - len(df)} bài viết trùng lặp.")
+        self.data = unique
+        print(f"🗑️ Đã xóa {initial_count - len(self.data)} bài viết trùng lặp.")
 
-    def process(self, filter_keyword=None):
+    def remove_near_duplicates(self, threshold=0.8, num_perm=128, shingle_size=5):
+        """
+        Gom các bài gần trùng lặp (bài đăng lại, khác nhẹ tiêu đề/byline) bằng MinHash + LSH trên clean_content.
+        Giữ lại một bài đại diện cho mỗi cụm (bài xuất hiện đầu tiên) kèm danh sách 'duplicates'.
+        :param threshold: Ngưỡng độ tương đồng Jaccard để coi hai bài là trùng.
+        """
+        # numpy chỉ cần cho bước này nên import khi dùng tới
+        try:
+            from .near_duplicates import MinHashLSH
+        except ImportError:
+            from near_duplicates import MinHashLSH
+
+        if not self.data:
+            return
+        contents = [
+            article['clean_content'] if 'clean_content' in article else self.clean_text(article.get('content', ''))
+            for article in self.data
+        ]
+        lsh = MinHashLSH(threshold=threshold, num_perm=num_perm, shingle_size=shingle_size)
+        clusters = lsh.cluster(contents)
+
+        removed = set()
+        for members in clusters:
+            representative = self.data[members[0]]
+            representative['duplicates'] = [
+                {'title': self.data[idx].get('title'), 'url': self.data[idx].get('url')}
+                for idx in members[1:]
+            ]
+            removed.update(members[1:])
+
+        self.data = [article for idx, article in enumerate(self.data) if idx not in removed]
+        print(f"🧬 Đã gộp {len(removed)} bài gần trùng lặp vào {len(clusters)} cụm (ngưỡng {threshold}).")
+
+    def process(self, filter_keyword=None, processes=1, near_duplicate_threshold=None):
         """
         Chạy toàn bộ quy trình tiền xử lý.
+        :param processes: Số tiến trình dùng để làm sạch văn bản (None = số CPU, 1 = chạy trong tiến trình hiện tại).
+        :param near_duplicate_threshold: Nếu đặt (ví dụ 0.8), gộp các bài gần trùng lặp sau khi làm sạch.
         """
         processed_data = []
+        metrics.count('preprocess.articles', len(self.data), step='input')
         
         # Bước 1: Lọc trùng lặp trước khi xử lý để tiết kiệm thời gian
-        self.remove_duplicates()
+        with metrics.timer('preprocess.step', step='dedup'):
+            self.remove_duplicates()
 
         # Bước 2: Lọc nội dung theo từ khóa (Tùy chọn)
         if filter_keyword:
-            self.filter_relevant_content(filter_keyword)
+            with metrics.timer('preprocess.step', step='filter'):
+                self.filter_relevant_content(filter_keyword)
 
-        # Bước 3: Clean text
-        for article in self.data:
-            clean_article = article.copy()
-            
-            # Làm sạch Title
-            clean_article['clean_title'] = self.clean_text(article.get('title', ''))
-            
-            # Làm sạch Content
-            clean_article['clean_content'] = self.clean_text(article.get('content', ''))
-            
-            # Tính độ dài word count (hữu ích để lọc bài quá ngắn)
-            clean_article['word_count'] = len(clean_article['clean_content'].split())
+        # Bước 3: Clean text (theo cột cho cả corpus)
+        clean_titles = clean_texts_parallel((a.get('title', '') for a in self.data), processes=processes)
+        clean_contents = clean_texts_parallel((a.get('content', '') for a in self.data), processes=processes)
+
+        for article, clean_title, clean_content in zip(self.data, clean_titles, clean_contents):
+            # Tính độ dài word count (hữu ích để lọc bài quá ngắn);
+            # văn bản đã clean chỉ còn một dấu cách giữa các từ
+            word_count = clean_content.count(' ') + 1 if clean_content else 0
 
             # Chỉ lấy bài có nội dung đáng kể (>20 từ)
-            if clean_article['word_count'] > 20:
+            if word_count > 20:
+                clean_article = article.copy()
+                clean_article['clean_title'] = clean_title
+                clean_article['clean_content'] = clean_content
+                clean_article['word_count'] = word_count
                 processed_data.append(clean_article)
 
         self.data = processed_data
+
+        # Bước 4: Gộp bài gần trùng lặp (Tùy chọn) - mỗi bài bị gộp là một lần gọi LLM/tóm tắt được tiết kiệm
+        if near_duplicate_threshold:
+            with metrics.timer('preprocess.step', step='near_duplicates'):
+                self.remove_near_duplicates(threshold=near_duplicate_threshold)
+
+        metrics.count('preprocess.articles', len(self.data), step='output')
         print("✅ Tiền xử lý hoàn tất.")
         return self.data
 
-    def save_to_json(self, output_path):
-        """Lưu kết quả ra file JSON."""
+    def iter_process(self, articles, filter_keyword=None, min_words=20, batch_size=256):
+        """
+        Pipeline tiền xử lý dạng generator: lọc trùng theo title -> lọc theo từ khóa -> làm sạch -> lọc độ dài.
+        Chỉ giữ trong bộ nhớ một lô batch_size bài và tập hash của các title đã gặp.
+        (Gộp bài gần trùng lặp cần nhìn toàn corpus nên không có trong chế độ stream.)
+        :param articles: Iterable các bài viết (vd. iter_articles(filepath)).
+        :param filter_keyword: Một từ khóa hoặc danh sách từ khóa (tùy chọn).
+        :param min_words: Chỉ giữ bài có word_count > min_words.
+        """
+        matcher = None
+        if filter_keyword:
+            keywords = [filter_keyword] if isinstance(filter_keyword, str) else list(filter_keyword)
+            matcher = RelevanceIndex(keywords).matcher
+        seen_titles = set()
+
+        def _selected():
+            for article in articles:
+                # Bước 1: Lọc trùng lặp theo title (lưu digest 16 byte thay vì cả chuỗi)
+                digest = hashlib.blake2b(repr(article.get('title')).encode('utf-8'), digest_size=16).digest()
+                if digest in seen_titles:
+                    continue
+                seen_titles.add(digest)
+
+                # Bước 2: Lọc nội dung theo từ khóa (Tùy chọn)
+                if matcher is not None and not matcher.count(
+                    f"{article.get('title', '')}\x00{article.get('content', '')}"
+                ):
+                    continue
+                yield article
+
+        # Bước 3: Clean text theo từng lô
+        for batch in _batched(_selected(), batch_size):
+            clean_titles = clean_texts(a.get('title', '') for a in batch)
+            clean_contents = clean_texts(a.get('content', '') for a in batch)
+            for article, clean_title, clean_content in zip(batch, clean_titles, clean_contents):
+                word_count = clean_content.count(' ') + 1 if clean_content else 0
+                metrics.count('preprocess.stream_articles', result='kept' if word_count > min_words else 'short')
+                if word_count > min_words:
+                    clean_article = dict(article)
+                    clean_article['clean_title'] = clean_title
+                    clean_article['clean_content'] = clean_content
+                    clean_article['word_count'] = word_count
+                    yield clean_article
+
+    def process_stream(self, input_path, output_path, filter_keyword=None, min_words=20):
+        """
+        Tiền xử lý file lớn (mảng JSON / JSONL, có thể nhiều GB) với bộ nhớ gần như không đổi:
+        đọc lười, xử lý theo lô và ghi kết quả ra dần.
+        :param output_path: File đầu ra; đuôi .jsonl -> JSONL, còn lại -> mảng JSON.
+        :return: Số bài đã ghi.
+        """
+        records = self.iter_process(iter_articles(input_path), filter_keyword=filter_keyword, min_words=min_words)
+        return self.save_to_json(output_path, records=records)
+
+    def save_to_json(self, output_path, records=None):
+        """
+        Lưu kết quả ra file JSON (hoặc JSONL nếu đuôi file là .jsonl).
+        Ghi lần lượt từng bài nên có thể truyền một generator (records) mà không cần giữ cả list trong bộ nhớ.
+        :param records: Iterable bài viết cần ghi; mặc định là self.data.
+        :return: Số bài đã ghi.
+        """
+        records = self.data if records is None else records
+        count = 0
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=4)
+            if output_path.endswith('.jsonl'):
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    count += 1
+            else:
+                f.write('[')
+                for record in records:
+                    item = json.dumps(record, ensure_ascii=False, indent=4)
+                    f.write((',\n    ' if count else '\n    ') + item.replace('\n', '\n    '))
+                    count += 1
+                f.write('\n]' if count else ']')
         print(f"💾 Đã lưu file tại: {output_path}")
+        return count
+
+def benchmark_cleaning(filepath, scale=100, processes=None):
+    """
+    Đo tốc độ làm sạch (bài/giây) trên file tin tức được nhân bản `scale` lần.
+    So sánh vòng lặp clean_text() với chế độ batch (1 tiến trình và nhiều tiến trình),
+    đồng thời kiểm tra kết quả trùng khớp hoàn toàn.
+    """
+    processor = NewsPreprocessor(filepath=filepath)
+    titles = [a.get('title', '') for a in processor.data] * scale
+    contents = [a.get('content', '') for a in processor.data] * scale
+    n_articles = len(contents)
+
+    report = {}
+    started = time.perf_counter()
+    expected = [(processor.clean_text(t), processor.clean_text(c)) for t, c in zip(titles, contents)]
+    report['loop'] = n_articles / (time.perf_counter() - started)
+
+    for name, workers in (('batch', 1), ('batch_parallel', processes or os.cpu_count())):
+        started = time.perf_counter()
+        cleaned = list(zip(
+            clean_texts_parallel(titles, processes=workers),
+            clean_texts_parallel(contents, processes=workers)
+        ))
+        report[name] = n_articles / (time.perf_counter() - started)
+        if cleaned != expected:
+            raise AssertionError(f"Kết quả chế độ {name} khác với clean_text().")
+
+    for name, rate in report.items():
+        print(f"⏱️ {name}: {rate:,.0f} bài/giây ({n_articles} bài)")
+    return report
 
 # --- Ví dụ cách sử dụng ---
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+DEFAULT_CACHE_PATH = os.path.join('data', 'cache', 'analysis_cache.sqlite')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_news_text(text):
+    """Chuẩn hóa văn bản trước khi băm: NFC + gộp khoảng trắng, để khác biệt định dạng không làm trượt cache."""
+    text = unicodedata.normalize('NFC', text or '')
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def make_cache_key(model, prompt_version, news_text):
+    """Khóa cache = SHA-256 của (tên model, phiên bản system prompt, văn bản tin đã chuẩn hóa)."""
+    payload = '\x1f'.join((model, prompt_version, normalize_news_text(news_text)))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=None, max_bytes=None):
+        """
+        Cache kết quả phân tích trên đĩa (SQLite), đặt trước FinancialRiskAnalyzer.analyze_news.
+        :param path: File SQLite.
+        :param ttl: Thời gian sống của một kết quả (giây). None = không hết hạn.
+        :param max_bytes: Tổng dung lượng kết quả tối đa; vượt ngưỡng sẽ xóa các mục ít dùng nhất (LRU).
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        self._conn.commit()
+
+    def get(self, key, *fallback_keys):
+        """
+        Trả về kết quả đã cache (dict) hoặc None nếu chưa có / đã hết hạn.
+        :param fallback_keys: Các khóa thử tiếp theo thứ tự nếu `key` không có (cả lượt tính là một hit / miss).
+        """
+        now = time.time()
+        with self._lock:
+            for candidate in (key, *fallback_keys):
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (candidate,)
+                ).fetchone()
+                if row is None:
+                    continue
+                if self.ttl is not None and now - row[1] > self.ttl:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (candidate,))
+                    self._conn.commit()
+                    continue
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, candidate))
+                self._conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Lưu một kết quả phân tích (chỉ nên lưu kết quả thành công)."""
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode('utf-8')), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        """Số lần hit/miss trong phiên hiện tại và số mục đang có trong cache."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,23 +1,191 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+import os
+import glob
+import json
+import time
+import sys
+import hashlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+# torch / transformers (vài giây để import) chỉ được nạp khi tạo ViT5Summarizer hoặc chạy tóm tắt
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+MAX_INPUT_TOKENS = 1024
+# Số token input (sau padding) tối đa của một batch khi tóm tắt hàng loạt
+DEFAULT_TOKEN_BUDGET = 8192
+BACKENDS = ("fp32", "int8", "onnx")
+DEFAULT_BACKEND_CACHE_DIR = os.path.join('data', 'cache', 'models')
+GENERATION_KWARGS = {
+    "num_beams": 4,             # Beam search giúp câu văn hay hơn
+    "early_stopping": True,
+    "no_repeat_ngram_size": 3,  # Tránh lặp từ
+}
+
+
+def _backend_cache_path(cache_dir, model_name, backend):
+    return os.path.join(cache_dir, model_name.replace('/', '--') + '-' + backend)
+
+
+def _load_int8_model(model_name, cache_dir):
+    """Dynamic int8 quantization cho các lớp Linear; lưu cả model đã lượng tử hóa để các lần sau chỉ cần load."""
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    path = os.path.join(_backend_cache_path(cache_dir, model_name, 'int8'), 'model.pt')
+    if os.path.exists(path):
+        return torch.load(path, weights_only=False)
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.eval()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    torch.save(model, tmp_path)
+    os.replace(tmp_path, path)
+    return model
+
+
+def _load_onnx_model(model_name, cache_dir):
+    """Encoder-decoder chạy bằng ONNX Runtime (có decoder dùng lại KV-cache); export một lần rồi load từ đĩa."""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    path = _backend_cache_path(cache_dir, model_name, 'onnx')
+    if os.path.exists(os.path.join(path, 'config.json')):
+        return ORTModelForSeq2SeqLM.from_pretrained(path, use_cache=True)
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+    model.save_pretrained(path)
+    return model
+
 
 class ViT5Summarizer:
-    def __init__(self, model_name="VietAI/vit5-large-vietnews-summarization"):
+    def __init__(
+        self,
+        model_name="VietAI/vit5-large-vietnews-summarization",
+        backend="fp32",
+        cache_dir=DEFAULT_BACKEND_CACHE_DIR
+    ):
         """
         Khởi tạo model và tokenizer một lần duy nhất.
+        :param backend: "fp32" (PyTorch gốc), "int8" (dynamic quantization, CPU)
+                        hoặc "onnx" (ONNX Runtime, CPU; cần cài optimum[onnxruntime]).
+        :param cache_dir: Nơi lưu model đã lượng tử hóa / đã export để lần sau không phải làm lại.
         """
-        print(f"⏳ Đang tải model {model_name}...")
-        
-        # Tự động chọn GPU nếu có, không thì dùng CPU
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+        if backend not in BACKENDS:
+            raise ValueError(f"backend phải là một trong {BACKENDS}, nhận được '{backend}'.")
+        print(f"⏳ Đang tải model {model_name} (backend: {backend})...")
+        self.backend = backend
+
+        # Tự động chọn GPU nếu có, không thì dùng CPU (int8 / onnx chỉ chạy trên CPU)
+        self.device = "cuda" if torch.cuda.is_available() and backend == "fp32" else "cpu"
         print(f"⚙️ Thiết bị đang sử dụng: {self.device.upper()}")
 
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-        self.model.to(self.device)
-        
+        if backend == "int8":
+            self.model = _load_int8_model(model_name, cache_dir)
+        elif backend == "onnx":
+            self.model = _load_onnx_model(model_name, cache_dir)
+        else:
+            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+            self.model.to(self.device)
+            self.model.eval()
+
         print("✅ Model đã sẵn sàng!")
 
+    def _encode(self, texts):
+        """Tokenize (chưa padding) theo format của VietNews, cắt ở 1024 token."""
+        inputs = ["vietnews: " + text + " </s>" for text in texts]
+        return self.tokenizer(inputs, truncation=True, max_length=MAX_INPUT_TOKENS)["input_ids"]
+
+    @staticmethod
+    def _length_batches(lengths, token_budget, max_batch_size):
+        """
+        Xếp chỉ số các input (đã sắp theo độ dài giảm dần) thành batch sao cho
+        số token sau padding (độ dài dài nhất * số bài) không vượt token_budget.
+        """
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+        batches, current = [], []
+        for i in order:
+            # Bài đầu batch là dài nhất nên kích thước padding = lengths[current[0]]
+            longest = lengths[current[0]] if current else lengths[i]
+            if current and (longest * (len(current) + 1) > token_budget or len(current) >= max_batch_size):
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
+
+    def summarize_many(
+        self,
+        texts,
+        max_length=256,
+        min_length=50,
+        token_budget=DEFAULT_TOKEN_BUDGET,
+        max_batch_size=16
+    ):
+        """
+        Tóm tắt nhiều bài cùng lúc bằng batched beam search.
+        Các bài được sắp theo số token rồi gom thành batch có độ dài gần nhau, nên phần padding nhỏ.
+        :param texts: List nội dung bài báo (đã được clean).
+        :param token_budget: Số token input tối đa của một batch sau khi padding (bộ nhớ beam search tỉ lệ với giá trị này).
+        :param max_batch_size: Số bài tối đa trong một batch.
+        :return: List tóm tắt theo đúng thứ tự đầu vào ("" với bài quá ngắn).
+        """
+        import torch
+
+        texts = list(texts)
+        summaries = [""] * len(texts)
+        valid = [i for i, text in enumerate(texts) if text and len(text.strip()) >= 50]
+        if not valid:
+            return summaries
+
+        input_ids = self._encode([texts[i] for i in valid])
+        lengths = [len(ids) for ids in input_ids]
+
+        for batch in self._length_batches(lengths, token_budget, max_batch_size):
+            encoding = self.tokenizer.pad(
+                {"input_ids": [input_ids[j] for j in batch]},
+                return_tensors="pt"
+            )
+            with torch.inference_mode(), metrics.timer('summarize.generate') as timer:
+                outputs = self.model.generate(
+                    input_ids=encoding["input_ids"].to(self.device),
+                    attention_mask=encoding["attention_mask"].to(self.device),
+                    max_length=max_length,
+                    min_length=min_length,
+                    **GENERATION_KWARGS
+                )
+            if metrics.enabled():
+                input_tokens = int(encoding["attention_mask"].sum())
+                output_tokens = int(outputs.numel())
+                metrics.count('summarize.articles', len(batch))
+                metrics.count('summarize.input_tokens', input_tokens)
+                metrics.count('summarize.output_tokens', output_tokens)
+                metrics.observe('summarize.batch_size', len(batch))
+                if timer.elapsed > 0:
+                    metrics.observe('summarize.output_tokens_per_second', output_tokens / timer.elapsed)
+            decoded = self.tokenizer.batch_decode(
+                outputs,
+                skip_special_tokens=True,
+                clean_up_tokenization_spaces=True
+            )
+            for j, summary in zip(batch, decoded):
+                summaries[valid[j]] = summary
+
+        return summaries
+
     def summarize_one(self, text, max_length=256, min_length=50):
         """
         Hàm xử lý 1 bài news.
@@ -25,86 +193,294 @@ class ViT5Summarizer:
         :param max_length: Độ dài tối đa của tóm tắt.
         :return: Chuỗi văn bản tóm tắt.
         """
-        if not text or len(text.strip()) < 50:
-            return ""
-
-        # Chuẩn bị input theo format của VietNews
-        input_text = "vietnews: " + text + " </s>"
-        
-        # Tokenize và đưa vào thiết bị (GPU/CPU)
-        # padding và truncation để đảm bảo input không quá dài gây lỗi bộ nhớ
-        encoding = self.tokenizer(
-            input_text, 
-            return_tensors="pt", 
-            padding=True, 
-            truncation=True, 
-            max_length=1024 
-        )
-        
-        input_ids = encoding["input_ids"].to(self.device)
-        attention_masks = encoding["attention_mask"].to(self.device)
-
-        # Generate tóm tắt
-        with torch.no_grad(): # Tắt gradient để tiết kiệm VRAM và chạy nhanh hơn
-            outputs = self.model.generate(
-                input_ids=input_ids,
-                attention_mask=attention_masks,
-                max_length=max_length,
-                min_length=min_length,
-                num_beams=4,          # Beam search giúp câu văn hay hơn
-                early_stopping=True,
-                no_repeat_ngram_size=3 # Tránh lặp từ
-            )
+        return self.summarize_many([text], max_length=max_length, min_length=min_length)[0]
+
+
+def benchmark_throughput(texts, summarizer=None, token_budget=DEFAULT_TOKEN_BUDGET, max_batch_size=16):
+    """
+    So sánh thông lượng (bài/phút) giữa gọi summarize_one từng bài và summarize_many.
+    Ví dụ trên CPU: `benchmark_throughput(dataset['content'].head(32).tolist())`.
+    """
+    summarizer = summarizer or ViT5Summarizer()
+    texts = list(texts)
+
+    start = time.perf_counter()
+    sequential = [summarizer.summarize_one(text) for text in texts]
+    sequential_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = summarizer.summarize_many(texts, token_budget=token_budget, max_batch_size=max_batch_size)
+    batched_seconds = time.perf_counter() - start
+
+    report = {
+        "articles": len(texts),
+        "sequential_per_minute": len(texts) * 60 / sequential_seconds,
+        "batched_per_minute": len(texts) * 60 / batched_seconds,
+        # Beam search theo batch có thể khác từng bài ở vài token do padding
+        "identical_outputs": sum(a == b for a, b in zip(sequential, batched)),
+    }
+    print(
+        f"⏱️ {report['articles']} bài | summarize_one: {report['sequential_per_minute']:.1f} bài/phút"
+        f" | summarize_many: {report['batched_per_minute']:.1f} bài/phút"
+        f" (x{sequential_seconds / batched_seconds:.2f})"
+    )
+    return report
+
+# ===========================================================================================================================
+# So sánh backend
+# ===========================================================================================================================
+def _ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
 
-        # Decode kết quả
-        summary = self.tokenizer.decode(
-            outputs[0], 
-            skip_special_tokens=True, 
-            clean_up_tokenization_spaces=True
+
+def _f1(overlap, predicted, reference):
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / predicted, overlap / reference
+    return 2 * precision * recall / (precision + recall)
+
+
+def _lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def rouge_scores(prediction, reference):
+    """ROUGE-1 / ROUGE-2 / ROUGE-L (F1) trên token tách theo khoảng trắng, chữ thường."""
+    pred, ref = prediction.lower().split(), reference.lower().split()
+    scores = {}
+    for n in (1, 2):
+        pred_grams, ref_grams = _ngrams(pred, n), _ngrams(ref, n)
+        overlap = sum((pred_grams & ref_grams).values())
+        scores[f"rouge{n}"] = _f1(overlap, sum(pred_grams.values()), sum(ref_grams.values()))
+    scores["rougeL"] = _f1(_lcs_length(pred, ref), len(pred), len(ref))
+    return scores
+
+
+def _peak_rss_mb():
+    """Peak RSS của tiến trình hiện tại (MB); None nếu không đo được (Windows không có psutil)."""
+    if sys.platform == 'win32':
+        # Module resource chỉ có trên Unix
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: KB trên Linux, byte trên macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_backend(model_name, backend, cache_dir, texts, token_budget):
+    # Chạy trong tiến trình riêng để peak RSS phản ánh đúng một backend
+    summarizer = ViT5Summarizer(model_name, backend=backend, cache_dir=cache_dir)
+    start = time.perf_counter()
+    summaries = summarizer.summarize_many(texts, token_budget=token_budget)
+    seconds = time.perf_counter() - start
+    peak_rss_mb = _peak_rss_mb()
+    return summaries, seconds, peak_rss_mb
+
+
+def compare_backends(
+    texts,
+    backends=BACKENDS,
+    model_name="VietAI/vit5-large-vietnews-summarization",
+    cache_dir=DEFAULT_BACKEND_CACHE_DIR,
+    token_budget=DEFAULT_TOKEN_BUDGET
+):
+    """
+    So sánh các backend trên cùng một mẫu bài cố định: độ trễ, peak RSS và độ lệch ROUGE so với fp32.
+    Mỗi backend chạy trong một tiến trình riêng (model được lấy từ cache nếu đã chuyển đổi trước đó).
+    :return: dict {backend: {"seconds", "ms_per_article", "peak_rss_mb", "rouge1", "rouge2", "rougeL"}}.
+             ROUGE tính giữa tóm tắt của backend và tóm tắt fp32 (fp32 luôn là 1.0).
+    """
+    texts = list(texts)
+    backends = ["fp32"] + [b for b in backends if b != "fp32"]
+    outputs = {}
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as executor:
+            outputs[backend] = executor.submit(
+                _run_backend, model_name, backend, cache_dir, texts, token_budget
+            ).result()
+
+    reference = outputs["fp32"][0]
+    report = {}
+    for backend, (summaries, seconds, peak_rss_mb) in outputs.items():
+        pairs = [(s, r) for s, r in zip(summaries, reference) if r]
+        rouge = [rouge_scores(s, r) for s, r in pairs]
+        row = {
+            "seconds": seconds,
+            "ms_per_article": seconds * 1000 / max(1, len(texts)),
+            "peak_rss_mb": peak_rss_mb,
+        }
+        for key in ("rouge1", "rouge2", "rougeL"):
+            row[key] = sum(r[key] for r in rouge) / len(rouge) if rouge else 0.0
+        report[backend] = row
+        print(
+            f"📊 {backend:5s} | {row['ms_per_article']:8.1f} ms/bài | peak RSS "
+            f"{'     n/a' if row['peak_rss_mb'] is None else format(row['peak_rss_mb'], '8.1f')} MB"
+            f" | ROUGE-1/2/L vs fp32: {row['rouge1']:.3f}/{row['rouge2']:.3f}/{row['rougeL']:.3f}"
         )
-        
-        return summary
+    return report
+
+
+# ===========================================================================================================================
+# Tóm tắt cả file (có checkpoint, chạy lại được, chia shard)
+# ===========================================================================================================================
+def content_hash(text):
+    """Khóa của một bài trong checkpoint: SHA-256 của nội dung (bài trùng nội dung chỉ tóm tắt một lần)."""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def _load_summaries(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        print(f"⚠️ Checkpoint '{path}' bị hỏng, bỏ qua.")
+        return {}
+
+
+def _save_summaries(path, summaries):
+    """Ghi checkpoint nguyên tử: ghi ra file tạm rồi os.replace, nên bị ngắt giữa chừng vẫn còn bản cũ."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(summaries, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _merge_shards(checkpoint_path):
+    """
+    Gộp checkpoint của các shard (kể cả shard còn sót lại từ lần chạy bị ngắt) vào checkpoint chính.
+    Checkpoint chính được ghi xong rồi mới xóa file shard.
+    :return: dict {hash nội dung: tóm tắt}.
+    """
+    summaries = _load_summaries(checkpoint_path)
+    shard_paths = sorted(p for p in glob.glob(checkpoint_path + '.shard-*') if not p.endswith('.tmp'))
+    if not shard_paths:
+        return summaries
+    for shard_path in shard_paths:
+        summaries.update(_load_summaries(shard_path))
+    _save_summaries(checkpoint_path, summaries)
+    for shard_path in shard_paths:
+        os.remove(shard_path)
+    return summaries
+
+
+def _summarize_shard(jobs, checkpoint_path, checkpoint_every, num_threads, model_name, backend, token_budget):
+    """
+    Tóm tắt một shard [(hash, nội dung), ...] và ghi checkpoint sau mỗi `checkpoint_every` bài.
+    Chạy được trong tiến trình con (mỗi shard dùng num_threads luồng của PyTorch).
+    """
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+    summaries = _load_summaries(checkpoint_path)
+    jobs = [(key, text) for key, text in jobs if key not in summaries]
+    if not jobs:
+        return checkpoint_path
+
+    summarizer = ViT5Summarizer(model_name, backend=backend)
+    for start in range(0, len(jobs), checkpoint_every):
+        chunk = jobs[start:start + checkpoint_every]
+        results = summarizer.summarize_many([text for _, text in chunk], token_budget=token_budget)
+        for (key, _), summary in zip(chunk, results):
+            summaries[key] = summary
+        _save_summaries(checkpoint_path, summaries)
+        print(f"💾 [{os.path.basename(checkpoint_path)}] {min(start + checkpoint_every, len(jobs))}/{len(jobs)} bài.")
+    return checkpoint_path
+
 
 def summarize_for_file(
-    filepath = r'data\bronze\news\news_credit_suisse.json',
-    output_path = r'data\bronze\news\summarized_credit_suisse.json'
+    filepath=os.path.join('data', 'bronze', 'news', 'news_credit_suisse.json'),
+    output_path=os.path.join('data', 'bronze', 'news', 'summarized_credit_suisse.json'),
+    checkpoint_path=None,
+    checkpoint_every=20,
+    num_shards=1,
+    model_name="VietAI/vit5-large-vietnews-summarization",
+    backend="fp32",
+    token_budget=DEFAULT_TOKEN_BUDGET
 ):
+    """
+    Tóm tắt cột 'content' của một file tin tức và ghi ra file mới có thêm trường 'summarision'.
+    - Tóm tắt được lưu vào checkpoint theo hash nội dung sau mỗi `checkpoint_every` bài:
+      chạy lại sau khi bị ngắt sẽ bỏ qua các bài đã có tóm tắt.
+    - num_shards > 1: chia các bài còn lại cho nhiều tiến trình, số luồng PyTorch được chia đều giữa chúng;
+      mỗi shard có checkpoint riêng và được gộp lại khi xong.
+    :param checkpoint_path: Mặc định là `<output_path>.checkpoint.json`.
+    :return: Số bài đã được tóm tắt trong lần chạy này.
+    """
     import pandas as pd
-    summarizer = ViT5Summarizer()
+
+    checkpoint_path = checkpoint_path or output_path + '.checkpoint.json'
+    os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+
+    summaries = _merge_shards(checkpoint_path)
+
     dataset = pd.read_json(filepath)
-    content = dataset['content']
-    summarized_content = pd.Series('', index=content.index, dtype='object')
-    count = 0
-
-    for idx, news in enumerate(content):
-        if idx < 25:
-            continue
-
-        print(f'Processing the {idx}\'th news')
-        summarized_content[idx] = summarizer.summarize_one(news)
-        count=count+1
-        # break
-    
-    dataset['summarision'] = summarized_content
-    print(f'Đã tóm tắt {count} bào báo')
-    
-    
+    content = dataset['content'].fillna('').astype(str)
+    keys = [content_hash(text) for text in content]
+
+    jobs = {}
+    for key, text in zip(keys, content):
+        if key not in summaries and key not in jobs:
+            jobs[key] = text
+    jobs = list(jobs.items())
+    done = sum(key in summaries for key in keys)
+    print(f"📄 {len(content)} bài, {done} đã có tóm tắt, cần tóm tắt {len(jobs)} nội dung mới.")
+
+    num_shards = max(1, min(num_shards, len(jobs)))
+    if num_shards == 1:
+        if jobs:
+            _summarize_shard(jobs, checkpoint_path, checkpoint_every, None, model_name, backend, token_budget)
+    else:
+        import torch
+        num_threads = max(1, torch.get_num_threads() // num_shards)
+        with ProcessPoolExecutor(max_workers=num_shards, mp_context=mp.get_context("spawn")) as executor:
+            futures = [
+                executor.submit(
+                    _summarize_shard,
+                    jobs[shard::num_shards],
+                    f"{checkpoint_path}.shard-{shard}",
+                    checkpoint_every,
+                    num_threads,
+                    model_name,
+                    backend,
+                    token_budget
+                )
+                for shard in range(num_shards)
+            ]
+            for future in futures:
+                future.result()
+
+    summaries = _merge_shards(checkpoint_path)
+    dataset['summarision'] = [summaries.get(key, '') for key in keys]
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
     dataset.to_json(
-        r'..\data\bronze\news\summarized_credit_suisse.json',
+        tmp_path,
         orient='records',
         indent=4,
         force_ascii=False,
-        #encoding='utf-8'  # Thêm cái này để đảm bảo file lưu chuẩn UTF-8
     )
-
-# summarize_for_file()
-
-
-
+    os.replace(tmp_path, output_path)
+    print(f'Đã tóm tắt {len(jobs)} bài báo -> {output_path}')
+    return len(jobs)
 
 
 # --- Test nhanh nếu chạy trực tiếp file này ---
 def main():
     summarizer = ViT5Summarizer()
     test_text = "VietAI là tổ chức phi lợi nhuận với sứ mệnh ươm mầm tài năng về trí tuệ nhân tạo."
-    print("Tóm tắt thử:", summarizer.summarize_one(test_text))
\ No newline at end of file
+    print("Tóm tắt thử:", summarizer.summarize_one(test_text))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import os
+import sys
+import time
+import queue
+import secrets
+import threading
+from multiprocessing.connection import Listener, Client
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+# Unix socket trên Linux/macOS; Windows không có AF_UNIX nên dùng TCP localhost
+if sys.platform == 'win32':
+    DEFAULT_ADDRESS = ('127.0.0.1', 6017)
+else:
+    DEFAULT_ADDRESS = os.path.join('data', 'cache', 'summarizer.sock')
+# multiprocessing.connection unpickle mọi message nhận được: authkey phải bí mật.
+# Server tạo khóa ngẫu nhiên ở lần chạy đầu (file quyền 0600), client đọc lại từ file đó.
+DEFAULT_AUTHKEY_PATH = os.path.join('data', 'cache', 'summarizer.key')
+ENV_AUTHKEY = 'SUMMARIZER_AUTHKEY'
+AUTHKEY_BYTES = 32
+BATCH_WINDOW = 0.05     # giây chờ gom thêm request vào cùng một batch
+MAX_BATCH_TEXTS = 32
+
+
+def load_authkey(path=DEFAULT_AUTHKEY_PATH, create=False):
+    """
+    Authkey dùng chung giữa server và client: biến môi trường SUMMARIZER_AUTHKEY nếu có, nếu không thì đọc file `path`.
+    :param create: True (phía server) thì tạo khóa ngẫu nhiên và lưu vào `path` (quyền 0600) nếu file chưa có.
+    """
+    if os.environ.get(ENV_AUTHKEY):
+        return os.environ[ENV_AUTHKEY].encode('utf-8')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    if not create:
+        raise FileNotFoundError(f"Không tìm thấy authkey '{path}'. Hãy khởi động summarize_server.py trước.")
+
+    key = secrets.token_bytes(AUTHKEY_BYTES)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    os.replace(tmp_path, path)
+    return key
+
+
+class _Request:
+    def __init__(self, texts, max_length, min_length):
+        self.texts = texts
+        self.options = (max_length, min_length)
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class SummarizationServer:
+    def __init__(
+        self,
+        address=DEFAULT_ADDRESS,
+        model_name="VietAI/vit5-large-vietnews-summarization",
+        backend="fp32",
+        authkey=None,
+        batch_window=BATCH_WINDOW,
+        max_batch_texts=MAX_BATCH_TEXTS
+    ):
+        """
+        Tiến trình tóm tắt chạy lâu dài: load model một lần, phục vụ nhiều script / notebook qua socket local.
+        Các request đến trong cùng khoảng `batch_window` được gom lại và chạy chung một lần summarize_many.
+        :param address: Đường dẫn Unix socket (hoặc tuple (host, port) khi chạy TCP).
+        :param backend: Backend của ViT5Summarizer ("fp32" | "int8" | "onnx").
+        :param authkey: Mặc định đọc (hoặc tạo lần đầu) từ DEFAULT_AUTHKEY_PATH.
+        """
+        try:
+            from .summarize_news import ViT5Summarizer
+        except ImportError:
+            from summarize_news import ViT5Summarizer
+
+        self.address = address
+        self.authkey = authkey if authkey is not None else load_authkey(create=True)
+        self.batch_window = batch_window
+        self.max_batch_texts = max_batch_texts
+        self.summarizer = ViT5Summarizer(model_name, backend=backend)
+        self._requests = queue.Queue()
+        self._stopped = threading.Event()
+        self._listener = None
+        self._batch_thread = None
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Gom batch
+    # ---------------------------------------------------------------------------------------------------------------------
+    def _collect_batch(self):
+        """Chờ request đầu tiên, rồi gom thêm các request tới trong batch_window (tối đa max_batch_texts bài)."""
+        first = self._requests.get()
+        if first is None:
+            return None
+        batch, size = [first], len(first.texts)
+        deadline = time.monotonic() + self.batch_window
+        while size < self.max_batch_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._requests.put(None)
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _fail_pending(self):
+        """Trả lỗi cho mọi request còn trong hàng đợi khi server dừng (để các thread _handle không chờ mãi)."""
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None:
+                request.error = "Summarization worker đã dừng."
+                request.done.set()
+
+    def _batch_loop(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                self._fail_pending()
+                return
+            # Request có tham số generate khác nhau thì chạy riêng
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.options, []).append(request)
+            for (max_length, min_length), requests in groups.items():
+                texts = [text for request in requests for text in request.texts]
+                try:
+                    summaries = self.summarizer.summarize_many(texts, max_length=max_length, min_length=min_length)
+                except Exception as e:
+                    for request in requests:
+                        request.error = str(e)
+                        request.done.set()
+                    continue
+                start = 0
+                for request in requests:
+                    request.result = summaries[start:start + len(request.texts)]
+                    start += len(request.texts)
+                    request.done.set()
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Kết nối
+    # ---------------------------------------------------------------------------------------------------------------------
+    def _handle(self, conn):
+        with conn:
+            while not self._stopped.is_set():
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                op = message.get('op')
+                if op == 'ping':
+                    conn.send({'ok': True})
+                    continue
+                if op != 'summarize':
+                    conn.send({'error': f"Không hỗ trợ op '{op}'."})
+                    continue
+
+                request = _Request(list(message['texts']), message.get('max_length', 256), message.get('min_length', 50))
+                self._requests.put(request)
+                # Server dừng giữa chừng: batch loop trả lỗi cho request còn chờ; nếu batch loop đã thoát thì tự báo lỗi
+                while not request.done.wait(timeout=0.5):
+                    if self._stopped.is_set() and not (self._batch_thread and self._batch_thread.is_alive()):
+                        request.error = "Summarization worker đã dừng."
+                        break
+                if request.error is not None:
+                    conn.send({'error': request.error})
+                else:
+                    conn.send({'summaries': request.result})
+
+    def serve_forever(self):
+        """Chạy server cho tới khi bị ngắt (Ctrl+C) hoặc gọi close()."""
+        if isinstance(self.address, str):
+            os.makedirs(os.path.dirname(os.path.abspath(self.address)), exist_ok=True)
+            if os.path.exists(self.address):
+                # Socket còn sót lại từ lần chạy trước
+                os.remove(self.address)
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self._batch_thread = threading.Thread(target=self._batch_loop, daemon=True)
+        self._batch_thread.start()
+        print(f"🚀 Summarization worker đang lắng nghe tại {self.address}")
+        try:
+            while not self._stopped.is_set():
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    if self._stopped.is_set():
+                        break
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._requests.put(None)
+        if self._listener is not None:
+            # accept() không tự thoát khi đóng socket từ thread khác: gửi một kết nối giả để đánh thức
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+            self._listener.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+        print("🛑 Đã dừng summarization worker.")
+
+
+class SummarizerClient:
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None):
+        """
+        Client mỏng của SummarizationServer, cùng interface với ViT5Summarizer nhưng không load model.
+        An toàn khi dùng từ nhiều thread (các lần gọi trên cùng một client được tuần tự hóa;
+        muốn server gom batch giữa các thread thì mỗi thread nên có client riêng).
+        :param authkey: Mặc định đọc từ file khóa do server tạo (DEFAULT_AUTHKEY_PATH).
+        """
+        self.address = address
+        self._conn = Client(address, authkey=authkey if authkey is not None else load_authkey())
+        self._lock = threading.Lock()
+
+    def _call(self, message):
+        with self._lock:
+            self._conn.send(message)
+            reply = self._conn.recv()
+        if 'error' in reply:
+            raise RuntimeError(f"Summarization worker lỗi: {reply['error']}")
+        return reply
+
+    def ping(self):
+        return self._call({'op': 'ping'}).get('ok', False)
+
+    def summarize_many(self, texts, max_length=256, min_length=50):
+        return self._call({
+            'op': 'summarize',
+            'texts': list(texts),
+            'max_length': max_length,
+            'min_length': min_length,
+        })['summaries']
+
+    def summarize_one(self, text, max_length=256, min_length=50):
+        return self.summarize_many([text], max_length=max_length, min_length=min_length)[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def serve(address=DEFAULT_ADDRESS, backend="fp32"):
+    """Khởi động worker (load model một lần) và phục vụ tới khi bị ngắt."""
+    SummarizationServer(address, backend=backend).serve_forever()
+
+
+if __name__ == "__main__":
+    serve()
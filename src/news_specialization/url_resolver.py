@@ -0,0 +1,251 @@
+import os
+import re
+import json
+import time
+import base64
+import sqlite3
+import threading
+from urllib import request, parse, error
+
+# ===========================================================================================================================
+# Hyperparameter Configuration
+# ===========================================================================================================================
+GOOGLE_NEWS_BASE_URL = 'https://news.google.com'
+# Mọi host thuộc google.com (consent.google.com, www.google.com/url?...) chỉ là trang trung gian, không phải URL gốc
+GOOGLE_DOMAIN = 'google.com'
+DEFAULT_CACHE_PATH = os.path.join('data', 'cache', 'gnews_url_map.sqlite')
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+)
+
+# Token bài viết nằm sau /read/, /articles/ hoặc /rss/articles/
+_TOKEN_PATTERN = re.compile(r'/(?:rss/)?(?:read|articles)/([A-Za-z0-9_\-]+)')
+_URL_IN_BYTES_PATTERN = re.compile(rb'https?://[\x21-\x7e]+')
+_SIGNATURE_PATTERN = re.compile(r'data-n-a-sg="([^"]+)"')
+_TIMESTAMP_PATTERN = re.compile(r'data-n-a-ts="([^"]+)"')
+_ORIGINAL_URL_PATTERN = re.compile(r'data-n-au="([^"]+)"')
+
+
+def is_google_host(host):
+    """True nếu host là google.com hoặc một subdomain của nó (news., consent., www. ...)."""
+    host = (host or '').lower()
+    return host == GOOGLE_DOMAIN or host.endswith('.' + GOOGLE_DOMAIN)
+
+
+class _NoRedirect(request.HTTPRedirectHandler):
+    """Chặn urllib tự đi theo redirect để đọc header Location."""
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class GoogleNewsResolver:
+    def __init__(
+        self,
+        cache_path=DEFAULT_CACHE_PATH,
+        timeout=10,
+        base_url=GOOGLE_NEWS_BASE_URL
+    ):
+        """
+        Giải link news.google.com/read/CBMi... về URL gốc của tờ báo mà không cần mở trình duyệt.
+        Thứ tự thử: cache trên đĩa -> giải mã token -> HTTP (redirect / batchexecute) -> Selenium (fallback).
+        :param cache_path: File SQLite lưu bảng ánh xạ URL Google News -> URL gốc.
+        :param timeout: Timeout (giây) cho mỗi request HTTP.
+        :param base_url: Gốc của Google News (đổi sang server giả lập khi test).
+        """
+        self.timeout = timeout
+        self.base_url = base_url.rstrip('/')
+        self.stats = {'cache': 0, 'token': 0, 'http': 0, 'selenium': 0, 'failed': 0}
+
+        self._lock = threading.Lock()
+        self._memory = {}
+        self._opener = request.build_opener(_NoRedirect)
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS url_map ("
+            " gnews_url TEXT PRIMARY KEY,"
+            " original_url TEXT NOT NULL,"
+            " method TEXT,"
+            " resolved_at REAL)"
+        )
+        self._conn.commit()
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Cache
+    # ---------------------------------------------------------------------------------------------------------------------
+    def lookup(self, url):
+        """Tra cache (bộ nhớ rồi tới SQLite). Trả về None nếu chưa có."""
+        with self._lock:
+            if url in self._memory:
+                return self._memory[url]
+            row = self._conn.execute(
+                "SELECT original_url FROM url_map WHERE gnews_url = ?", (url,)
+            ).fetchone()
+            if row:
+                self._memory[url] = row[0]
+                return row[0]
+        return None
+
+    def remember(self, url, original_url, method):
+        """Ghi một ánh xạ mới vào cache."""
+        with self._lock:
+            self._memory[url] = original_url
+            self._conn.execute(
+                "INSERT OR REPLACE INTO url_map VALUES (?, ?, ?, ?)",
+                (url, original_url, method, time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def is_original_url(self, url):
+        """URL gốc hợp lệ: http(s), có host, và không phải Google News / trang consent, redirect của *.google.com."""
+        parsed = parse.urlparse(url or '')
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname or is_google_host(parsed.hostname):
+            return False
+        return parsed.netloc != parse.urlparse(self.base_url).netloc
+
+    # ---------------------------------------------------------------------------------------------------------------------
+    # Các chiến lược giải link
+    # ---------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def extract_token(url):
+        """Lấy token bài viết (phần CBMi...) từ URL Google News."""
+        match = _TOKEN_PATTERN.search(parse.urlparse(url).path)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def decode_token(token):
+        """
+        Giải mã token kiểu cũ: base64 của một protobuf chứa trực tiếp URL gốc.
+        Token kiểu mới (bắt đầu bằng 'AU_yqL' sau khi giải mã) không chứa URL -> trả về None.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        except (ValueError, TypeError):
+            return None
+
+        # Định dạng protobuf: 0x08 0x13 0x22 <varint độ dài> <URL> ...
+        prefix = b'\x08\x13\x22'
+        if raw.startswith(prefix):
+            length, shift, pos = 0, 0, len(prefix)
+            while pos < len(raw):
+                byte = raw[pos]
+                length |= (byte & 0x7f) << shift
+                pos += 1
+                if not byte & 0x80:
+                    break
+                shift += 7
+            candidate = raw[pos:pos + length]
+            if candidate.startswith((b'http://', b'https://')):
+                return candidate.decode('utf-8', errors='ignore')
+
+        match = _URL_IN_BYTES_PATTERN.search(raw)
+        return match.group(0).decode('ascii') if match else None
+
+    def _http_get(self, url):
+        req = request.Request(url, headers={'User-Agent': USER_AGENT})
+        try:
+            with self._opener.open(req, timeout=self.timeout) as resp:
+                return resp.status, resp.headers, resp.read().decode('utf-8', errors='ignore')
+        except error.HTTPError as e:
+            # Với _NoRedirect, các mã 3xx đi vào đây
+            return e.code, e.headers, ''
+
+    def _resolve_batchexecute(self, token, signature, timestamp):
+        """Gọi endpoint batchexecute của Google News (giống trang web) để lấy URL gốc."""
+        payload = [
+            'Fbv4je',
+            f'["garturlreq",[["X","X",["X","X"],null,null,1,1,"US:en",null,1,null,null,null,null,null,0,1],'
+            f'"X","X",1,[1,1,1],1,1,null,0,0,null,0],"{token}",{timestamp},"{signature}"]'
+        ]
+        body = parse.urlencode({'f.req': json.dumps([[payload]])}).encode('utf-8')
+        req = request.Request(
+            f'{self.base_url}/_/DotsSplashUi/data/batchexecute',
+            data=body,
+            headers={
+                'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8',
+                'User-Agent': USER_AGENT,
+            }
+        )
+        with request.urlopen(req, timeout=self.timeout) as resp:
+            text = resp.read().decode('utf-8', errors='ignore')
+
+        # Phản hồi có dạng ")]}'\n\n[...]" -> phần JSON nằm sau dòng trống đầu tiên
+        parsed = json.loads(text.split('\n\n', 1)[1])[:-2]
+        return json.loads(parsed[0][2])[1]
+
+    def resolve_http(self, url):
+        """
+        Giải link bằng HTTP thuần:
+        1. Nếu server trả 3xx sang domain khác -> lấy header Location.
+        2. Nếu trang chứa data-n-au -> đó là URL gốc.
+        3. Nếu trang chứa chữ ký data-n-a-sg/data-n-a-ts -> gọi batchexecute.
+        """
+        token = self.extract_token(url)
+        path = parse.urlparse(url).path if token is None else f'/rss/articles/{token}'
+        status, headers, html = self._http_get(self.base_url + path)
+
+        if 300 <= status < 400:
+            location = headers.get('Location', '')
+            return location if self.is_original_url(location) else None
+
+        match = _ORIGINAL_URL_PATTERN.search(html)
+        if match:
+            return match.group(1)
+
+        signature = _SIGNATURE_PATTERN.search(html)
+        timestamp = _TIMESTAMP_PATTERN.search(html)
+        if token and signature and timestamp:
+            return self._resolve_batchexecute(token, signature.group(1), timestamp.group(1))
+        return None
+
+    def _count(self, method):
+        with self._lock:
+            self.stats[method] += 1
+
+    def resolve(self, url, fallback=None):
+        """
+        Trả về URL gốc cho một link Google News.
+        :param url: Link news.google.com.
+        :param fallback: Hàm fallback(url) -> str (thường mở Selenium), chỉ được gọi khi mọi cách khác thất bại.
+        :return: URL gốc, hoặc None nếu không giải được.
+        """
+        cached = self.lookup(url)
+        if cached:
+            self._count('cache')
+            return cached
+
+        token = self.extract_token(url)
+        if token:
+            decoded = self.decode_token(token)
+            if self.is_original_url(decoded):
+                self._count('token')
+                self.remember(url, decoded, 'token')
+                return decoded
+
+        try:
+            resolved = self.resolve_http(url)
+        except Exception as e:
+            print(f"   -> Giải link qua HTTP thất bại ({url[:80]}...): {e}")
+            resolved = None
+        if self.is_original_url(resolved):
+            self._count('http')
+            self.remember(url, resolved, 'http')
+            return resolved
+
+        if fallback is not None:
+            resolved = fallback(url)
+            if self.is_original_url(resolved):
+                self._count('selenium')
+                self.remember(url, resolved, 'selenium')
+                return resolved
+
+        self._count('failed')
+        return None
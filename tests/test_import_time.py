@@ -0,0 +1,24 @@
+"""
+Kiểm tra hồi quy thời gian import: mỗi module của src.news_specialization phải import xong trong ngân sách
+khi chạy trong một tiến trình Python mới (các thư viện nặng chỉ được import khi dùng tới).
+Ngân sách mặc định là IMPORT_TIME_BUDGET của CLI; ghi đè bằng biến môi trường NEWS_IMPORT_BUDGET trên máy chậm.
+"""
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.news_specialization.cli import IMPORT_TIME_BUDGET, MODULES, import_seconds
+
+BUDGET = float(os.environ.get('NEWS_IMPORT_BUDGET', IMPORT_TIME_BUDGET))
+PACKAGE = 'src.news_specialization'
+
+
+@pytest.mark.parametrize('module', [PACKAGE] + [f'{PACKAGE}.{name}' for name in MODULES])
+def test_import_within_budget(module):
+    seconds = import_seconds(module, cwd=REPO_ROOT)
+    assert seconds <= BUDGET, f"import {module} mất {seconds * 1000:.0f} ms (ngân sách {BUDGET * 1000:.0f} ms)"
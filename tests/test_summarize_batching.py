@@ -0,0 +1,103 @@
+"""
+Kiểm tra summarize_many với tokenizer / model giả (không tải ViT5): kết quả giữ đúng thứ tự đầu vào,
+bài quá ngắn trả về "", và mỗi batch (đã sắp theo độ dài) không vượt token_budget sau padding.
+"""
+import os
+import random
+import sys
+
+import pytest
+
+torch = pytest.importorskip('torch')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.news_specialization.summarize_news import ViT5Summarizer
+
+MARKER_OFFSET = 1000    # id token đánh dấu bài thứ i là MARKER_OFFSET + i
+FILLER_ID = 5
+PAD_ID = 0
+
+
+class StubTokenizer:
+    """Mỗi từ là một token; từ 'bai<i>' được mã hoá thành id đánh dấu để biết output thuộc bài nào."""
+    def __call__(self, inputs, truncation=True, max_length=None):
+        input_ids = []
+        for text in inputs:
+            ids = [MARKER_OFFSET + int(w[3:]) if w.startswith('bai') else FILLER_ID for w in text.split()]
+            input_ids.append(ids[:max_length] if truncation else ids)
+        return {"input_ids": input_ids}
+
+    def pad(self, features, return_tensors="pt"):
+        rows = features["input_ids"]
+        width = max(len(ids) for ids in rows)
+        return {
+            "input_ids": torch.tensor([ids + [PAD_ID] * (width - len(ids)) for ids in rows]),
+            "attention_mask": torch.tensor([[1] * len(ids) + [0] * (width - len(ids)) for ids in rows]),
+        }
+
+    def batch_decode(self, outputs, skip_special_tokens=True, clean_up_tokenization_spaces=True):
+        return [f"tóm tắt bài {int(row.max()) - MARKER_OFFSET}" for row in outputs]
+
+
+class StubModel:
+    """generate() trả lại chính input và ghi lại (input_ids, attention_mask) của từng batch."""
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, input_ids, attention_mask, **kwargs):
+        self.calls.append((input_ids, attention_mask))
+        return input_ids
+
+
+def make_summarizer():
+    summarizer = ViT5Summarizer.__new__(ViT5Summarizer)
+    summarizer.backend = "fp32"
+    summarizer.device = "cpu"
+    summarizer.tokenizer = StubTokenizer()
+    summarizer.model = StubModel()
+    return summarizer
+
+
+def make_texts(n, seed=0):
+    rng = random.Random(seed)
+    # Độ dài ngẫu nhiên (token); bài thứ 3 quá ngắn (< 50 ký tự) nên không được tóm tắt
+    return [
+        "ngắn" if i == 3 else f"bai{i} " + "chữ " * rng.randint(15, 60)
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize('token_budget, max_batch_size', [(128, 16), (256, 4), (1024, 16)])
+def test_summaries_keep_input_order(token_budget, max_batch_size):
+    summarizer = make_summarizer()
+    texts = make_texts(25)
+    summaries = summarizer.summarize_many(texts, token_budget=token_budget, max_batch_size=max_batch_size)
+
+    assert summaries == ["" if i == 3 else f"tóm tắt bài {i}" for i in range(len(texts))]
+    # Mỗi bài hợp lệ được sinh đúng một lần
+    assert sum(len(ids) for ids, _ in summarizer.model.calls) == len(texts) - 1
+
+
+@pytest.mark.parametrize('token_budget, max_batch_size', [(128, 16), (256, 4), (1024, 16)])
+def test_batches_respect_token_budget(token_budget, max_batch_size):
+    summarizer = make_summarizer()
+    summarizer.summarize_many(make_texts(25, seed=1), token_budget=token_budget, max_batch_size=max_batch_size)
+
+    lengths_per_batch = []
+    for input_ids, attention_mask in summarizer.model.calls:
+        assert input_ids.shape[0] <= max_batch_size
+        assert input_ids.numel() <= token_budget
+        lengths_per_batch.append(attention_mask.sum(dim=1).tolist())
+
+    # Batch được xếp theo độ dài giảm dần: bài dài nhất của batch sau không dài hơn bài ngắn nhất của batch trước
+    for previous, current in zip(lengths_per_batch, lengths_per_batch[1:]):
+        assert max(current) <= min(previous)
+
+
+def test_all_short_texts_skip_generation():
+    summarizer = make_summarizer()
+    assert summarizer.summarize_many(["", None, "quá ngắn"]) == ["", "", ""]
+    assert summarizer.model.calls == []
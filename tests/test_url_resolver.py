@@ -0,0 +1,144 @@
+"""
+Kiểm tra GoogleNewsResolver trên một server HTTP giả lập Google News (không cần mạng):
+giải mã token base64, redirect 3xx, batchexecute, và từ chối các trang trung gian *.google.com.
+"""
+import base64
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import parse
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.news_specialization.url_resolver import GoogleNewsResolver
+
+ORIGINAL_URL = 'https://vnexpress.net/bai-viet-goc-4650000.html'
+CONSENT_URL = 'https://consent.google.com/ml?continue=https://news.google.com/rss/articles/x'
+
+
+def legacy_token(url):
+    """Token kiểu cũ: protobuf 0x08 0x13 0x22 <độ dài> <URL> được mã hoá base64 urlsafe."""
+    raw = b'\x08\x13\x22' + bytes([len(url)]) + url.encode('ascii') + b'\xd2\x01\x00'
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+class FakeGoogleNews(BaseHTTPRequestHandler):
+    """
+    /rss/articles/REDIRECT    -> 302 sang URL gốc
+    /rss/articles/CONSENT     -> 302 sang consent.google.com
+    /rss/articles/SIGNED      -> trang có chữ ký data-n-a-sg/ts, URL gốc lấy qua batchexecute
+    /rss/articles/CONSENTBE   -> như SIGNED nhưng batchexecute trả về consent.google.com
+    """
+    batch_requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body='', headers=()):
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        data = body.encode('utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        token = self.path.rsplit('/', 1)[-1]
+        if token == 'REDIRECT':
+            self._send(302, headers=[('Location', ORIGINAL_URL)])
+        elif token == 'CONSENT':
+            self._send(302, headers=[('Location', CONSENT_URL)])
+        elif token in ('SIGNED', 'CONSENTBE'):
+            self._send(200, f'<c-wiz><div jscontroller="x" data-n-a-sg="SIG-{token}" data-n-a-ts="1700000000"></div>')
+        else:
+            self._send(404)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')
+        inner = json.loads(parse.parse_qs(body)['f.req'][0])[0][0][1]
+        FakeGoogleNews.batch_requests.append(inner)
+        url = CONSENT_URL if 'SIG-CONSENTBE' in inner else ORIGINAL_URL
+        envelope = [
+            ['wrb.fr', 'Fbv4je', json.dumps(['garturlres', url, 1]), None, None, None, 'generic'],
+            ['di', 10],
+            ['af.httprm', 10, '-1', 1],
+        ]
+        self._send(200, ")]}'\n\n" + json.dumps(envelope))
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGoogleNews)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def resolver(tmp_path, base_url):
+    FakeGoogleNews.batch_requests = []
+    resolver = GoogleNewsResolver(cache_path=str(tmp_path / 'url_map.sqlite'), timeout=5, base_url=base_url)
+    yield resolver
+    resolver.close()
+
+
+def test_decode_legacy_token_without_http(resolver):
+    url = f'https://news.google.com/rss/articles/{legacy_token(ORIGINAL_URL)}?oc=5'
+    assert resolver.resolve(url) == ORIGINAL_URL
+    assert resolver.stats['token'] == 1 and resolver.stats['http'] == 0
+    # Lần sau lấy từ cache
+    assert resolver.resolve(url) == ORIGINAL_URL
+    assert resolver.stats['cache'] == 1
+
+
+def test_follow_redirect_location(resolver):
+    url = 'https://news.google.com/rss/articles/REDIRECT'
+    assert resolver.resolve(url) == ORIGINAL_URL
+    assert resolver.stats['http'] == 1
+    assert resolver.lookup(url) == ORIGINAL_URL
+
+
+def test_batchexecute_with_page_signature(resolver):
+    url = 'https://news.google.com/read/SIGNED?hl=vi'
+    assert resolver.resolve(url) == ORIGINAL_URL
+    assert resolver.stats['http'] == 1
+    assert len(FakeGoogleNews.batch_requests) == 1
+    assert '"SIGNED",1700000000,"SIG-SIGNED"' in FakeGoogleNews.batch_requests[0]
+
+
+@pytest.mark.parametrize('token', ['CONSENT', 'CONSENTBE'])
+def test_consent_page_is_not_cached(resolver, token):
+    url = f'https://news.google.com/rss/articles/{token}'
+    assert resolver.resolve(url) is None
+    assert resolver.stats['failed'] == 1
+    assert resolver.lookup(url) is None
+
+
+def test_fallback_result_on_google_host_is_rejected(resolver):
+    url = 'https://news.google.com/rss/articles/MISSING'
+    assert resolver.resolve(url, fallback=lambda link: CONSENT_URL) is None
+    assert resolver.lookup(url) is None
+    assert resolver.resolve(url, fallback=lambda link: ORIGINAL_URL) == ORIGINAL_URL
+    assert resolver.stats['selenium'] == 1
+
+
+@pytest.mark.parametrize('url, expected', [
+    (ORIGINAL_URL, True),
+    ('https://consent.google.com/ml?continue=x', False),
+    ('https://www.google.com/url?q=https://vnexpress.net', False),
+    ('https://news.google.com/articles/abc', False),
+    ('https://notgoogle.com/a', True),
+    ('about:blank', False),
+    (None, False),
+])
+def test_is_original_url(resolver, url, expected):
+    assert resolver.is_original_url(url) is expected